@@ -1,11 +1,47 @@
 # ORCHIX v1.4 - Template-only manifest loader
+'''Manifests come from a process-wide registry: templates.json is parsed once
+and again only when its mtime or size changes. Installer/updater classes are
+built on first use per template.
+'''
 import json
+import os
+import threading
 from pathlib import Path
 
+TEMPLATES_FILE = Path(__file__).parent / 'templates.json'
 
-def _load_templates():
+
+class _Manifest(dict):
+    '''Manifest dict that builds installer_class/updater_class on first access.
+    Shared between callers; treat it as read-only.
+    '''
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = threading.Lock()
+
+    def _build(self, key):
+        with self._lock:
+            if not dict.__contains__(self, key):
+                dict.__setitem__(self, key, _CLASS_FACTORIES[key](self['_template']))
+            return dict.__getitem__(self, key)
+
+    def __missing__(self, key):
+        if key in _CLASS_FACTORIES:
+            return self._build(key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _CLASS_FACTORIES:
+            return self[key]
+        return super().get(key, default)
+
+    def __contains__(self, key):
+        return key in _CLASS_FACTORIES or super().__contains__(key)
+
+
+def _load_templates(templates_file=TEMPLATES_FILE):
     '''Load all apps from templates.json and build synthetic manifests.'''
-    templates_file = Path(__file__).parent / 'templates.json'
     if not templates_file.exists():
         return {}
 
@@ -21,7 +57,7 @@ def _load_templates():
         if not name:
             continue
 
-        manifest = {
+        manifest = _Manifest({
             'name': name,
             'display_name': t.get('display_name', name),
             'description': t.get('description', ''),
@@ -39,10 +75,7 @@ def _load_templates():
             'image_size_mb': t.get('image_size_mb', 0),
             '_template': t,
             '_is_template': True,
-        }
-
-        manifest['installer_class'] = _make_installer_class(t)
-        manifest['updater_class'] = _make_updater_class(t)
+        })
 
         manifests[name] = manifest
 
@@ -71,18 +104,79 @@ def _make_updater_class(template):
     return BoundTemplateUpdater
 
 
+# Manifest keys whose values are created lazily
+_CLASS_FACTORIES = {
+    'installer_class': _make_installer_class,
+    'updater_class': _make_updater_class,
+}
+
+
+class TemplateRegistry:
+    '''Parsed templates indexed by name, reloaded when templates.json changes.'''
+
+    def __init__(self, templates_file=TEMPLATES_FILE):
+        self.templates_file = Path(templates_file)
+        self._lock = threading.Lock()
+        self._signature = None
+        self._manifests = {}
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.templates_file)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def manifests(self):
+        '''Name -> manifest for the current templates.json (do not mutate).'''
+        signature = self._file_signature()
+        if signature is not None and signature == self._signature:
+            return self._manifests
+        with self._lock:
+            if signature is None or signature != self._signature:
+                self._manifests = _load_templates(self.templates_file)
+                self._signature = signature
+            return self._manifests
+
+    def get(self, app_name):
+        return self.manifests().get(app_name)
+
+    def names(self):
+        return list(self.manifests())
+
+    def invalidate(self):
+        '''Force a re-read on next access.'''
+        with self._lock:
+            self._signature = None
+
+
+# Global instance
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_template_registry():
+    '''Get global template registry instance'''
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = TemplateRegistry()
+    return _registry
+
+
 def load_manifest(app_name):
     '''Load a single app manifest by name.'''
-    templates = _load_templates()
-    if app_name in templates:
-        return templates[app_name]
+    manifest = get_template_registry().get(app_name)
+    if manifest is not None:
+        return manifest
     raise ValueError(f"App '{app_name}' not found")
 
 
 def load_all_manifests():
     '''Load manifests for all template apps.'''
     try:
-        return _load_templates()
+        return dict(get_template_registry().manifests())
     except Exception as e:
         print(f"Warning: Could not load templates: {e}")
         return {}
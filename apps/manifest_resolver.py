@@ -0,0 +1,166 @@
+# ORCHIX v1.4 - Container -> template resolver
+'''Maps container names and images to template manifests.
+
+Names resolve through a prefix trie of template names: exact match, else the
+longest template name followed by a digit, '-' or '_' (n8n2, n8n-dev,
+uptime_kuma_2 -> uptime_kuma; "rediscover" does not match "redis").
+Images resolve through an index of the templates' image repositories, then
+by the repository's last path component (bitnami/redis, <name>:orchix).
+Results are memoized by container name and image ID and dropped whenever
+templates.json is reloaded.
+'''
+import threading
+
+# Memoized entries kept per table before it is cleared
+_MEMO_LIMIT = 4096
+_END = ''
+# Memo marker for "not looked up yet" (None is a valid cached result)
+_MISSING = object()
+
+
+def _separator_ok(rest):
+    return not rest or rest[0].isdigit() or rest[0] in ('-', '_')
+
+
+def normalize_image(image):
+    '''Repository of an image reference, lowercased, without registry
+    defaults, tag or digest: "docker.io/library/redis:7" -> "redis".
+    '''
+    ref = (image or '').strip().lower().split('@', 1)[0]
+    slash = ref.rfind('/')
+    colon = ref.rfind(':')
+    if colon > slash:
+        ref = ref[:colon]
+    for prefix in ('docker.io/', 'index.docker.io/', 'registry-1.docker.io/'):
+        if ref.startswith(prefix):
+            ref = ref[len(prefix):]
+            break
+    if ref.startswith('library/'):
+        ref = ref[len('library/'):]
+    return ref
+
+
+class ManifestResolver:
+    '''Trie + image index over one version of the template registry.'''
+
+    def __init__(self, registry=None):
+        self._registry = registry
+        self._lock = threading.Lock()
+        self._manifests = None
+        self._trie = {}
+        self._images = {}
+        self._by_name = {}
+        self._by_image = {}
+
+    def _current(self):
+        '''Manifests for the current templates.json; rebuilds indexes on reload.'''
+        if self._registry is None:
+            from apps.manifest_loader import get_template_registry
+            self._registry = get_template_registry()
+        manifests = self._registry.manifests()
+        if manifests is not self._manifests:
+            with self._lock:
+                if manifests is not self._manifests:
+                    self._build(manifests)
+        return manifests
+
+    def _build(self, manifests):
+        trie = {}
+        images = {}
+        for name, manifest in manifests.items():
+            node = trie
+            for ch in name:
+                node = node.setdefault(ch, {})
+            node[_END] = name
+            image = (manifest.get('_template') or {}).get('image')
+            if image:
+                images.setdefault(normalize_image(image), name)
+        self._trie, self._images = trie, images
+        self._by_name, self._by_image = {}, {}
+        self._manifests = manifests
+
+    def _match_name(self, name):
+        '''Longest template name that name starts with, followed by a separator.'''
+        node, best = self._trie, None
+        for i, ch in enumerate(name):
+            if _END in node and _separator_ok(name[i:]):
+                best = node[_END]
+            node = node.get(ch)
+            if node is None:
+                return best
+        return node.get(_END, best)
+
+    @staticmethod
+    def _remember(memo, key, value):
+        if len(memo) >= _MEMO_LIMIT:
+            memo.clear()
+        memo[key] = value
+
+    # ============ Lookups ============
+
+    def template_for_name(self, container_name):
+        '''Template name for a container/instance name, or None.'''
+        self._current()
+        if not container_name:
+            return None
+        memo = self._by_name
+        # Read once: a concurrent _remember may clear the memo between lookups
+        name = memo.get(container_name, _MISSING)
+        if name is _MISSING:
+            name = self._match_name(container_name)
+            self._remember(memo, container_name, name)
+        return name
+
+    def template_for_image(self, image, image_id=None):
+        '''Template name for an image reference, or None. image_id (the
+        sha256 ID of the local image) is used as the memo key when given.
+        '''
+        self._current()
+        key = image_id or image
+        if not key:
+            return None
+        memo = self._by_image
+        name = memo.get(key, _MISSING)
+        if name is _MISSING:
+            repo = normalize_image(image)
+            name = self._images.get(repo)
+            if name is None and repo:
+                base = repo.rsplit('/', 1)[-1]
+                name = self._match_name(base) or self._match_name(base.replace('-', '_'))
+            self._remember(memo, key, name)
+        return name
+
+    def resolve(self, container_name, image=None, image_id=None, inspect=False):
+        '''Manifest for a container, or None. Falls back to the image when the
+        name doesn't match; inspect=True looks the image up if not given.
+        '''
+        manifests = self._current()
+        name = self.template_for_name(container_name)
+        if name is None and not image and inspect and container_name:
+            from utils import docker_api
+            info = docker_api.inspect_container(container_name) or {}
+            image = (info.get('Config') or {}).get('Image')
+            image_id = info.get('Image')
+        if name is None and image:
+            name = self.template_for_image(image, image_id)
+        return manifests.get(name) if name else None
+
+
+# Global instance
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_manifest_resolver():
+    '''Get global manifest resolver instance'''
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = ManifestResolver()
+    return _resolver
+
+
+def resolve_manifest(container_name, image=None, inspect=False):
+    '''Manifest for a container name (and optionally its image), or None.'''
+    return get_manifest_resolver().resolve(container_name, image=image, inspect=inspect)
@@ -6,6 +6,7 @@ import subprocess
 from apps.installer_base import BaseInstaller
 from utils.docker_progress import run_docker_with_progress
 from utils.docker_utils import ORCHIX_NETWORK
+from utils.orchix_instances import LABEL_INSTANCE, LABEL_TEMPLATE, LABEL_COMPOSE_PATH, default_compose_path, get_instance_registry
 from utils.validation import sanitize_yaml_value, validate_container_name
 
 
@@ -45,6 +46,15 @@ def _parse_docker_error(stderr):
     return 'Unknown error. Check Docker logs for details.'
 
 
+def _image_volume_paths(image):
+    """Paths the image declares as VOLUME (Config.Volumes), sorted."""
+    if not image:
+        return []
+    from utils import docker_api
+    info = docker_api.inspect_image(image) or {}
+    return sorted((info.get('Config') or {}).get('Volumes') or {})
+
+
 def _read_key_from_volume(volume_name, key_file, json_field):
     """Read a JSON field from a file inside a Docker named volume. Returns None if not found."""
     try:
@@ -213,11 +223,8 @@ class TemplateInstaller(BaseInstaller):
         instance_name = config.get('instance_name', self.template['name'])
         # Validate instance name to prevent path traversal
         instance_name = validate_container_name(instance_name)
-        compose = self._generate_compose(instance_name, config)
-        compose_file = f"docker-compose-{instance_name}.yml"
-
-        with open(compose_file, 'w', encoding='utf-8') as f:
-            f.write(compose)
+        # Always in the ORCHIX root, independent of the process CWD
+        compose_file = str(default_compose_path(instance_name))
 
         # Pull image with progress bar
         image = self.template.get('image', '')
@@ -225,14 +232,16 @@ class TemplateInstaller(BaseInstaller):
             from utils.docker_progress import run_docker_pull_with_progress
             pull_result = run_docker_pull_with_progress(image)
             if pull_result.returncode != 0:
-                try:
-                    os.remove(compose_file)
-                except OSError:
-                    pass
                 self._cleanup_failed(instance_name)
                 self._last_error = f"Failed to pull image {image}"
                 return False
 
+        # Image VOLUMEs get named volumes in the compose file, so the first
+        # `up` creates no anonymous volumes
+        compose = self._generate_compose(instance_name, config, _image_volume_paths(image))
+        with open(compose_file, 'w', encoding='utf-8') as f:
+            f.write(compose)
+
         # Ensure orchix network exists before starting container
         from utils.docker_utils import ensure_orchix_network
         ensure_orchix_network()
@@ -246,16 +255,11 @@ class TemplateInstaller(BaseInstaller):
         )
 
         if result.returncode != 0:
-            try:
-                os.remove(compose_file)
-            except OSError:
-                pass
             self._cleanup_failed(instance_name)
             self._last_error = _parse_docker_error(result.stderr or '')
             return False
 
-        # Clean up anonymous volumes after successful install
-        self._cleanup_anon_volumes(instance_name)
+        get_instance_registry().invalidate()
         return True
 
     def get_last_error(self):
@@ -263,9 +267,14 @@ class TemplateInstaller(BaseInstaller):
         return getattr(self, '_last_error', '')
 
     def _cleanup_failed(self, instance_name):
-        """Remove container and orphan volumes after failed install."""
+        """Remove container, compose file and orphan volumes after failed install."""
         from utils.docker_utils import safe_docker_run
 
+        try:
+            os.remove(default_compose_path(instance_name))
+        except OSError:
+            pass
+
         # Get anonymous volumes before removing container
         result = safe_docker_run(
             ['docker', 'inspect', instance_name, '--format', '{{json .Mounts}}'],
@@ -296,91 +305,16 @@ class TemplateInstaller(BaseInstaller):
             )
 
         # Remove named volumes we created
-        for v in self.template.get('volumes', []):
-            if not v.get('bind'):
-                vol_name = f"{instance_name}_{v['name_suffix']}"
-                safe_docker_run(
-                    ['docker', 'volume', 'rm', '-f', vol_name],
-                    capture_output=True, text=True
-                )
-
-    def _cleanup_anon_volumes(self, instance_name):
-        """Map image VOLUME paths to named volumes to prevent anonymous volumes."""
-        from utils.docker_utils import safe_docker_run
-
-        # Inspect container mounts to find anonymous volumes and their paths
-        result = safe_docker_run(
-            ['docker', 'inspect', instance_name, '--format', '{{json .Mounts}}'],
-            capture_output=True, text=True
-        )
-        if not result or result.returncode != 0:
-            return
-
-        try:
-            mounts = json.loads(result.stdout.strip())
-        except (json.JSONDecodeError, ValueError):
-            return
-
-        anon_mounts = []
-        for m in mounts:
-            name = m.get('Name', '')
-            if (m.get('Type') == 'volume' and len(name) == 64
-                    and all(c in '0123456789abcdef' for c in name)):
-                anon_mounts.append({'name': name, 'dest': m['Destination']})
-
-        if not anon_mounts:
-            return
-
-        compose_file = f"docker-compose-{instance_name}.yml"
-
-        # Add named volumes for each anonymous mount path in compose
-        with open(compose_file, 'r', encoding='utf-8') as f:
-            lines = f.read().splitlines()
-
-        # Find last service-level volume line (indented "      - ...")
-        last_svc_vol = -1
-        for i, line in enumerate(lines):
-            if re.match(r'^      - \S+:/', line):
-                last_svc_vol = i
-
-        new_vol_lines = []
-        new_vol_defs = []
-        for m in anon_mounts:
-            suffix = m['dest'].strip('/').replace('/', '_').replace('.', '_')
-            vol_name = f"{instance_name}_{suffix}"
-            new_vol_lines.append(f"      - {vol_name}:{m['dest']}")
-            new_vol_defs.append(f"  {vol_name}:\n    name: {vol_name}")
-
-        # Insert volume mappings after last service volume line
-        if last_svc_vol >= 0:
-            for j, vl in enumerate(new_vol_lines):
-                lines.insert(last_svc_vol + 1 + j, vl)
-
-        # Add volume definitions at end
-        for vd in new_vol_defs:
-            lines.append(vd)
-
-        with open(compose_file, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(lines) + '\n')
-
-        # Recreate: down removes container + anon volumes, up uses updated compose
-        safe_docker_run(
-            ['docker', 'compose', '-f', compose_file, 'down'],
-            capture_output=True, text=True
-        )
-        for m in anon_mounts:
+        vol_names = [f"{instance_name}_{v['name_suffix']}"
+                     for v in self.template.get('volumes', []) if not v.get('bind')]
+        vol_names += getattr(self, '_image_volume_names', [])
+        for vol_name in vol_names:
             safe_docker_run(
-                ['docker', 'volume', 'rm', '-f', m['name']],
+                ['docker', 'volume', 'rm', '-f', vol_name],
                 capture_output=True, text=True
             )
-        from utils.docker_utils import ensure_orchix_network
-        ensure_orchix_network()
-        safe_docker_run(
-            ['docker', 'compose', '-f', compose_file, 'up', '-d'],
-            capture_output=True, text=True
-        )
 
-    def _generate_compose(self, instance_name, config):
+    def _generate_compose(self, instance_name, config, image_volumes=()):
         t = self.template
         port = config.get('port', t['ports'][0]['default_host'] if t.get('ports') else 8080)
 
@@ -407,6 +341,23 @@ class TemplateInstaller(BaseInstaller):
                 vol_lines.append(f"      - {vol_name}:{v['mount']}")
                 vol_defs.append(f"  {vol_name}:\n    name: {vol_name}")
 
+        # Image VOLUME paths the template doesn't mount: named volumes instead
+        # of the anonymous ones Docker would create
+        mounted = {v['mount'].rstrip('/') for v in t.get('volumes', [])}
+        used = {d.split(':', 1)[0].strip() for d in vol_defs}
+        self._image_volume_names = []
+        for path in image_volumes:
+            if path.rstrip('/') in mounted:
+                continue
+            suffix = path.strip('/').replace('/', '_').replace('.', '_')
+            vol_name = f"{instance_name}_{suffix}"
+            while vol_name in used:
+                vol_name += '_vol'
+            used.add(vol_name)
+            self._image_volume_names.append(vol_name)
+            vol_lines.append(f"      - {vol_name}:{path}")
+            vol_defs.append(f"  {vol_name}:\n    name: {vol_name}")
+
         # Environment (sanitize values to prevent YAML injection)
         env_lines = []
         for e in t.get('env', []):
@@ -435,6 +386,13 @@ class TemplateInstaller(BaseInstaller):
             sections.append("    environment:")
             sections.extend(env_lines)
 
+        # Labels let ORCHIX find its containers with one filtered query
+        compose_path = str(default_compose_path(instance_name))
+        sections.append("    labels:")
+        sections.append(f"      {LABEL_INSTANCE}: {json.dumps(instance_name)}")
+        sections.append(f"      {LABEL_TEMPLATE}: {json.dumps(t['name'])}")
+        sections.append(f"      {LABEL_COMPOSE_PATH}: {json.dumps(compose_path)}")
+
         # Global orchix network for inter-container communication
         sections.append("    networks:")
         sections.append(f"      - {ORCHIX_NETWORK}")
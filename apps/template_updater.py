@@ -21,14 +21,12 @@ class TemplateUpdater(BaseUpdater):
         if not image:
             return False
 
-        # Pull latest image (silently, progress shown by caller)
-        result = safe_docker_run(
-            ['docker', 'pull', image],
-            capture_output=True,
-            text=True
-        )
-
-        if result is None or result.returncode != 0:
+        # Pull latest image (silently, progress shown by caller); joins or
+        # skips the pull the web update stream has just done
+        from utils.image_pull import get_pull_coordinator
+        result = get_pull_coordinator().pull(image)
+
+        if result.returncode != 0:
             return False
 
         # Find compose file and recreate (silently, progress shown by caller)
@@ -26,7 +26,9 @@ class BaseUpdater(ABC):
     
     def _find_compose_file(self, container_name):
         '''Find compose file for container'''
+        from utils.orchix_instances import get_instance_registry
         possible_files = [
+            str(get_instance_registry().compose_path(container_name)),
             f'docker-compose-{container_name}.yml',
             'docker-compose.yml',
             f'{container_name}-docker-compose.yml'
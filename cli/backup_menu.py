@@ -2,6 +2,7 @@ import shutil
 import subprocess
 from pathlib import Path
 from datetime import datetime
+from utils.docker_utils import safe_docker_run
 from cli.ui import select_from_list, show_panel, show_success, show_error, show_info, show_warning
 from rich.console import Console
 from rich.table import Table
@@ -40,12 +41,12 @@ def _get_compose_sidecar_path(backup_path: Path) -> Path:
 def _start_container(container_name: str, compose_file: Path):
     """Start container via compose if available (preserves env vars), else via docker start."""
     if compose_file.exists():
-        subprocess.run(
+        safe_docker_run(
             ['docker', 'compose', '-f', str(compose_file), 'up', '-d'],
             capture_output=True
         )
     else:
-        subprocess.run(['docker', 'start', container_name], capture_output=True)
+        safe_docker_run(['docker', 'start', container_name], capture_output=True)
 
 
 def _generic_volume_backup(container_name: str) -> bool:
@@ -71,7 +72,7 @@ def _generic_volume_backup(container_name: str) -> bool:
         alpine_existed = _alpine_image_exists()
 
         # Stop container for a consistent backup
-        subprocess.run(['docker', 'stop', container_name], capture_output=True)
+        safe_docker_run(['docker', 'stop', container_name], capture_output=True)
 
         if is_windows():
             backup_name = f"{container_name}_{timestamp}.zip"
@@ -97,7 +98,7 @@ def _generic_volume_backup(container_name: str) -> bool:
             subprocess.run(['docker', 'rmi', 'alpine'], capture_output=True)
 
         # Restart container regardless of backup result
-        subprocess.run(['docker', 'start', container_name], capture_output=True)
+        safe_docker_run(['docker', 'start', container_name], capture_output=True)
 
         if backup_result.returncode != 0:
             show_warning("Volume backup command failed")
@@ -154,7 +155,7 @@ def _generic_volume_restore(container_name: str, backup_file: Path) -> bool:
         compose_dest = _ORCHIX_ROOT / f"docker-compose-{container_name}.yml"
 
         # Stop container before modifying its volume
-        subprocess.run(['docker', 'stop', container_name], capture_output=True)
+        safe_docker_run(['docker', 'stop', container_name], capture_output=True)
 
         # Restore compose file from sidecar so container config (env vars, ports) matches
         compose_sidecar = _get_compose_sidecar_path(backup_file)
@@ -254,15 +255,13 @@ def create_backup_menu():
         input("Press Enter...")
         return
 
-    from apps.manifest_loader import load_all_manifests
-    manifests = load_all_manifests()
+    from apps.manifest_resolver import resolve_manifest
 
     choices = []
     container_manifest_map = {}
 
     for container in containers:
-        base_name = container.split('_')[0] if '_' in container else container
-        manifest = manifests.get(base_name) or manifests.get(container)
+        manifest = resolve_manifest(container)
 
         if manifest:
             icon = manifest.get('icon', '📦')
@@ -355,6 +354,7 @@ def restore_backup_menu():
         return
 
     from apps.manifest_loader import load_all_manifests
+    from apps.manifest_resolver import resolve_manifest
     manifests = load_all_manifests()
 
     app_choices = []
@@ -362,8 +362,7 @@ def restore_backup_menu():
         app_type = info['type']
         count = len(info['backups'])
 
-        base_name = container.split('_')[0] if '_' in container else container
-        manifest = manifests.get(base_name) or manifests.get(app_type)
+        manifest = resolve_manifest(container) or manifests.get(app_type)
         icon = manifest.get('icon', '📦') if manifest else '📦'
 
         app_choices.append(f"{icon} {container} ({count} backups)")
@@ -426,8 +425,7 @@ def restore_backup_menu():
         input("Press Enter...")
         return
 
-    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-    manifest = manifests.get(base_name) or manifests.get(app_type)
+    manifest = resolve_manifest(container_name) or manifests.get(app_type)
 
     print()
     with Progress(
@@ -471,6 +469,7 @@ def list_backups():
         show_warning("No backups found!")
     else:
         from apps.manifest_loader import load_all_manifests
+        from apps.manifest_resolver import resolve_manifest
         manifests = load_all_manifests()
 
         table = Table(title="📋 Available Backups", show_header=True, header_style="bold cyan")
@@ -489,8 +488,7 @@ def list_backups():
                     app_type = lines[1].split(':', 1)[1].strip()
                     timestamp = lines[2].split(':', 1)[1].strip()[:19]
 
-                    base_name = container.split('_')[0] if '_' in container else container
-                    manifest = manifests.get(base_name) or manifests.get(app_type)
+                    manifest = resolve_manifest(container) or manifests.get(app_type)
 
                     if manifest:
                         type_display = f"{manifest.get('icon', '📦')} {manifest['display_name']}"
@@ -553,6 +551,7 @@ def delete_backup_menu():
         return
 
     from apps.manifest_loader import load_all_manifests
+    from apps.manifest_resolver import resolve_manifest
     manifests = load_all_manifests()
 
     app_choices = []
@@ -560,8 +559,7 @@ def delete_backup_menu():
         app_type = info['type']
         count = len(info['backups'])
 
-        base_name = container.split('_')[0] if '_' in container else container
-        manifest = manifests.get(base_name) or manifests.get(app_type)
+        manifest = resolve_manifest(container) or manifests.get(app_type)
         icon = manifest.get('icon', '📦') if manifest else '📦'
 
         app_choices.append(f"{icon} {container} ({count} backups)")
@@ -1,5 +1,6 @@
 from cli.ui import select_from_list, show_panel, show_success, show_error, show_info, show_warning
 from utils.docker_utils import safe_docker_run
+from utils import docker_api
 from rich.console import Console
 from rich.panel import Panel
 from rich.syntax import Syntax
@@ -16,16 +17,8 @@ def import_timestamp():
 
 def get_all_containers():
     '''Get ALL containers (including stopped)'''
-    result = safe_docker_run(
-        ['docker', 'ps', '-a', '--format', '{{.Names}}'],
-        capture_output=True,
-        text=True
-    )
-    if result is None:
-        return []
-    if result.returncode == 0:
-        return [c for c in result.stdout.split('\n') if c]
-    return []
+    from utils.container_inventory import get_inventory
+    return [n for n in get_inventory().names() if n]
 
 
 def get_visible_containers():
@@ -36,38 +29,25 @@ def get_visible_containers():
     - FREE without selection and <=limit: all, False
     - FREE without selection and >limit: all, True (needs selection)
     '''
-    from license import get_license_manager
-    lm = get_license_manager()
-    all_containers = get_all_containers()
-
-    if lm.is_pro():
-        return all_containers, False
-
-    managed = lm.get_managed_containers()
-    if managed is not None:
-        # Filter to only selected containers (that still exist)
-        visible = [c for c in all_containers if c in managed]
-        return visible, False
-
-    # No selection file - check if selection is needed
-    if len(all_containers) > lm.get_container_limit():
-        return all_containers, True
-
-    return all_containers, False
+    from license.visibility import get_visibility_service
+    return get_visibility_service().visible_containers()
 
 
 def get_container_status(container_name):
     '''Get container status'''
-    result = safe_docker_run(
-        ['docker', 'inspect', container_name, '--format', '{{.State.Status}}'],
-        capture_output=True,
-        text=True
-    )
-    if result is None:
-        return 'unknown'
-    if result.returncode == 0:
-        return result.stdout.strip()
-    return 'unknown'
+    from utils.container_inventory import get_inventory
+    return get_inventory().status(container_name)
+
+
+def get_container_statuses(container_names=None):
+    '''Get status for many containers in one lookup.
+    Returns {name: status}; names that don't exist map to 'unknown'.
+    '''
+    from utils.container_inventory import get_inventory
+    statuses = get_inventory().statuses()
+    if container_names is None:
+        return statuses
+    return {name: statuses.get(name, 'unknown') for name in container_names}
 
 
 def _prompt_container_selection(all_containers, limit):
@@ -131,9 +111,10 @@ def show_container_menu():
             break
         
         # Build choices with status
+        statuses = get_container_statuses(containers)
         choices = []
         for container in containers:
-            status = get_container_status(container)
+            status = statuses[container]
             
             if status == 'running':
                 choices.append(f"🟢 {container} (running)")
@@ -218,20 +199,14 @@ def start_container(container_name):
     ) as progress:
         task = progress.add_task("Starting container...", total=100)
 
-        result = safe_docker_run(
-            ['docker', 'start', container_name],
-            capture_output=True,
-            text=True
-        )
+        success, error = docker_api.container_action(container_name, 'start')
 
         progress.update(task, completed=100, description="Start complete!")
 
-    if result is None:
-        show_error("Docker is not installed!")
-    elif result.returncode == 0:
+    if success:
         show_success(f"{container_name} started!")
     else:
-        show_error(f"Failed to start: {result.stderr}")
+        show_error(f"Failed to start: {error}")
 
     input("\nPress Enter...")
 
@@ -247,20 +222,14 @@ def stop_container(container_name):
     ) as progress:
         task = progress.add_task("Stopping container...", total=100)
 
-        result = safe_docker_run(
-            ['docker', 'stop', container_name],
-            capture_output=True,
-            text=True
-        )
+        success, error = docker_api.container_action(container_name, 'stop')
 
         progress.update(task, completed=100, description="Stop complete!")
 
-    if result is None:
-        show_error("Docker is not installed!")
-    elif result.returncode == 0:
+    if success:
         show_success(f"{container_name} stopped!")
     else:
-        show_error(f"Failed to stop: {result.stderr}")
+        show_error(f"Failed to stop: {error}")
 
     input("\nPress Enter...")
 
@@ -276,20 +245,14 @@ def restart_container(container_name):
     ) as progress:
         task = progress.add_task("Restarting container...", total=100)
 
-        result = safe_docker_run(
-            ['docker', 'restart', container_name],
-            capture_output=True,
-            text=True
-        )
+        success, error = docker_api.container_action(container_name, 'restart')
 
         progress.update(task, completed=100, description="Restart complete!")
 
-    if result is None:
-        show_error("Docker is not installed!")
-    elif result.returncode == 0:
+    if success:
         show_success(f"{container_name} restarted!")
     else:
-        show_error(f"Failed to restart: {result.stderr}")
+        show_error(f"Failed to restart: {error}")
 
     input("\nPress Enter...")
 
@@ -353,20 +316,9 @@ def view_status(container_name):
     show_info(f"Fetching status for {container_name}...")
     print()
     
-    result = safe_docker_run(
-        ['docker', 'inspect', container_name],
-        capture_output=True,
-        text=True
-    )
-
-    if result is None:
-        show_error("Docker is not installed!")
-        return
+    data = docker_api.inspect_container(container_name)
 
-    if result.returncode == 0:
-        import json
-        data = json.loads(result.stdout)[0]
-        
+    if data:
         state = data['State']
         config = data['Config']
         
@@ -397,6 +349,6 @@ def view_status(container_name):
         console.print(table)
         console.print()
     else:
-        show_error(f"Failed to fetch status: {result.stderr}")
+        show_error(f"Failed to fetch status for {container_name}")
     
     input("\nPress Enter...")
\ No newline at end of file
@@ -9,7 +9,10 @@ from datetime import datetime
 
 import psutil
 
-from utils.docker_utils import safe_docker_run, check_docker_status
+from utils.docker_utils import check_docker_status
+from utils import docker_api
+from utils.container_inventory import get_inventory
+from utils.cgroup_metrics import collect_container_metrics
 from cli.ui import show_error
 
 IS_WINDOWS = platform.system().lower() == 'windows'
@@ -44,6 +47,8 @@ def show_dashboard():
         input("\nPress Enter...")
         return
 
+    # Refreshes every few seconds: follow docker events instead of reloading
+    get_inventory().start_watching()
     curses.wrapper(_curses_main)
 
 
@@ -158,16 +163,16 @@ def _draw_dashboard(stdscr):
                 status_str = "DOWN"
                 s_color = CP(4) | curses.A_BOLD
 
-            cpu_val = c.get('cpu', '-')
-            cpu_color = _value_color(cpu_val)
+            cpu_color = _value_color(c.get('cpu'))
+            cpu_val = f"{c['cpu']:.2f}%" if c.get('cpu') is not None else '-'
 
             parts = [
                 str(i),
                 _trunc(c['name'], col_w[1]),
                 _trunc(status_str, col_w[2]),
                 cpu_val,
-                _trunc(c.get('memory', '-'), col_w[4]),
-                _trunc(c.get('net_io', '-'), col_w[5]),
+                _trunc(_format_pair(c.get('mem_used'), c.get('mem_limit'), docker_api.bytes_size), col_w[4]),
+                _trunc(_format_pair(c.get('net_rx'), c.get('net_tx'), docker_api.human_size), col_w[5]),
                 _trunc(c.get('ports', '-'), col_w[6]),
                 _trunc(c.get('image', '-'), col_w[7]),
             ]
@@ -283,40 +288,34 @@ def _trunc(text, maxlen):
 def _value_color(val):
     """Return color pair for a percentage value."""
     CP = curses.color_pair
-    try:
-        num = float(val.replace('%', ''))
-        if num >= 90:
-            return CP(4) | curses.A_BOLD
-        if num >= 70:
-            return CP(3)
-        return CP(2)
-    except (ValueError, AttributeError):
+    if val is None:
         return CP(5)
+    if val >= 90:
+        return CP(4) | curses.A_BOLD
+    if val >= 70:
+        return CP(3)
+    return CP(2)
+
+
+def _format_pair(a, b, fmt):
+    """Format "a / b" byte counters, or '-' when unknown."""
+    if a is None or b is None:
+        return '-'
+    return f"{fmt(a)} / {fmt(b)}"
 
 
 def _get_container_data():
     """Get container list with status and resource usage."""
     containers = []
 
-    result = safe_docker_run(
-        ['docker', 'ps', '-a', '--format',
-         '{{.Names}}|{{.Status}}|{{.Ports}}|{{.Image}}'],
-        capture_output=True, text=True,
-    )
-    if not result or result.returncode != 0:
+    listing = get_inventory().containers()
+    if not listing:
         return containers
 
-    for line in result.stdout.strip().split('\n'):
-        if not line.strip():
-            continue
-        parts = line.split('|')
-        if len(parts) < 2:
-            continue
-
-        name = parts[0].strip()
-        status_raw = parts[1].strip()
-        ports_raw = parts[2].strip() if len(parts) > 2 else ''
-        image = parts[3].strip() if len(parts) > 3 else '-'
+    for entry in listing:
+        name = entry['name']
+        status_raw = entry['status']
+        image = entry['image'] or '-'
 
         if '/' in image:
             image = image.split('/')[-1]
@@ -325,35 +324,24 @@ def _get_container_data():
         uptime = _parse_uptime(status_raw) if running else ''
 
         containers.append({
+            'id': entry['id'],
             'name': name,
             'status': status_raw,
             'running': running,
             'uptime': uptime,
-            'ports': _parse_ports(ports_raw),
+            'ports': _parse_ports(entry['ports']),
             'image': image,
-            'cpu': '-', 'memory': '-', 'net_io': '-',
+            'cpu': None, 'mem_used': None, 'mem_limit': None,
+            'net_rx': None, 'net_tx': None,
         })
 
-    stats_result = safe_docker_run(
-        ['docker', 'stats', '--no-stream', '--format',
-         '{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}'],
-        capture_output=True, text=True,
-    )
-    if stats_result and stats_result.returncode == 0:
-        stats_map = {}
-        for line in stats_result.stdout.strip().split('\n'):
-            if not line.strip():
-                continue
-            parts = line.split('|')
-            if len(parts) >= 4:
-                stats_map[parts[0].strip()] = {
-                    'cpu': parts[1].strip(),
-                    'memory': parts[2].strip(),
-                    'net_io': parts[3].strip(),
-                }
-        for c in containers:
-            if c['name'] in stats_map:
-                c.update(stats_map[c['name']])
+    metrics = collect_container_metrics((c['id'], c['name']) for c in containers if c['running'])
+    for c in containers:
+        m = metrics.get(c['name'])
+        if m:
+            c['cpu'] = m['cpu_percent']
+            c['mem_used'], c['mem_limit'] = m['mem_used'], m['mem_limit']
+            c['net_rx'], c['net_tx'] = m['net_rx'], m['net_tx']
 
     return containers
 
@@ -390,17 +378,13 @@ def _parse_uptime(status):
     return text[:6]
 
 
-def _parse_ports(ports_raw):
-    """Parse Docker port mappings to readable format."""
-    if not ports_raw:
-        return '-'
+def _parse_ports(ports):
+    """Format published host ports to readable format."""
     host_ports = []
-    for mapping in ports_raw.split(', '):
-        if '->' in mapping:
-            host_part = mapping.split('->')[0]
-            port = host_part.split(':')[-1] if ':' in host_part else host_part
-            if port and port not in host_ports:
-                host_ports.append(port)
+    for p in ports or []:
+        port = str(p['public']) if p['public'] else ''
+        if port and port not in host_ports:
+            host_ports.append(port)
     return ', '.join(host_ports) if host_ports else '-'
 
 
@@ -621,33 +605,16 @@ def _get_docker_info():
         'volume_names': [],
     }
 
-    result = safe_docker_run(
-        ['docker', 'version', '--format', '{{.Server.Version}}'],
-        capture_output=True, text=True,
-    )
-    if result and result.returncode == 0:
-        info['version'] = f"v{result.stdout.strip()}"
+    version = docker_api.server_version()
+    if version:
+        info['version'] = f"v{version}"
 
-    result = safe_docker_run(
-        ['docker', 'images', '-q'], capture_output=True, text=True,
-    )
-    if result and result.returncode == 0:
-        info['images'] = len([l for l in result.stdout.strip().split('\n') if l])
+    info['images'] = len(docker_api.list_images())
+    info['networks'] = len(docker_api.list_networks())
 
-    result = safe_docker_run(
-        ['docker', 'network', 'ls', '-q'], capture_output=True, text=True,
-    )
-    if result and result.returncode == 0:
-        info['networks'] = len([l for l in result.stdout.strip().split('\n') if l])
-
-    result = safe_docker_run(
-        ['docker', 'volume', 'ls', '--format', '{{.Name}}'],
-        capture_output=True, text=True,
-    )
-    if result and result.returncode == 0:
-        names = [v.strip() for v in result.stdout.strip().split('\n') if v.strip()]
-        info['volume_names'] = names
-        info['volumes'] = len(names)
+    names = get_inventory().volumes()
+    info['volume_names'] = names
+    info['volumes'] = len(names)
 
     return info
 
@@ -661,12 +628,8 @@ def _get_alerts(containers, sys_data):
             alerts.append(f"{c['name']} DOWN")
 
     for c in containers:
-        try:
-            cpu_num = float(c.get('cpu', '-').replace('%', ''))
-            if cpu_num > 80:
-                alerts.append(f"{c['name']} CPU:{c['cpu']}")
-        except (ValueError, TypeError):
-            pass
+        if c.get('cpu') is not None and c['cpu'] > 80:
+            alerts.append(f"{c['name']} CPU:{c['cpu']:.2f}%")
 
     if sys_data['disk_percent'] >= 90:
         alerts.append(f"Disk CRITICAL {sys_data['disk_percent']}%")
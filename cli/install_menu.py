@@ -13,26 +13,19 @@ import os
 
 def check_container_exists(container_name):
     '''Check if container already exists'''
-    result = safe_docker_run(
-        ['docker', 'ps', '-a', '--filter', f'name=^{container_name}$', '--format', '{{.Names}}'],
-        capture_output=True,
-        text=True
-    )
-    if result is None:
-        return False
-    return container_name in result.stdout.strip()
+    from utils.container_inventory import get_inventory
+    return get_inventory().exists(container_name)
 
 
 def is_port_in_use(port):
     '''Check if port is already in use'''
-    result = safe_docker_run(
-        ['docker', 'ps', '--format', '{{.Ports}}'],
-        capture_output=True,
-        text=True
+    from utils.container_inventory import get_inventory
+    port = int(port)
+    return any(
+        p['public'] == port
+        for c in get_inventory().containers() if c['state'] == 'running'
+        for p in c['ports']
     )
-    if result is None:
-        return False
-    return f':{port}->' in result.stdout or f'0.0.0.0:{port}' in result.stdout
 
 
 def find_free_port(start_port=5678, max_attempts=10):
@@ -400,7 +393,8 @@ def install_app(app_name, manifest):
 
         if success:
             # Tag image with instance-specific name for safe uninstall
-            compose_file = f"docker-compose-{instance_name}.yml"
+            from utils.orchix_instances import default_compose_path
+            compose_file = str(default_compose_path(instance_name))
             _tag_instance_image(instance_name, compose_file)
 
             show_step_final(f"{manifest['display_name']} installed successfully!", True)
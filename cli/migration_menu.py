@@ -7,6 +7,7 @@ from datetime import datetime
 from cli.ui import show_panel, select_from_list, show_info, show_success, show_error, show_warning
 from license import PRICING
 from utils.system import is_windows
+from utils.docker_utils import safe_docker_run
 import shutil
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
@@ -86,14 +87,9 @@ def show_migration_menu():
 
 
 def get_all_orchix_containers():
-    '''Get all ORCHIX-managed containers by scanning compose files in ORCHIX root'''
-    orchix_containers = []
-    for compose_file in sorted(_ORCHIX_ROOT.glob('docker-compose-*.yml')):
-        # docker-compose-n8n.yml → n8n
-        name = compose_file.name[len('docker-compose-'):-len('.yml')]
-        if name:
-            orchix_containers.append(name)
-    return orchix_containers
+    '''Get all ORCHIX-managed containers (labeled containers + legacy compose files)'''
+    from utils.orchix_instances import get_instance_registry
+    return get_instance_registry().names()
 
 
 def export_migration_package():
@@ -114,13 +110,12 @@ def export_migration_package():
     print()
     
     # Step 1: Ask if select all or pick specific
-    from apps.manifest_loader import load_all_manifests
-    manifests = load_all_manifests()
+    from apps.manifest_resolver import resolve_manifest
+    from utils.orchix_instances import get_instance_registry
     
     # Show available containers
     for container in containers:
-        base_name = container.split('_')[0] if '_' in container else container
-        manifest = manifests.get(base_name)
+        manifest = resolve_manifest(container)
         icon = manifest.get('icon', '📦') if manifest else '📦'
         print(f"  {icon} {container}")
     
@@ -154,8 +149,7 @@ def export_migration_package():
         container_map = {}
         
         for container in containers:
-            base_name = container.split('_')[0] if '_' in container else container
-            manifest = manifests.get(base_name)
+            manifest = resolve_manifest(container)
             
             if manifest:
                 icon = manifest.get('icon', '📦')
@@ -200,8 +194,7 @@ def export_migration_package():
     print()
     show_success(f"✅ Selected {len(selected_containers)} container(s):")
     for container in selected_containers:
-        base_name = container.split('_')[0] if '_' in container else container
-        manifest = manifests.get(base_name)
+        manifest = resolve_manifest(container)
         icon = manifest.get('icon', '📦') if manifest else '📦'
         print(f"   {icon} {container}")
     print()
@@ -278,9 +271,9 @@ def export_migration_package():
 
             # Copy compose file
             progress.update(main_task, completed=idx * 100 + 30, description=f"Copying {container} files...")
-            compose_src = _ORCHIX_ROOT / f'docker-compose-{container}.yml'
+            compose_src = get_instance_registry().compose_path(container)
             if compose_src.exists():
-                compose_dst = package_dir / compose_src.name
+                compose_dst = package_dir / f'docker-compose-{container}.yml'
                 shutil.copy2(compose_src, compose_dst)
 
             # Create backup with target platform
@@ -378,35 +371,14 @@ def _create_container_backup(container_name, output_dir, force_windows=None):
         Backup filename or None
     '''
     
-    # Load manifests and hook loader
-    from apps.manifest_loader import load_all_manifests
+    # Load hook loader
+    from apps.manifest_resolver import resolve_manifest
     from apps.hook_loader import get_hook_loader
     
-    manifests = load_all_manifests()
     hook_loader = get_hook_loader()
     
-    # Try to match container to manifest
-    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-    manifest = manifests.get(base_name)
-    
-    # If no manifest, try to detect from image
-    if not manifest:
-        result = subprocess.run(
-            ['docker', 'inspect', container_name, '--format', '{{.Config.Image}}'],
-            capture_output=True,
-            text=True,
-            encoding='utf-8',
-            errors='ignore'
-        )
-        
-        if result.returncode == 0:
-            image = result.stdout.strip().lower()
-            
-            # Try to match image to manifest
-            for app_name, app_manifest in manifests.items():
-                if app_name in image:
-                    manifest = app_manifest
-                    break
+    # Match container to manifest (by name, else by its image)
+    manifest = resolve_manifest(container_name, inspect=True)
     
     # Create backup using hooks with platform override
     success = False
@@ -467,21 +439,20 @@ def _create_container_backup(container_name, output_dir, force_windows=None):
 
 def _start_container(container_name: str):
     """Start container via compose if available, else via docker start."""
-    compose_file = _ORCHIX_ROOT / f'docker-compose-{container_name}.yml'
+    from utils.orchix_instances import get_instance_registry
+    compose_file = get_instance_registry().compose_path(container_name)
     if compose_file.exists():
-        subprocess.run(
+        safe_docker_run(
             ['docker', 'compose', '-f', str(compose_file), 'up', '-d'],
             capture_output=True
         )
     else:
-        subprocess.run(['docker', 'start', container_name], capture_output=True)
+        safe_docker_run(['docker', 'start', container_name], capture_output=True)
 
 
 def _generic_volume_backup(container_name, output_dir):
     """Generic backup: export all Docker volumes of a container."""
-    from utils.docker_utils import safe_docker_run
-
-    subprocess.run(['docker', 'stop', container_name], capture_output=True)
+    safe_docker_run(['docker', 'stop', container_name], capture_output=True)
 
     # Get volumes mounted on the container
     result = safe_docker_run(
@@ -571,7 +542,7 @@ def _restore_container_volumes(container_name, backup_path):
     )
     is_multi = check.stdout.strip() == '1'
 
-    subprocess.run(['docker', 'stop', container_name], capture_output=True)
+    safe_docker_run(['docker', 'stop', container_name], capture_output=True)
     success = True
 
     if is_multi:
@@ -660,19 +631,10 @@ def _wait_for_container_ready(container_name, timeout=30):
     
     image = result.stdout.strip().lower()
     
-    # Try to match to manifest
-    from apps.manifest_loader import load_all_manifests
-    manifests = load_all_manifests()
-    
-    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-    manifest = manifests.get(base_name)
+    # Match to manifest (by name, else by its image)
+    from apps.manifest_resolver import resolve_manifest
     
-    # If no manifest found, try to detect from image
-    if not manifest:
-        for app_name, app_manifest in manifests.items():
-            if app_name in image:
-                manifest = app_manifest
-                break
+    manifest = resolve_manifest(container_name, image=image)
     
     # Use hook if available
     if manifest:
@@ -767,11 +729,10 @@ def import_migration_package():
         shutil.rmtree(extract_dir)
         return
     
-    # Load manifests for hooks
-    from apps.manifest_loader import load_all_manifests
+    # Load resolver and hooks
+    from apps.manifest_resolver import resolve_manifest
     from apps.hook_loader import get_hook_loader
     
-    manifests = load_all_manifests()
     hook_loader = get_hook_loader()
     
     # Import each container with progress bar
@@ -816,7 +777,7 @@ def import_migration_package():
                         shutil.copy2(compose_src, compose_dst)
 
                 progress.update(main_task, completed=idx * 100 + 40, description=f"Starting {container_name}...")
-                start_result = subprocess.run(
+                start_result = safe_docker_run(
                     ['docker', 'compose', '-f', str(_ORCHIX_ROOT / compose_file), 'up', '-d'],
                     capture_output=True,
                     text=True,
@@ -824,7 +785,7 @@ def import_migration_package():
                     errors='ignore'
                 )
 
-                if start_result.returncode != 0:
+                if not start_result or start_result.returncode != 0:
                     progress.update(main_task, completed=(idx + 1) * 100, description=f"{container_name} failed to start")
                     continue
 
@@ -849,27 +810,8 @@ def import_migration_package():
                         meta_dst = _get_meta_file(backup_dst)
                         shutil.copy2(meta_src_path, meta_dst)
 
-                    # Get manifest for restore
-                    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-                    app_manifest = manifests.get(base_name)
-
-                    # If no manifest, try to detect from container
-                    if not app_manifest:
-                        result = subprocess.run(
-                            ['docker', 'inspect', container_name, '--format', '{{.Config.Image}}'],
-                            capture_output=True,
-                            text=True,
-                            encoding='utf-8',
-                            errors='ignore'
-                        )
-
-                        if result.returncode == 0:
-                            image = result.stdout.strip().lower()
-
-                            for app_name, manifest in manifests.items():
-                                if app_name in image:
-                                    app_manifest = manifest
-                                    break
+                    # Get manifest for restore (by name, else by its image)
+                    app_manifest = resolve_manifest(container_name, inspect=True)
 
                     # Restore using app hook, or fall back to volume restore
                     if app_manifest and hook_loader.has_hook(app_manifest, 'restore'):
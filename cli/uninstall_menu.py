@@ -6,6 +6,7 @@ from pathlib import Path
 from license.audit_logger import get_audit_logger, AuditEventType
 from license import get_license_manager
 from utils.docker_utils import get_docker_compose_command, safe_docker_run
+from utils.orchix_instances import get_instance_registry
 from config import ORCHIX_CONFIG_DIR
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn
@@ -15,16 +16,8 @@ console = Console()
 
 def get_all_containers():
     '''Get ALL containers (including stopped)'''
-    result = safe_docker_run(
-        ['docker', 'ps', '-a', '--format', '{{.Names}}'],
-        capture_output=True,
-        text=True
-    )
-    if result is None:
-        return []
-    if result.returncode == 0:
-        return [c for c in result.stdout.split('\n') if c]
-    return []
+    from utils.container_inventory import get_inventory
+    return [n for n in get_inventory().names() if n]
 
 
 def show_uninstall_menu():
@@ -42,19 +35,11 @@ def show_uninstall_menu():
             break
         
         # Build choices
+        from cli.container_menu import get_container_statuses
+        statuses = get_container_statuses(containers)
         choices = []
         for container in containers:
-            # Check if running
-            result = safe_docker_run(
-                ['docker', 'ps', '--filter', f'name=^{container}$', '--format', '{{.Names}}'],
-                capture_output=True,
-                text=True
-            )
-            if result is None:
-                show_error("Docker is not available!")
-                input("Press Enter...")
-                return
-            is_running = container in result.stdout
+            is_running = statuses[container] == 'running'
             
             if is_running:
                 choices.append(f"🟢 {container} (running)")
@@ -98,7 +83,7 @@ def uninstall_container(container_name):
     
     # Fallback: read from docker-compose file
     if not volumes_to_delete:
-        compose_file = f"docker-compose-{container_name}.yml"
+        compose_file = str(get_instance_registry().compose_path(container_name))
         if os.path.exists(compose_file):
             try:
                 with open(compose_file, 'r') as f:
@@ -119,7 +104,7 @@ def uninstall_container(container_name):
     files_to_delete = []
 
     # 1. Docker compose file
-    compose_file = f"docker-compose-{container_name}.yml"
+    compose_file = str(get_instance_registry().compose_path(container_name))
     if os.path.exists(compose_file):
         files_to_delete.append(compose_file)
 
@@ -185,7 +170,7 @@ def uninstall_container(container_name):
         'errors': []
     }
 
-    compose_file = f"docker-compose-{container_name}.yml"
+    compose_file = str(get_instance_registry().compose_path(container_name))
 
     # Progress bar for uninstall process
     with Progress(
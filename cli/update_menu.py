@@ -1,5 +1,5 @@
 from cli.ui import select_from_list, show_panel, show_success, show_error, show_info, show_step, show_step_final, show_step_detail
-from apps.manifest_loader import load_all_manifests
+from apps.manifest_resolver import resolve_manifest
 from license.audit_logger import get_audit_logger, AuditEventType
 from license import get_license_manager
 import subprocess
@@ -40,13 +40,10 @@ def show_update_menu():
             input("Press Enter...")
             break
         
-        # Load manifests
-        manifests = load_all_manifests()
-        
         # Build choices
         choices = []
         for container in containers:
-            manifest = _resolve_manifest(container, manifests)
+            manifest = resolve_manifest(container)
 
             if manifest:
                 icon = manifest.get('icon', '📦')
@@ -72,7 +69,7 @@ def show_update_menu():
                 break
         
         if container_name:
-            manifest = _resolve_manifest(container_name, manifests)
+            manifest = resolve_manifest(container_name)
             update_app(container_name, manifest)
 
 
@@ -193,40 +190,10 @@ def update_app(container_name, manifest):
     input("\nPress Enter...")
 
 
-def _resolve_manifest(container_name, manifests):
-    '''Resolve a container name to its app manifest.
-    Handles instances like n8n2, n8n-dev, n8n_custom -> manifest "n8n".'''
-    # 1. Exact match
-    if container_name in manifests:
-        return manifests[container_name]
-
-    # 2. Split by _ (e.g. postgres_prod -> postgres)
-    if '_' in container_name:
-        base = container_name.split('_')[0]
-        if base in manifests:
-            return manifests[base]
-
-    # 3. Longest prefix match (e.g. n8n2 -> n8n, grafana3 -> grafana)
-    # Only match if suffix is a digit or separator, not a letter
-    # (prevents "rediscover" matching "redis")
-    best_match = None
-    best_len = 0
-    for app_name in manifests:
-        if container_name.startswith(app_name) and len(app_name) > best_len:
-            rest = container_name[len(app_name):]
-            if not rest or rest[0].isdigit() or rest[0] in ('-', '_'):
-                best_match = app_name
-                best_len = len(app_name)
-
-    if best_match:
-        return manifests[best_match]
-
-    return None
-
-
 def _retag_after_update(container_name):
     '''Re-tag the source image after an update for orchix-tagged containers'''
-    compose_file = f"docker-compose-{container_name}.yml"
+    from utils.orchix_instances import get_instance_registry
+    compose_file = str(get_instance_registry().compose_path(container_name))
     if not os.path.exists(compose_file):
         return
 
@@ -0,0 +1,382 @@
+# ORCHIX v1.4 - Background jobs
+'''Durable jobs for long operations (install, update, uninstall, backup,
+migration export/import). The work runs on a job worker, not inside the HTTP
+response, so a browser disconnect or proxy timeout no longer cuts it off.
+
+A job function returns a generator of progress events:
+{'progress', 'status'} while running, then {'error': ...} or {'success': ...}.
+Events are numbered from 1; subscribers can (re)attach after any number.
+Job state is persisted as JSON under ORCHIX_CONFIG_DIR/jobs.
+'''
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# Worker pools and their sizes; each job kind runs in one pool
+POOLS = {'apps': 2, 'backups': 1, 'migration': 1}
+JOB_POOLS = {
+    'install': 'apps', 'update': 'apps', 'uninstall': 'apps',
+    'backup': 'backups',
+    'export': 'migration', 'import': 'migration',
+}
+
+# Jobs on the same resource (e.g. "container:nextcloud") never run concurrently
+RESOURCE_LIMIT = 1
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED, INTERRUPTED = (
+    'queued', 'running', 'succeeded', 'failed', 'cancelled', 'interrupted')
+FINISHED_STATES = {SUCCEEDED, FAILED, CANCELLED, INTERRUPTED}
+
+# Events kept per job (older progress events are dropped first)
+MAX_EVENTS = 500
+# Finished jobs kept on disk and in memory
+MAX_FINISHED = 200
+# Progress is persisted at most this often; state changes are written at once
+_PERSIST_INTERVAL = 1.0
+
+
+class Job:
+    '''One job: state, numbered events and channel subscribers.'''
+
+    def __init__(self, kind, resource=None, title='', owner=None, permission=None, job_id=None):
+        self.id = job_id or uuid.uuid4().hex[:16]
+        self.kind = kind
+        self.resource = resource
+        self.title = title or kind
+        self.owner = owner
+        self.permission = permission
+        self.state = QUEUED
+        self.progress = 0
+        self.status = 'Queued'
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_requested = False
+        self.events = deque(maxlen=MAX_EVENTS)   # (seq, event)
+        self.last_seq = 0
+        self._lock = threading.Lock()
+        self._channels = set()
+        self._persisted = 0
+
+    @property
+    def done(self):
+        return self.state in FINISHED_STATES
+
+    def to_dict(self, events=False):
+        with self._lock:
+            data = {
+                'id': self.id, 'kind': self.kind, 'resource': self.resource,
+                'title': self.title, 'owner': self.owner, 'permission': self.permission,
+                'state': self.state, 'progress': self.progress, 'status': self.status,
+                'result': self.result, 'created': self.created, 'started': self.started,
+                'finished': self.finished, 'cancel_requested': self.cancel_requested,
+                'last_seq': self.last_seq,
+            }
+            if events:
+                data['events'] = [{'seq': seq, 'data': event} for seq, event in self.events]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        job = cls(data['kind'], data.get('resource'), data.get('title', ''),
+                  data.get('owner'), data.get('permission'), job_id=data['id'])
+        for key in ('state', 'progress', 'status', 'result', 'created', 'started', 'finished'):
+            setattr(job, key, data.get(key, getattr(job, key)))
+        for item in data.get('events', []):
+            job.events.append((item['seq'], item['data']))
+        job.last_seq = data.get('last_seq', job.events[-1][0] if job.events else 0)
+        return job
+
+    # ============ Events ============
+
+    def emit(self, event):
+        '''Record one event and hand it to every subscribed channel.'''
+        with self._lock:
+            self.last_seq += 1
+            seq = self.last_seq
+            self.events.append((seq, event))
+            if isinstance(event.get('progress'), (int, float)):
+                self.progress = event['progress']
+            if event.get('status'):
+                self.status = event['status']
+            if 'error' in event or 'success' in event:
+                self.result = event
+            channels = list(self._channels)
+        for channel in channels:
+            self._deliver(channel, (seq, event))
+        return seq
+
+    def _deliver(self, channel, item):
+        '''Put item into channel. Returns False (and ends the stream) when it is full.'''
+        if not self._put(channel, item):
+            # Slow consumer: end its stream; it reattaches from its last seq
+            self.unsubscribe(channel)
+            self._put(channel, None)
+            return False
+        return True
+
+    @staticmethod
+    def _put(channel, item):
+        try:
+            channel.put_nowait(item)
+            return True
+        except queue.Full:
+            return False
+
+    def subscribe(self, channel, after=0):
+        '''Queue events after seq `after` into channel, then follow new ones.
+        channel gets (seq, event) tuples and None once the job has finished
+        (or the channel fell behind). Returns False if events after `after`
+        have already been dropped from the buffer.
+        '''
+        # Backlog and registration under the lock, so emit() can't deliver a
+        # newer event ahead of the backlog
+        with self._lock:
+            complete = not self.events or self.events[0][0] <= after + 1
+            for item in self.events:
+                if item[0] <= after:
+                    continue
+                if not self._put(channel, item):
+                    # Backlog larger than the channel: one end marker, not
+                    # registered; the consumer resubscribes after what it got
+                    self._put(channel, None)
+                    return complete
+            if self.done:
+                self._put(channel, None)
+            else:
+                self._channels.add(channel)
+        return complete
+
+    def unsubscribe(self, channel):
+        with self._lock:
+            self._channels.discard(channel)
+
+    def _close_channels(self):
+        with self._lock:
+            channels = list(self._channels)
+            self._channels.clear()
+        for channel in channels:
+            self._deliver(channel, None)
+
+
+class JobManager:
+    '''Schedules jobs onto per-kind worker pools, one job per resource at a time.'''
+
+    def __init__(self, directory=None):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._pending = deque()       # (job, func)
+        self._active = {}             # pool -> running job count
+        self._busy = {}               # resource -> running job count
+        self._executors = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._load()
+
+    # ============ Persistence ============
+
+    def _path(self, job_id):
+        return os.path.join(self.directory, job_id + '.json')
+
+    def _persist(self, job, force=True):
+        if not self.directory:
+            return
+        now = time.monotonic()
+        if not force and now - job._persisted < _PERSIST_INTERVAL:
+            return
+        job._persisted = now
+        try:
+            path = self._path(job.id)
+            tmp = f'{path}.{threading.get_ident()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(job.to_dict(events=True), f)
+            os.replace(tmp, path)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    def _load(self):
+        '''Read jobs from a previous run; unfinished ones can't resume.'''
+        try:
+            files = [n for n in os.listdir(self.directory) if n.endswith('.json')]
+        except OSError:
+            return
+        for filename in files:
+            try:
+                with open(os.path.join(self.directory, filename), encoding='utf-8') as f:
+                    job = Job.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            if not job.done:
+                job.state = INTERRUPTED
+                job.finished = job.finished or time.time()
+                job.result = {'error': 'Interrupted by a server restart'}
+                job.events.append((job.last_seq + 1, job.result))
+                job.last_seq += 1
+                self._persist(job)
+            self._jobs[job.id] = job
+        self._prune()
+
+    def _prune(self):
+        finished = sorted((j for j in self._jobs.values() if j.done), key=lambda j: j.finished or 0)
+        for job in finished[:max(0, len(finished) - MAX_FINISHED)]:
+            del self._jobs[job.id]
+            if self.directory:
+                try:
+                    os.remove(self._path(job.id))
+                except OSError:
+                    pass
+
+    # ============ Queries ============
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self, limit=50):
+        '''Most recent jobs first.'''
+        with self._lock:
+            jobs = sorted(self._jobs.values(), key=lambda j: j.created, reverse=True)
+        return jobs[:limit]
+
+    def active_for(self, resource):
+        '''Unfinished job on a resource, if any.'''
+        with self._lock:
+            for job in self._jobs.values():
+                if job.resource == resource and not job.done:
+                    return job
+        return None
+
+    # ============ Scheduling ============
+
+    def submit(self, kind, func, resource=None, title='', owner=None, permission=None):
+        '''Queue func() (a generator of events) as a new job.'''
+        job = Job(kind, resource, title, owner, permission)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._pending.append((job, func))
+        self._persist(job)
+        self._schedule()
+        return job
+
+    def _schedule(self):
+        with self._lock:
+            starting = []
+            for item in list(self._pending):
+                job, func = item
+                pool = JOB_POOLS.get(job.kind, 'apps')
+                if self._active.get(pool, 0) >= POOLS.get(pool, 1):
+                    continue
+                if job.resource and self._busy.get(job.resource, 0) >= RESOURCE_LIMIT:
+                    continue
+                self._pending.remove(item)
+                self._active[pool] = self._active.get(pool, 0) + 1
+                if job.resource:
+                    self._busy[job.resource] = self._busy.get(job.resource, 0) + 1
+                job.state = RUNNING
+                job.started = time.time()
+                starting.append((pool, job, func))
+            for job, _ in self._pending:
+                if not job.last_seq:
+                    job.emit({'progress': 0, 'status': 'Queued, waiting for another job to finish...'})
+            for pool, job, func in starting:
+                executor = self._executors.get(pool)
+                if executor is None:
+                    executor = self._executors[pool] = ThreadPoolExecutor(
+                        max_workers=POOLS.get(pool, 1), thread_name_prefix=f'orchix-job-{pool}')
+                executor.submit(self._run, pool, job, func)
+        for _, job, _ in starting:
+            self._persist(job)
+
+    def _run(self, pool, job, func):
+        from utils.docker_metrics import call_source
+
+        events = None
+        try:
+            with call_source(f'job:{job.kind}'):
+                events = func()
+                for event in events:
+                    job.emit(event)
+                    self._persist(job, force='error' in event or 'success' in event)
+                    if job.cancel_requested:
+                        # Raises GeneratorExit at the job's current step
+                        events.close()
+                        break
+        except Exception as e:
+            job.emit({'error': str(e)})
+        finally:
+            self._finish(pool, job)
+
+    def _finish(self, pool, job):
+        # A cancel that arrived after the job's final event (e.g. during a long
+        # step that doesn't yield) doesn't undo the outcome it reported
+        if job.cancel_requested and job.result is None:
+            state = CANCELLED
+            job.emit({'error': 'Cancelled', 'cancelled': True})
+        elif job.result is not None and ('error' in job.result or job.result.get('success') is False):
+            state = FAILED
+        else:
+            state = SUCCEEDED
+        with job._lock:
+            job.state = state
+            job.finished = time.time()
+        self._persist(job)
+        job._close_channels()
+
+        with self._lock:
+            self._active[pool] -= 1
+            if job.resource:
+                self._busy[job.resource] -= 1
+                if not self._busy[job.resource]:
+                    del self._busy[job.resource]
+            self._prune()
+        self._schedule()
+
+    def cancel(self, job_id):
+        '''Cancel a job. Queued jobs stop at once; running jobs stop at their
+        next progress step. Returns the job, or None if unknown.
+        '''
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.done:
+                return job
+            job.cancel_requested = True
+            queued = next((item for item in self._pending if item[0] is job), None)
+            if queued:
+                self._pending.remove(queued)
+        if queued:
+            job.emit({'error': 'Cancelled', 'cancelled': True})
+            with job._lock:
+                job.state = CANCELLED
+                job.finished = time.time()
+            self._persist(job)
+            job._close_channels()
+        else:
+            job.emit({'progress': job.progress, 'status': 'Cancelling...'})
+            self._persist(job)
+        return job
+
+
+# Global instance
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    '''Get global job manager instance (persisted jobs, in memory if the dir fails)'''
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                from config import ORCHIX_CONFIG_DIR
+                try:
+                    _manager = JobManager(str(ORCHIX_CONFIG_DIR / 'jobs'))
+                except OSError:
+                    _manager = JobManager()
+    return _manager
@@ -31,6 +31,32 @@ AUDIT_LOG_DIR = Path(__file__).parent.parent / 'audit'
 AUDIT_LOG_FILE = AUDIT_LOG_DIR / 'audit.log'
 AUDIT_DAILY_DIR = AUDIT_LOG_DIR / 'daily'
 
+# Bytes read per step when scanning the log from the end
+_REVERSE_BLOCK_SIZE = 64 * 1024
+
+
+def _reverse_lines(path, block_size=_REVERSE_BLOCK_SIZE):
+    """Yield the non-empty lines of a file (as bytes), last line first.
+    Reads fixed-size blocks backwards from the end, so memory stays bounded by
+    one block plus the longest line and stopping early skips the rest.
+    """
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        pos = f.tell()
+        tail = b''
+        while pos > 0:
+            size = min(block_size, pos)
+            pos -= size
+            f.seek(pos)
+            lines = (f.read(size) + tail).split(b'\n')
+            # The first piece may continue in the previous block
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                if line.strip():
+                    yield line
+        if tail.strip():
+            yield tail
+
 
 class AuditLogger:
     """
@@ -43,6 +69,7 @@ class AuditLogger:
         self.enabled = enabled
         self.log_file = AUDIT_LOG_FILE
         self._web_user = None
+        self._own_writer = None
 
     def set_web_user(self, username):
         """Set Web UI username for audit logging."""
@@ -62,43 +89,13 @@ class AuditLogger:
                 'details': details or {}
             }
             
-            # Ensure log directory exists and create if not
-            self.log_file.parent.mkdir(parents=True, exist_ok=True)
-
-            # Append to log file (Web UI editable)
-            with open(self.log_file, 'a', encoding='utf-8') as f:
-                f.write(json.dumps(event) + '\n')
-
-            # Write to persistent daily .txt file (not affected by single-event deletes)
-            self._write_daily_log(event)
+            # Written by the audit writer thread (batched, one writer at a time)
+            self._writer().submit(event)
 
         except Exception as e:
             # Silently fail - don't break the app if logging fails
             pass
 
-    def _write_daily_log(self, event):
-        """Write event to persistent daily .txt log file (append-only)."""
-        try:
-            AUDIT_DAILY_DIR.mkdir(parents=True, exist_ok=True)
-            today = datetime.now().strftime('%Y-%m-%d')
-            daily_file = AUDIT_DAILY_DIR / f'{today}.txt'
-
-            ts = event.get('timestamp', '')[:19]
-            user = event.get('user', 'unknown')
-            etype = event.get('event_type', '')
-            app = event.get('app_name', '')
-            details = event.get('details', {})
-            detail_str = ', '.join(f'{k}={v}' for k, v in details.items()) if details else ''
-
-            line = f'[{ts}] [{user}] {etype} {app}'
-            if detail_str:
-                line += f' ({detail_str})'
-
-            with open(daily_file, 'a', encoding='utf-8') as f:
-                f.write(line + '\n')
-        except Exception:
-            pass
-    
     def _get_current_user(self):
         """Get current user - prefers Web UI session user, falls back to system user."""
         if self._web_user:
@@ -108,39 +105,79 @@ class AuditLogger:
         except:
             return "unknown"
     
-    def get_recent_events(self, limit=100, event_type=None, app_name=None):
-        """Get recent audit events"""
+    def _writer(self, create=True):
+        """Writer thread for this log (None if create=False and none started yet)."""
+        if self.log_file == AUDIT_LOG_FILE:
+            from license import audit_writer
+            if not create and audit_writer._writer is None:
+                return None
+            return audit_writer.get_audit_writer()
+        if self._own_writer is None and create:
+            from license.audit_writer import AuditWriter
+            self._own_writer = AuditWriter(self.log_file, AUDIT_DAILY_DIR)
+        return self._own_writer
+
+    def _flush(self):
+        """Wait for queued events so reads see everything logged so far."""
+        writer = self._writer(create=False)
+        if writer is not None:
+            writer.flush()
+
+    def _store(self):
+        """Indexed audit store, or None to read audit.log directly."""
+        if self.log_file != AUDIT_LOG_FILE:
+            return None
+        from license.audit_store import get_audit_store
+        return get_audit_store()
+
+    def _iter_events_reversed(self):
+        """Parsed events, newest first; stops reading when the caller stops."""
         if not self.log_file.exists():
-            return []
-        
-        events = []
+            return
         try:
-            with open(self.log_file, 'r') as f:
-                # Read all lines and reverse to get newest first
-                lines = f.readlines()[::-1]
-                
-                for line in lines:
-                    if not line.strip():
-                        continue
-                    
-                    try:
-                        event = json.loads(line.strip())
-                        
-                        # Apply filters
-                        if event_type and event.get('event_type') != event_type:
-                            continue
-                        if app_name and event.get('app_name') != app_name:
-                            continue
-                        
-                        events.append(event)
-                        
-                        if len(events) >= limit:
-                            break
-                    except json.JSONDecodeError:
-                        continue
-        except Exception:
-            pass
-        
+            for line in _reverse_lines(self.log_file):
+                try:
+                    yield json.loads(line)
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+        except OSError:
+            return
+
+    def get_recent_events(self, limit=100, event_type=None, app_name=None,
+                          user=None, since=None, until=None, before=None):
+        """Get recent audit events, newest first.
+        since/until filter by ISO timestamp; before is the `id` of the last
+        event of the previous page (cursor pagination, indexed store only).
+        """
+        self._flush()
+        store = self._store()
+        if store is not None:
+            try:
+                return store.query(limit=limit, event_type=event_type, app_name=app_name,
+                                   user=user, since=since, until=until, before=before)
+            except Exception:
+                pass
+
+        events = []
+        for event in self._iter_events_reversed():
+            # Apply filters
+            if event_type and event.get('event_type') != event_type:
+                continue
+            if app_name and event.get('app_name') != app_name:
+                continue
+            if user and event.get('user') != user:
+                continue
+            timestamp = str(event.get('timestamp', ''))
+            if until and timestamp >= until:
+                continue
+            if since and timestamp < since:
+                break
+
+            events.append(event)
+
+            if len(events) >= limit:
+                break
+
         return events
     
     def get_user_activity(self, username=None, limit=100):
@@ -156,70 +193,84 @@ class AuditLogger:
         """
         if username is None:
             username = self._get_current_user()
-        
-        if not self.log_file.exists():
-            return []
-        
+
+        self._flush()
+        store = self._store()
+        if store is not None:
+            try:
+                return store.query(limit=limit, user=username)
+            except Exception:
+                pass
+
         events = []
-        try:
-            with open(self.log_file, 'r') as f:
-                lines = f.readlines()[::-1]
-                
-                for line in lines:
-                    if not line.strip():
-                        continue
-                    
-                    try:
-                        event = json.loads(line.strip())
-                        if event.get('user') == username:
-                            events.append(event)
-                            
-                            if len(events) >= limit:
-                                break
-                    except json.JSONDecodeError:
-                        continue
-        except Exception:
-            pass
-        
+        for event in self._iter_events_reversed():
+            if event.get('user') == username:
+                events.append(event)
+
+                if len(events) >= limit:
+                    break
+
         return events
 
+    def get_users(self):
+        """Distinct users in the audit log."""
+        self._flush()
+        store = self._store()
+        if store is not None:
+            try:
+                return store.users()
+            except Exception:
+                pass
+        events = self.get_recent_events(limit=1000)
+        return sorted(set(e.get('user', 'unknown') for e in events))
+
     def clear_old_logs(self, days=90):
         """Clear audit logs older than specified days (both main log and daily files)"""
         from datetime import timedelta
         cutoff = datetime.now() - timedelta(days=days)
 
-        # Clean main log file
-        if self.log_file.exists():
-            try:
-                events = []
-                with open(self.log_file, 'r') as f:
-                    for line in f:
-                        if not line.strip():
-                            continue
-                        try:
-                            event = json.loads(line.strip())
-                            event_time = datetime.fromisoformat(event['timestamp'])
-                            if event_time > cutoff:
-                                events.append(event)
-                        except:
-                            pass
-
-                with open(self.log_file, 'w') as f:
-                    for event in events:
-                        f.write(json.dumps(event) + '\n')
-            except Exception:
-                pass
+        # Hold the writer (and close its files) while the logs are rewritten
+        with self._writer().paused():
+            # Clean main log file
+            if self.log_file.exists():
+                try:
+                    events = []
+                    with open(self.log_file, 'r') as f:
+                        for line in f:
+                            if not line.strip():
+                                continue
+                            try:
+                                event = json.loads(line.strip())
+                                event_time = datetime.fromisoformat(event['timestamp'])
+                                if event_time > cutoff:
+                                    events.append(event)
+                            except:
+                                pass
 
-        # Clean old daily .txt files
-        if AUDIT_DAILY_DIR.exists():
-            try:
-                cutoff_str = cutoff.strftime('%Y-%m-%d')
-                for f in AUDIT_DAILY_DIR.glob('*.txt'):
-                    # Filename is YYYY-MM-DD.txt
-                    if f.stem < cutoff_str:
-                        f.unlink()
-            except Exception:
-                pass
+                    with open(self.log_file, 'w') as f:
+                        for event in events:
+                            f.write(json.dumps(event) + '\n')
+                except Exception:
+                    pass
+
+            # Clean the indexed store
+            store = self._store()
+            if store is not None:
+                try:
+                    store.delete_before(cutoff.isoformat())
+                except Exception:
+                    pass
+
+            # Clean old daily .txt files
+            if AUDIT_DAILY_DIR.exists():
+                try:
+                    cutoff_str = cutoff.strftime('%Y-%m-%d')
+                    for f in AUDIT_DAILY_DIR.glob('*.txt'):
+                        # Filename is YYYY-MM-DD.txt
+                        if f.stem < cutoff_str:
+                            f.unlink()
+                except Exception:
+                    pass
 
 
 # Global audit logger instance
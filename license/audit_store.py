@@ -0,0 +1,216 @@
+# ORCHIX v1.4 - Indexed audit store
+"""
+Audit Store
+===========
+SQLite (WAL mode) copy of the audit log with indexes on timestamp,
+event_type, app_name and user, so filtered queries and the user list no
+longer scan audit.log. audit.log stays the append-only JSONL record; its
+existing events are imported once, the first time the store is opened.
+
+Queries return newest first. Each event carries its row `id`; pass the last
+one as `before` to fetch the next page.
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+# Events inserted per transaction when importing audit.log
+_IMPORT_BATCH = 1000
+_BUSY_TIMEOUT = 10
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    user TEXT,
+    event_type TEXT,
+    app_name TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_timestamp ON events (timestamp);
+CREATE INDEX IF NOT EXISTS idx_events_type ON events (event_type, id);
+CREATE INDEX IF NOT EXISTS idx_events_app ON events (app_name, id);
+CREATE INDEX IF NOT EXISTS idx_events_user ON events (user, id);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def _row(event):
+    return (
+        str(event.get('timestamp', '')),
+        event.get('user'),
+        event.get('event_type'),
+        event.get('app_name'),
+        json.dumps(event.get('details') or {}),
+    )
+
+
+class AuditStore:
+    """Indexed audit events in one SQLite file (one connection per thread)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = self._conn()
+        conn.executescript(_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=_BUSY_TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # ============ Writes ============
+
+    def insert_many(self, events):
+        """Insert events in one transaction."""
+        rows = [_row(e) for e in events]
+        if not rows:
+            return
+        conn = self._conn()
+        conn.execute('BEGIN')
+        try:
+            conn.executemany(
+                'INSERT INTO events (timestamp, user, event_type, app_name, details) '
+                'VALUES (?, ?, ?, ?, ?)', rows)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def insert(self, event):
+        self.insert_many([event])
+
+    def delete_before(self, timestamp):
+        """Remove events older than an ISO timestamp."""
+        self._conn().execute('DELETE FROM events WHERE timestamp < ?', (timestamp,))
+
+    def import_jsonl(self, log_file):
+        """Import audit.log once. Runs in an IMMEDIATE transaction so two
+        processes opening the store at the same time can't both import it.
+        Returns the number of events imported.
+        """
+        log_file = Path(log_file)
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute("SELECT 1 FROM meta WHERE key = 'jsonl_imported'").fetchone():
+                conn.execute('COMMIT')
+                return 0
+            count = 0
+            if log_file.exists():
+                batch = []
+                with open(log_file, 'r', encoding='utf-8', errors='replace') as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            event = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if not isinstance(event, dict):
+                            continue
+                        batch.append(_row(event))
+                        if len(batch) >= _IMPORT_BATCH:
+                            conn.executemany(
+                                'INSERT INTO events (timestamp, user, event_type, app_name, details) '
+                                'VALUES (?, ?, ?, ?, ?)', batch)
+                            count += len(batch)
+                            batch = []
+                if batch:
+                    conn.executemany(
+                        'INSERT INTO events (timestamp, user, event_type, app_name, details) '
+                        'VALUES (?, ?, ?, ?, ?)', batch)
+                    count += len(batch)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('jsonl_imported', ?)", (str(count),))
+            conn.execute('COMMIT')
+            return count
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    # ============ Queries ============
+
+    def query(self, limit=100, event_type=None, app_name=None, user=None,
+              since=None, until=None, before=None):
+        """Events matching all given filters, newest first.
+        since/until: ISO timestamps (inclusive / exclusive); before: row id cursor.
+        """
+        clauses, params = [], []
+        for column, value in (('event_type', event_type), ('app_name', app_name), ('user', user)):
+            if value:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        if since:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        if before:
+            clauses.append('id < ?')
+            params.append(int(before))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        # SQLite reads a negative LIMIT as "no limit"
+        params.append(max(1, int(limit)))
+        rows = self._conn().execute(
+            f'SELECT id, timestamp, user, event_type, app_name, details FROM events {where} '
+            'ORDER BY id DESC LIMIT ?', params).fetchall()
+
+        events = []
+        for row_id, timestamp, user_name, etype, app, details in rows:
+            try:
+                details = json.loads(details) if details else {}
+            except json.JSONDecodeError:
+                details = {}
+            events.append({
+                'id': row_id,
+                'timestamp': timestamp,
+                'user': user_name,
+                'event_type': etype,
+                'app_name': app,
+                'details': details,
+            })
+        return events
+
+    def users(self):
+        """Distinct users. Walks the user index one key at a time (a seek per
+        user), so the cost grows with the number of users, not of events.
+        """
+        rows = self._conn().execute(
+            'WITH RECURSIVE u(name) AS ('
+            ' SELECT MIN(user) FROM events'
+            ' UNION ALL'
+            ' SELECT (SELECT MIN(user) FROM events WHERE user > u.name) FROM u WHERE u.name IS NOT NULL'
+            ') SELECT name FROM u WHERE name IS NOT NULL').fetchall()
+        return [r[0] for r in rows]
+
+
+# Global instance
+_store = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_audit_store():
+    """Get global audit store instance (imports audit.log on first open).
+    Returns None if the store can't be opened; callers fall back to audit.log.
+    """
+    global _store, _store_failed
+    if _store is None and not _store_failed:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                from license.audit_logger import AUDIT_LOG_DIR, AUDIT_LOG_FILE
+                try:
+                    store = AuditStore(AUDIT_LOG_DIR / 'audit.db')
+                    store.import_jsonl(AUDIT_LOG_FILE)
+                    _store = store
+                except (sqlite3.Error, OSError):
+                    _store_failed = True
+    return _store
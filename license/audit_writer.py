@@ -0,0 +1,253 @@
+# ORCHIX v1.4 - Buffered audit writer
+"""
+Audit Writer
+============
+log_event() only queues the event; a single writer thread appends it to
+audit.log, the daily .txt file and the indexed store. Events that arrive
+together are written in one batch (one write + flush per file, one store
+transaction), and because only this thread writes, lines from concurrent
+requests can't interleave.
+
+Durability (.env or environment):
+    ORCHIX_AUDIT_FLUSH_INTERVAL=0.5   seconds events may wait to be batched
+    ORCHIX_AUDIT_FSYNC=shutdown       always | shutdown | never
+
+When the queue is full, log_event() waits for room and, if the writer still
+can't keep up, writes the event itself; events are never dropped.
+"""
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+# Events waiting to be written before callers are slowed down
+MAX_QUEUE = 10000
+# Events written per batch at most
+_MAX_BATCH = 500
+# How long log_event() waits for room in a full queue before writing itself
+_PUT_TIMEOUT = 5
+_FSYNC_POLICIES = ('always', 'shutdown', 'never')
+
+
+def _flush_interval():
+    try:
+        return max(0.0, float(os.getenv('ORCHIX_AUDIT_FLUSH_INTERVAL', '0.5')))
+    except ValueError:
+        return 0.5
+
+
+def _fsync_policy():
+    policy = os.getenv('ORCHIX_AUDIT_FSYNC', 'shutdown').strip().lower()
+    return policy if policy in _FSYNC_POLICIES else 'shutdown'
+
+
+def daily_line(event):
+    """One line of the daily .txt log."""
+    ts = event.get('timestamp', '')[:19]
+    user = event.get('user', 'unknown')
+    etype = event.get('event_type', '')
+    app = event.get('app_name', '')
+    details = event.get('details', {})
+    detail_str = ', '.join(f'{k}={v}' for k, v in details.items()) if details else ''
+
+    line = f'[{ts}] [{user}] {etype} {app}'
+    if detail_str:
+        line += f' ({detail_str})'
+    return line
+
+
+class AuditWriter:
+    """Single writer thread for audit events."""
+
+    def __init__(self, log_file, daily_dir, flush_interval=None, fsync=None,
+                 max_queue=MAX_QUEUE, store=None):
+        self.log_file = log_file
+        self.daily_dir = daily_dir
+        self.flush_interval = _flush_interval() if flush_interval is None else flush_interval
+        self.fsync = fsync or _fsync_policy()
+        self._store = store
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._io_lock = threading.RLock()
+        self._log = None
+        self._daily = None           # (date, file)
+        self._cond = threading.Condition()
+        self._pending = 0            # queued + being written
+        self._thread = None
+        self._closed = False
+
+    # ============ Producer side ============
+
+    def submit(self, event):
+        """Queue one event; blocks (backpressure) while the queue is full."""
+        if self._closed:
+            self._write_batch([event])
+            return
+        self._start()
+        with self._cond:
+            self._pending += 1
+        try:
+            self._queue.put(event, timeout=_PUT_TIMEOUT)
+        except queue.Full:
+            # Writer can't keep up: write it ourselves rather than drop it
+            try:
+                self._write_batch([event])
+            finally:
+                self._done(1)
+
+    def flush(self, timeout=2.0):
+        """Wait until everything queued so far is written. Returns False on timeout."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while self._pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    @contextmanager
+    def paused(self):
+        """Flush, close the files and hold off writes (e.g. while audit.log is rewritten)."""
+        self.flush()
+        with self._io_lock:
+            self._close_files()
+            yield
+
+    def close(self):
+        """Write what is queued, fsync (unless ORCHIX_AUDIT_FSYNC=never) and stop."""
+        if self._closed:
+            return
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+        with self._io_lock:
+            self._sync(self.fsync != 'never')
+            self._close_files()
+
+    # ============ Writer thread ============
+
+    def _start(self):
+        if self._thread is not None:
+            return
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='orchix-audit-writer', daemon=True)
+                self._thread.start()
+
+    def _done(self, count):
+        with self._cond:
+            self._pending -= count
+            if not self._pending:
+                self._cond.notify_all()
+
+    def _run(self):
+        stop = False
+        while not stop:
+            event = self._queue.get()
+            if event is None:
+                break
+            batch = [event]
+            # Gather what arrives within the flush interval into the same batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < _MAX_BATCH:
+                try:
+                    timeout = deadline - time.monotonic()
+                    event = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if event is None:
+                    stop = True
+                    break
+                batch.append(event)
+            try:
+                self._write_batch(batch)
+            except Exception:
+                pass
+            finally:
+                self._done(len(batch))
+
+    def _write_batch(self, events):
+        with self._io_lock:
+            try:
+                if self._log is None:
+                    self.log_file.parent.mkdir(parents=True, exist_ok=True)
+                    self._log = open(self.log_file, 'a', encoding='utf-8')
+                self._log.write(''.join(json.dumps(e) + '\n' for e in events))
+            except Exception:
+                # Silently fail - don't break the app if logging fails
+                pass
+
+            # Persistent daily .txt files (not affected by single-event deletes)
+            try:
+                by_day = {}
+                for e in events:
+                    day = str(e.get('timestamp', ''))[:10]
+                    by_day.setdefault(day, []).append(daily_line(e))
+                for day, lines in by_day.items():
+                    self._daily_file(day).write('\n'.join(lines) + '\n')
+            except Exception:
+                pass
+
+            self._sync(self.fsync == 'always')
+
+        # Indexed copy for queries
+        if self._store is not None:
+            try:
+                self._store.insert_many(events)
+            except Exception:
+                pass
+
+    def _daily_file(self, day):
+        if self._daily is None or self._daily[0] != day:
+            if self._daily is not None:
+                self._daily[1].close()
+                self._daily = None
+            self.daily_dir.mkdir(parents=True, exist_ok=True)
+            self._daily = (day, open(self.daily_dir / f'{day}.txt', 'a', encoding='utf-8'))
+        return self._daily[1]
+
+    def _sync(self, fsync):
+        for f in (self._log, self._daily[1] if self._daily else None):
+            if f is None:
+                continue
+            try:
+                f.flush()
+                if fsync:
+                    os.fsync(f.fileno())
+            except (OSError, ValueError):
+                pass
+
+    def _close_files(self):
+        for f in (self._log, self._daily[1] if self._daily else None):
+            if f is not None:
+                try:
+                    f.close()
+                except OSError:
+                    pass
+        self._log = None
+        self._daily = None
+
+
+# Global instance
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer():
+    """Get global audit writer instance (closed, with fsync, at exit)"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                from license.audit_logger import AUDIT_LOG_FILE, AUDIT_DAILY_DIR
+                from license.audit_store import get_audit_store
+                # Open the store first: its one-time import of audit.log must
+                # not also pick up events this writer is about to append
+                _writer = AuditWriter(AUDIT_LOG_FILE, AUDIT_DAILY_DIR, store=get_audit_store())
+                atexit.register(_writer.close)
+    return _writer
@@ -1,6 +1,6 @@
 import os
-import subprocess
 import json
+import threading
 from pathlib import Path
 from datetime import datetime
 from license.features import FREE_FEATURES, PRO_FEATURES, FEATURE_DESCRIPTIONS
@@ -9,15 +9,49 @@ from config import ORCHIX_CONFIG_DIR
 LICENSE_FILE = ORCHIX_CONFIG_DIR / '.orchix_license'
 MANAGED_CONTAINERS_FILE = ORCHIX_CONFIG_DIR / '.orchix_managed_containers.json'
 
+# PRO keys are re-validated online in the background this often (seconds)
+REVALIDATE_INTERVAL = 6 * 3600
+# First background re-validation after startup (seconds)
+_FIRST_REVALIDATION = 5
 
-class LicenseManager:
-    '''Manage license and feature gates'''
 
-    def __init__(self):
+def _is_expired(expiry_date):
+    if not expiry_date:
+        return False
+    if expiry_date.tzinfo is not None:
+        from datetime import timezone
+        now = datetime.now(timezone.utc)
+    else:
+        now = datetime.now()
+    return now > expiry_date
+
+
+def _parse_date(value):
+    try:
+        return datetime.fromisoformat(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+class LicenseManager:
+    '''Manage license and feature gates.
+
+    The verdict of the last online validation is kept in the license file and
+    trusted at startup while it is within the offline grace period, so loading
+    never waits on the license server. PRO keys are re-validated on a
+    background timer and downgraded to FREE if the server rejects them.
+    '''
+
+    def __init__(self, revalidate=True):
+        self._lock = threading.Lock()
+        self._timer = None
+        self._revalidate = revalidate
         self.tier, self.license_key, self.expiry_date = self._load_license()
+        if self.is_pro():
+            self._schedule_revalidation(_FIRST_REVALIDATION)
 
     def _load_license(self):
-        '''Load license from file and validate online'''
+        '''Load license from file; validate online only if the cached verdict is too old'''
         if LICENSE_FILE.exists():
             try:
                 with open(LICENSE_FILE, 'r') as f:
@@ -27,23 +61,15 @@ class LicenseManager:
                         data = json.loads(content)
                         tier = data.get('tier', 'FREE')
                         license_key = data.get('key')
-                        expiry = data.get('expiry')
-
-                        # Parse expiry date if exists
-                        expiry_date = None
-                        if expiry:
-                            try:
-                                expiry_date = datetime.fromisoformat(expiry)
-                            except:
-                                pass
+                        expiry_date = _parse_date(data.get('expiry'))
 
                         # PRO always requires a valid key — no key = FREE
                         if tier == 'PRO' and not license_key:
                             self._write_free_license()
                             return 'FREE', None, None
 
-                        # PRO must be re-validated online on every start
-                        if tier == 'PRO':
+                        # Cached verdict expired: one online validation now
+                        if tier == 'PRO' and not self._verdict_fresh(data):
                             from license.secure_license import LicenseKeyValidator
                             result = LicenseKeyValidator.validate_key(license_key)
                             if not result.get('valid'):
@@ -51,22 +77,12 @@ class LicenseManager:
                                 self._write_free_license()
                                 return 'FREE', None, None
                             # Update expiry from server response if available
-                            if result.get('expires'):
-                                try:
-                                    expiry_date = datetime.fromisoformat(result['expires'])
-                                except Exception:
-                                    pass
+                            expiry_date = _parse_date(result.get('expires')) or expiry_date
 
                         # Check local expiry as fallback
-                        if tier == 'PRO' and expiry_date:
-                            if expiry_date.tzinfo is not None:
-                                from datetime import timezone
-                                now = datetime.now(timezone.utc)
-                            else:
-                                now = datetime.now()
-                            if now > expiry_date:
-                                self._write_free_license()
-                                return 'FREE', None, None
+                        if tier == 'PRO' and _is_expired(expiry_date):
+                            self._write_free_license()
+                            return 'FREE', None, None
 
                         return tier, license_key, expiry_date
                     except json.JSONDecodeError:
@@ -77,6 +93,70 @@ class LicenseManager:
 
         return 'FREE', None, None
 
+    @staticmethod
+    def _verdict_fresh(data):
+        '''True if the last successful validation is within the offline grace period.'''
+        from license.secure_license import OFFLINE_GRACE
+        last_validated = _parse_date(data.get('last_validated'))
+        if last_validated is None or last_validated.tzinfo is not None:
+            return False
+        return datetime.now() - last_validated <= OFFLINE_GRACE
+
+    # ============ Background revalidation ============
+
+    def _schedule_revalidation(self, delay=REVALIDATE_INTERVAL):
+        if not self._revalidate:
+            return
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(delay, self.revalidate)
+            self._timer.daemon = True
+            self._timer.name = 'orchix-license'
+            self._timer.start()
+
+    def _cancel_revalidation(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+    def revalidate(self):
+        '''Validate the PRO key online (one request) and apply the verdict.
+        Returns True if the license is still PRO.
+        '''
+        key = self.license_key
+        if not self.is_pro() or not key:
+            return False
+        try:
+            from license.secure_license import LicenseKeyValidator
+            result = LicenseKeyValidator.validate_key(key)
+            if key != self.license_key:
+                return self.is_pro()  # Key changed while validating
+            if result.get('valid'):
+                self.expiry_date = _parse_date(result.get('expires')) or self.expiry_date
+                if _is_expired(self.expiry_date):
+                    self._downgrade()
+            elif result.get('status') == 'error':
+                # No verdict from the server: keep the cached one while it lasts
+                try:
+                    data = json.loads(LICENSE_FILE.read_text(encoding='utf-8'))
+                except Exception:
+                    data = {}
+                if not self._verdict_fresh(data):
+                    self._downgrade()
+            else:
+                self._downgrade()
+        except Exception:
+            pass
+        if self.is_pro():
+            self._schedule_revalidation()
+        return self.is_pro()
+
+    def _downgrade(self):
+        self._write_free_license()
+        self.tier, self.license_key, self.expiry_date = 'FREE', None, None
+
     def _write_free_license(self):
         '''Downgrade license file to FREE'''
         try:
@@ -103,7 +183,7 @@ class LicenseManager:
         return features['tier_display']
     
     def activate_pro(self, license_key):
-        '''Activate PRO license with key'''
+        '''Activate PRO license with key (one online validation)'''
         from license.secure_license import LicenseKeyValidator
 
         # Validate online and get full result including license_id
@@ -111,7 +191,7 @@ class LicenseManager:
         if not result.get('valid'):
             print(f"  License validation failed: {result['message']}")
             return False
-        if LicenseKeyValidator.check_expiry(license_key):
+        if _is_expired(_parse_date(result.get('expires'))):
             print("  License has expired")
             return False
 
@@ -140,11 +220,9 @@ class LicenseManager:
 
             self.tier = 'PRO'
             self.license_key = license_key
-            try:
-                self.expiry_date = datetime.fromisoformat(result['expires']) if result.get('expires') else None
-            except Exception:
-                self.expiry_date = None
+            self.expiry_date = _parse_date(result.get('expires'))
             self.clear_managed_containers()
+            self._schedule_revalidation()
             return True
         except Exception as e:
             print(f"Failed to save license: {e}")
@@ -161,8 +239,8 @@ class LicenseManager:
             print(f"  License validation failed: {result['message']}")
             return False
 
-        # Check if expired
-        if LicenseKeyValidator.check_expiry(key):
+        # Check if expired (from the same response, no second request)
+        if _is_expired(_parse_date(result.get('expires'))):
             print("  License has expired")
             return False
 
@@ -179,6 +257,7 @@ class LicenseManager:
 
             if LICENSE_FILE.exists():
                 LICENSE_FILE.unlink()
+            self._cancel_revalidation()
             self.tier = 'FREE'
             self.license_key = None
             self.expiry_date = None
@@ -211,54 +290,28 @@ class LicenseManager:
     
     def check_container_limit(self):
         '''Check current container count vs limit'''
+        limit = self.get_container_limit()
         try:
-            # Count running containers managed by ORCHIX
-            result = subprocess.run(
-                ['docker', 'ps', '--format', '{{.Names}}'],
-                capture_output=True,
-                text=True,
-                encoding='utf-8',
-                errors='ignore'
-            )
-            
-            if result.returncode == 0:
-                containers = [c for c in result.stdout.split('\n') if c]
-                current_count = len(containers)
-                limit = self.get_container_limit()
-                
-                return {
-                    'current': current_count,
-                    'limit': limit,
-                    'reached': current_count >= limit,
-                    'remaining': max(0, limit - current_count)
-                }
-            
-            return {'current': 0, 'limit': self.get_container_limit(), 'reached': False, 'remaining': self.get_container_limit()}
+            from license.visibility import get_visibility_service
+            current_count = get_visibility_service().running_count()
         except Exception:
-            return {'current': 0, 'limit': self.get_container_limit(), 'reached': False, 'remaining': self.get_container_limit()}
-    
+            current_count = 0
+        return {
+            'current': current_count,
+            'limit': limit,
+            'reached': current_count >= limit,
+            'remaining': max(0, limit - current_count)
+        }
+
     # ============ Managed Container Selection (FREE tier) ============
 
     def get_managed_containers(self):
         """Get list of selected containers for FREE tier, or None if all visible."""
         if self.is_pro():
             return None  # PRO sees everything
-        if not MANAGED_CONTAINERS_FILE.exists():
-            return None  # No selection made yet
-        try:
-            data = json.loads(MANAGED_CONTAINERS_FILE.read_text(encoding='utf-8'))
-            selected = data.get('selected', [])
-            # Validate data integrity: must be list of non-empty strings
-            if not isinstance(selected, list):
-                return None
-            import re
-            valid = [n for n in selected
-                     if isinstance(n, str) and n.strip()
-                     and re.match(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]*$', n)
-                     and len(n) <= 128]
-            return valid if valid else None
-        except Exception:
-            return None
+        from license.visibility import get_visibility_service
+        selection = get_visibility_service().selection()
+        return list(selection) if selection is not None else None
 
     def set_managed_containers(self, names):
         """Save the selected container names for FREE tier."""
@@ -273,6 +326,7 @@ class LicenseManager:
             os.chmod(MANAGED_CONTAINERS_FILE, stat.S_IRUSR | stat.S_IWUSR)
         except (OSError, AttributeError):
             pass
+        self._invalidate_selection()
 
     def clear_managed_containers(self):
         """Remove selection file (e.g. when PRO is activated)."""
@@ -281,6 +335,14 @@ class LicenseManager:
                 MANAGED_CONTAINERS_FILE.unlink()
         except Exception:
             pass
+        self._invalidate_selection()
+
+    def _invalidate_selection(self):
+        try:
+            from license.visibility import get_visibility_service
+            get_visibility_service().invalidate()
+        except Exception:
+            pass
 
     def needs_container_selection(self):
         """Check if user needs to select managed containers.
@@ -288,19 +350,11 @@ class LicenseManager:
         """
         if self.is_pro():
             return False
-        if MANAGED_CONTAINERS_FILE.exists():
-            return False
         try:
-            result = subprocess.run(
-                ['docker', 'ps', '-a', '--format', '{{.Names}}'],
-                capture_output=True, text=True, encoding='utf-8', errors='ignore'
-            )
-            if result.returncode == 0:
-                containers = [c for c in result.stdout.split('\n') if c.strip()]
-                return len(containers) > self.get_container_limit()
+            from license.visibility import get_visibility_service
+            return get_visibility_service().needs_selection()
         except Exception:
-            pass
-        return False
+            return False
 
     def get_license_info(self):
         '''Get complete license information'''
@@ -339,10 +393,14 @@ class LicenseManager:
 
 # Global instance
 _license_manager = None
+_license_manager_lock = threading.Lock()
+
 
 def get_license_manager():
     '''Get global license manager instance'''
     global _license_manager
     if _license_manager is None:
-        _license_manager = LicenseManager()
+        with _license_manager_lock:
+            if _license_manager is None:
+                _license_manager = LicenseManager()
     return _license_manager
\ No newline at end of file
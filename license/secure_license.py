@@ -26,6 +26,8 @@ load_dotenv()
 
 _SERVER = os.getenv('ORCHIX_LICENSE_SERVER', 'https://orchix.dev').rstrip('/')
 _TIMEOUT = 10
+# How long a key stays valid without reaching the license server
+OFFLINE_GRACE = timedelta(days=3)
 
 
 def _get_device_id() -> str:
@@ -74,7 +76,8 @@ class LicenseKeyValidator:
             print('⚠️  License server unreachable – trying offline grace period...')
             return cls._validate_offline_grace_period(key)
         except Exception as e:
-            return cls._result(False, f'Validation error: {e}')
+            # status 'error': no verdict from the server (e.g. a non-JSON reply)
+            return cls._result(False, f'Validation error: {e}', status='error')
 
     # -------------------------------------------------------------------------
 
@@ -163,7 +166,7 @@ class LicenseKeyValidator:
             return cls._result(False, 'Cannot reach license server.')
 
         elapsed = datetime.now() - last_validated
-        if elapsed > timedelta(days=3):
+        if elapsed > OFFLINE_GRACE:
             days = elapsed.days
             return cls._result(
                 False,
@@ -171,7 +174,7 @@ class LicenseKeyValidator:
                 'Please connect to the internet to re-validate your license.',
             )
 
-        remaining = 3 - elapsed.days
+        remaining = OFFLINE_GRACE.days - elapsed.days
         return cls._result(
             True,
             f'Offline mode – {remaining} day(s) remaining in grace period',
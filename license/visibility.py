@@ -0,0 +1,139 @@
+# ORCHIX v1.4 - Tier visibility service
+'''Which containers the current tier may see and act on.
+
+The FREE-tier selection file is parsed once and re-read only when its mtime
+or size changes; container names come from the shared container inventory.
+Visibility checks therefore fork nothing and read no files on the hot path.
+'''
+import json
+import os
+import re
+import threading
+
+_NAME_RE = re.compile(r'^[a-zA-Z0-9][a-zA-Z0-9_.-]*$')
+
+
+def _parse_selection(text):
+    '''Valid container names from the selection file, or None.'''
+    try:
+        selected = json.loads(text).get('selected', [])
+    except (ValueError, AttributeError):
+        return None
+    # Validate data integrity: must be list of non-empty strings
+    if not isinstance(selected, list):
+        return None
+    valid = [n for n in selected
+             if isinstance(n, str) and n.strip()
+             and _NAME_RE.match(n) and len(n) <= 128]
+    return valid if valid else None
+
+
+class VisibilityService:
+    '''Memoized FREE-tier selection plus visibility queries over the inventory.'''
+
+    def __init__(self, selection_file=None):
+        self._selection_file = selection_file
+        self._lock = threading.Lock()
+        self._signature = None
+        self._selection = None     # list of names, or None
+        self._selected = frozenset()
+
+    @property
+    def selection_file(self):
+        if self._selection_file is None:
+            from license.manager import MANAGED_CONTAINERS_FILE
+            self._selection_file = MANAGED_CONTAINERS_FILE
+        return self._selection_file
+
+    def _license(self):
+        from license import get_license_manager
+        return get_license_manager()
+
+    def _container_names(self):
+        from utils.container_inventory import get_inventory
+        return [n for n in get_inventory().names() if n]
+
+    # ============ Selection ============
+
+    def selection(self):
+        '''Selected container names (FREE tier), or None if no selection was made.'''
+        try:
+            st = os.stat(self.selection_file)
+            signature = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            signature = None
+        if signature == self._signature:
+            return self._selection
+        with self._lock:
+            if signature != self._signature:
+                selection = None
+                if signature is not None:
+                    try:
+                        with open(self.selection_file, 'r', encoding='utf-8') as f:
+                            selection = _parse_selection(f.read())
+                    except OSError:
+                        selection = None
+                self._selection = selection
+                self._selected = frozenset(selection or ())
+                self._signature = signature
+            return self._selection
+
+    def invalidate(self):
+        with self._lock:
+            self._signature = ()
+
+    # ============ Queries ============
+
+    def visible_containers(self):
+        '''(containers, selection_needed) for the current tier.
+        - PRO: all containers, False
+        - FREE with selection: only selected, False
+        - FREE without selection and <=limit: all, False
+        - FREE without selection and >limit: all, True (needs selection)
+        '''
+        lm = self._license()
+        all_containers = self._container_names()
+        if lm.is_pro():
+            return all_containers, False
+
+        if self.selection() is not None:
+            # Filter to only selected containers (that still exist)
+            selected = self._selected
+            return [c for c in all_containers if c in selected], False
+
+        return all_containers, len(all_containers) > lm.get_container_limit()
+
+    def is_visible(self, name):
+        '''True if the container exists and the current tier may act on it.'''
+        from utils.container_inventory import get_inventory
+        if not name or not get_inventory().exists(name):
+            return False
+        if self._license().is_pro() or self.selection() is None:
+            return True
+        return name in self._selected
+
+    def needs_selection(self):
+        '''FREE tier, more containers than the limit and no selection made yet.'''
+        lm = self._license()
+        if lm.is_pro() or self.selection() is not None:
+            return False
+        return len(self._container_names()) > lm.get_container_limit()
+
+    def running_count(self):
+        from utils.container_inventory import get_inventory
+        return sum(1 for state in get_inventory().statuses().values() if state == 'running')
+
+
+# Global instance
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_visibility_service():
+    '''Get global visibility service instance'''
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = VisibilityService()
+    return _service
@@ -0,0 +1,232 @@
+# ORCHIX v1.4 - Container metrics from cgroup v2
+'''Reads per-container CPU, memory, block IO and network counters straight
+from /sys/fs/cgroup and /proc instead of asking the Docker daemon.
+Falls back to the stats collector where cgroup v2 is not readable.
+'''
+import os
+import threading
+import time
+
+from utils import docker_api
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+
+METRIC_KEYS = ('cpu_percent', 'mem_used', 'mem_limit', 'net_rx', 'net_tx', 'io_read', 'io_write')
+
+# Seconds a container that failed to read is served by the fallback before retrying
+_UNREADABLE_TTL = 30
+
+
+def _read(path):
+    with open(path, 'r') as f:
+        return f.read()
+
+
+def _read_kv(path):
+    '''Parse "key value" lines (cpu.stat, memory.stat).'''
+    values = {}
+    for line in _read(path).splitlines():
+        parts = line.split()
+        if len(parts) == 2:
+            try:
+                values[parts[0]] = int(parts[1])
+            except ValueError:
+                pass
+    return values
+
+
+def _read_io(path):
+    '''Sum rbytes/wbytes over all devices in io.stat.'''
+    rbytes = wbytes = 0
+    for line in _read(path).splitlines():
+        for field in line.split()[1:]:
+            key, _, value = field.partition('=')
+            if key == 'rbytes':
+                rbytes += int(value)
+            elif key == 'wbytes':
+                wbytes += int(value)
+    return rbytes, wbytes
+
+
+def _read_net(pid):
+    '''Sum rx/tx bytes over the container's interfaces (its own netns).'''
+    rx = tx = 0
+    for line in _read(f'/proc/{pid}/net/dev').splitlines()[2:]:
+        iface, _, data = line.partition(':')
+        if iface.strip() == 'lo':
+            continue
+        fields = data.split()
+        if len(fields) >= 9:
+            rx += int(fields[0])
+            tx += int(fields[8])
+    return rx, tx
+
+
+class CgroupMetrics:
+    '''Reads container counters from cgroup v2 files; CPU% from usage deltas.'''
+
+    def __init__(self, root=CGROUP_ROOT):
+        self.root = root
+        self.available = os.path.exists(os.path.join(root, 'cgroup.controllers'))
+        self._lock = threading.Lock()
+        self._targets = {}     # container id -> (pid, cgroup dir)
+        self._prev_cpu = {}    # container id -> (usage_usec, monotonic time)
+        self._unreadable = {}  # container id -> monotonic time to retry cgroups
+        self._host_memory = None
+
+    def _cgroup_dir(self, cid, pid):
+        try:
+            for line in _read(f'/proc/{pid}/cgroup').splitlines():
+                # "0::/" alone means the unified hierarchy isn't in use (hybrid hosts)
+                if line.startswith('0::') and line[3:].strip('/'):
+                    path = os.path.join(self.root, line[3:].strip('/'))
+                    if os.path.exists(os.path.join(path, 'cpu.stat')):
+                        return path
+        except OSError:
+            pass
+        # systemd and cgroupfs driver layouts
+        for path in (os.path.join(self.root, 'system.slice', f'docker-{cid}.scope'),
+                     os.path.join(self.root, 'docker', cid)):
+            if os.path.exists(os.path.join(path, 'cpu.stat')):
+                return path
+        return None
+
+    def _resolve(self, cid):
+        '''(pid, cgroup dir) for a running container, inspected once per start.'''
+        with self._lock:
+            target = self._targets.get(cid)
+        if target and os.path.isdir(target[1]) and os.path.exists(f'/proc/{target[0]}'):
+            return target
+
+        data = docker_api.inspect_container(cid)
+        pid = ((data or {}).get('State') or {}).get('Pid') or 0
+        if not pid:
+            return None
+        path = self._cgroup_dir(data.get('Id', cid), pid)
+        if not path:
+            return None
+        with self._lock:
+            self._targets[cid] = (pid, path)
+            self._prev_cpu.pop(cid, None)
+        return pid, path
+
+    def prune(self, keep):
+        '''Drop cached targets for containers not in keep.'''
+        with self._lock:
+            for cid in list(self._targets):
+                if cid not in keep:
+                    self._targets.pop(cid, None)
+                    self._prev_cpu.pop(cid, None)
+            for cid in list(self._unreadable):
+                if cid not in keep:
+                    del self._unreadable[cid]
+
+    def _skipped(self, cid):
+        '''True while cid is still within its fallback period after a failed read.'''
+        with self._lock:
+            retry_at = self._unreadable.get(cid)
+            if retry_at is None:
+                return False
+            if time.monotonic() < retry_at:
+                return True
+            del self._unreadable[cid]
+            return False
+
+    def forget(self, cid):
+        '''Drop the cached target and serve cid from the fallback for a while.'''
+        with self._lock:
+            self._targets.pop(cid, None)
+            self._prev_cpu.pop(cid, None)
+            self._unreadable[cid] = time.monotonic() + _UNREADABLE_TTL
+
+    def _mem_limit(self, path):
+        raw = _read(os.path.join(path, 'memory.max')).strip()
+        if raw != 'max':
+            return int(raw)
+        if self._host_memory is None:
+            import psutil
+            self._host_memory = psutil.virtual_memory().total
+        return self._host_memory
+
+    def read(self, cid):
+        '''Metrics dict for one container, or None when cgroups can't be read.
+        cpu_percent is None until a second sample gives a delta.
+        '''
+        if not self.available or self._skipped(cid):
+            return None
+        target = self._resolve(cid)
+        if not target:
+            self.forget(cid)
+            return None
+        pid, path = target
+        try:
+            usage = _read_kv(os.path.join(path, 'cpu.stat')).get('usage_usec', 0)
+            now = time.monotonic()
+            mem_current = int(_read(os.path.join(path, 'memory.current')).strip())
+            inactive = _read_kv(os.path.join(path, 'memory.stat')).get('inactive_file', 0)
+            mem_limit = self._mem_limit(path)
+            try:
+                io_read, io_write = _read_io(os.path.join(path, 'io.stat'))
+            except OSError:
+                io_read = io_write = None   # io controller not enabled
+            net_rx, net_tx = _read_net(pid)
+        except (OSError, ValueError):
+            self.forget(cid)
+            return None
+
+        with self._lock:
+            prev = self._prev_cpu.get(cid)
+            self._prev_cpu[cid] = (usage, now)
+        cpu_pct = None
+        if prev and now > prev[1]:
+            # usage_usec over wall-clock usec; 100% == one full core, like docker stats
+            cpu_pct = max(0.0, (usage - prev[0]) / ((now - prev[1]) * 1e6) * 100)
+
+        return {
+            'cpu_percent': cpu_pct,
+            'mem_used': max(0, mem_current - inactive),
+            'mem_limit': mem_limit,
+            'net_rx': net_rx,
+            'net_tx': net_tx,
+            'io_read': io_read,
+            'io_write': io_write,
+        }
+
+
+# Global instance
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_cgroup_metrics():
+    '''Get global cgroup metrics reader instance'''
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = CgroupMetrics()
+    return _metrics
+
+
+def collect_container_metrics(containers):
+    '''Typed metrics for running containers.
+    containers: iterable of (container id, name). Returns {name: {METRIC_KEYS...}}.
+    Containers whose cgroups can't be read fall back to the docker stats collector.
+    '''
+    reader = get_cgroup_metrics()
+    containers = list(containers)
+    result = {}
+    fallback = []
+    for cid, name in containers:
+        values = reader.read(cid)
+        if values is None:
+            fallback.append(name)
+        else:
+            result[name] = values
+    reader.prune({cid for cid, _ in containers})
+
+    if fallback:
+        from utils.stats_collector import get_stats_collector
+        for name, values in get_stats_collector().get_values(fallback).items():
+            result[name] = {key: values.get(key) for key in METRIC_KEYS}
+    return result
@@ -0,0 +1,351 @@
+# ORCHIX v1.4 - Process-wide container inventory
+'''Keeps the list of containers (and volume names) in memory.
+Long-lived entry points (web server, CLI dashboard) call start_watching() to
+keep it current from the Docker events stream, so status/existence lookups no
+longer hit the daemon on every call. Elsewhere it is reloaded after
+_UNWATCHED_TTL. Docker calls ORCHIX makes itself (start/stop, compose up/down,
+...) invalidate it, so reads right after them see the new state.
+'''
+import re
+import threading
+import time
+
+from utils import docker_api
+
+# Without a live event stream, cached data is only trusted this long
+_UNWATCHED_TTL = 3
+# Full resync even while following, in case an event was lost
+_RESYNC_INTERVAL = 300
+_RECONNECT_MIN = 2
+_RECONNECT_MAX = 30
+
+_EVENT_FILTERS = {'type': ['container', 'network', 'volume']}
+
+# Container actions that change what `docker ps` would report
+_CONTAINER_REFRESH_ACTIONS = {
+    'create', 'start', 'restart', 'die', 'stop', 'kill', 'oom',
+    'pause', 'unpause', 'rename', 'update', 'health_status',
+}
+
+_DURATION_RE = re.compile(
+    r'(Less than a second|About an? (?:minute|hour)|'
+    r'\d+ (?:second|minute|hour|day|week|month|year)s?)'
+)
+_UNIT_SECONDS = {
+    'second': 1, 'minute': 60, 'hour': 3600, 'day': 86400,
+    'week': 7 * 86400, 'month': 30 * 86400, 'year': 365 * 86400,
+}
+
+
+def _parse_duration(text):
+    '''Invert docker's HumanDuration ("3 hours", "About a minute") to seconds.'''
+    if text.startswith('Less'):
+        return 0
+    if text.startswith('About'):
+        return 3600 if text.endswith('hour') else 60
+    count, unit = text.split()
+    return int(count) * _UNIT_SECONDS[unit.rstrip('s')]
+
+
+def human_duration(seconds):
+    '''Same wording as docker's HumanDuration, used to re-render status text.'''
+    seconds = int(max(0, seconds))
+    minutes, hours = seconds // 60, seconds // 3600
+    if seconds < 1:
+        return 'Less than a second'
+    if seconds == 1:
+        return '1 second'
+    if seconds < 60:
+        return f'{seconds} seconds'
+    if minutes == 1:
+        return 'About a minute'
+    if minutes < 60:
+        return f'{minutes} minutes'
+    if hours == 1:
+        return 'About an hour'
+    if hours < 48:
+        return f'{hours} hours'
+    if hours < 24 * 7 * 2:
+        return f'{hours // 24} days'
+    if hours < 24 * 30 * 2:
+        return f'{hours // (24 * 7)} weeks'
+    if hours < 24 * 365 * 2:
+        return f'{hours // (24 * 30)} months'
+    return f'{hours // (24 * 365)} years'
+
+
+class ContainerInventory:
+    '''In-memory view of all containers, fed by `docker events`.'''
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._containers = {}     # id -> normalized container dict
+        self._names = {}          # name -> id
+        self._status_tpl = {}     # id -> (template, anchor) for relative status text
+        self._volumes = set()
+        self._loaded = False
+        self._synced_at = 0
+        self._following = False
+        self._thread = None
+        self._stream = None
+        self._listeners = []
+        self._counters = {'hits': 0, 'misses': 0, 'stale_hits': 0, 'events': 0, 'reloads': 0}
+        self._last_event_at = 0
+
+    # ============ Loading ============
+
+    def _remember(self, container, now):
+        cid = container['id']
+        old = self._containers.get(cid)
+        if old and old['name'] != container['name']:
+            self._names.pop(old['name'], None)
+        self._containers[cid] = container
+        self._names[container['name']] = cid
+
+        match = _DURATION_RE.search(container['status'])
+        if match:
+            template = (container['status'][:match.start()].replace('{', '{{').replace('}', '}}')
+                        + '{}'
+                        + container['status'][match.end():].replace('{', '{{').replace('}', '}}'))
+            self._status_tpl[cid] = (template, now - _parse_duration(match.group(1)))
+        else:
+            self._status_tpl.pop(cid, None)
+
+    def _forget(self, cid):
+        container = self._containers.pop(cid, None)
+        self._status_tpl.pop(cid, None)
+        if container and self._names.get(container['name']) == cid:
+            del self._names[container['name']]
+        return container
+
+    def reload(self):
+        '''Full resync from the daemon. Returns False when Docker is unreachable.'''
+        listing = docker_api.list_containers(all=True)
+        if listing is None:
+            with self._lock:
+                self._loaded = False
+            return False
+        volumes = docker_api.list_volumes()
+        now = time.time()
+        with self._lock:
+            self._containers.clear()
+            self._names.clear()
+            self._status_tpl.clear()
+            for c in sorted(listing, key=lambda c: c['created'], reverse=True):
+                self._remember(c, now)
+            self._volumes = set(volumes)
+            self._loaded = True
+            self._synced_at = now
+            self._counters['reloads'] += 1
+        self._notify({'type': 'inventory', 'action': 'reload', 'id': '', 'name': ''})
+        return True
+
+    def _refresh_container(self, cid):
+        '''Re-read a single container after an event touched it.'''
+        listing = docker_api.list_containers(all=True, filters={'id': [cid]})
+        if listing is None:
+            return None
+        now = time.time()
+        with self._lock:
+            match = next((c for c in listing if c['id'] == cid or c['id'].startswith(cid)), None)
+            if match:
+                self._remember(match, now)
+                return match
+            return self._forget(cid)
+
+    def _ensure_fresh(self):
+        now = time.time()
+        with self._lock:
+            if self._loaded:
+                if self._following and now - self._synced_at < _RESYNC_INTERVAL:
+                    self._counters['hits'] += 1
+                    return
+                if not self._following and now - self._synced_at < _UNWATCHED_TTL:
+                    self._counters['stale_hits'] += 1
+                    return
+            self._counters['misses'] += 1
+        self.reload()
+
+    # ============ Event stream ============
+
+    def start_watching(self):
+        '''Follow `docker events` in a background thread (idempotent).'''
+        if self._thread and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._watch, name='orchix-inventory', daemon=True)
+            self._thread.start()
+
+    def _watch(self):
+        delay = _RECONNECT_MIN
+        while True:
+            stream = docker_api.stream_events(_EVENT_FILTERS)
+            if stream is not None:
+                self._stream = stream
+                # Subscribe first, then resync, so nothing between the two is lost
+                if self.reload():
+                    with self._lock:
+                        self._following = True
+                    delay = _RECONNECT_MIN
+                try:
+                    for event in stream:
+                        self._handle_event(event)
+                except Exception:
+                    pass
+                finally:
+                    stream.close()
+                    self._stream = None
+            with self._lock:
+                self._following = False
+            time.sleep(delay)
+            delay = min(delay * 2, _RECONNECT_MAX)
+
+    def _handle_event(self, event):
+        etype = event.get('Type', '')
+        action = (event.get('Action') or event.get('status') or '').split(':')[0]
+        actor = event.get('Actor') or {}
+        attrs = actor.get('Attributes') or {}
+        cid = actor.get('ID') or event.get('id', '')
+
+        with self._lock:
+            self._counters['events'] += 1
+            self._last_event_at = time.time()
+
+        name = attrs.get('name', '')
+        if etype == 'container':
+            if action == 'destroy':
+                with self._lock:
+                    self._forget(cid)
+            elif action in _CONTAINER_REFRESH_ACTIONS:
+                self._refresh_container(cid)
+            else:
+                return
+        elif etype == 'network' and action in ('connect', 'disconnect'):
+            cid = attrs.get('container', '')
+            if not cid:
+                return
+            container = self._refresh_container(cid)
+            name = container['name'] if container else ''
+        elif etype == 'volume' and action in ('create', 'destroy', 'remove'):
+            with self._lock:
+                if action == 'create':
+                    self._volumes.add(cid)
+                else:
+                    self._volumes.discard(cid)
+            name = cid
+        else:
+            return
+
+        self._notify({'type': etype, 'action': action, 'id': cid, 'name': name})
+
+    # ============ Listeners ============
+
+    def add_listener(self, callback):
+        '''Call callback(event) after every applied change.
+        event: {'type', 'action', 'id', 'name'}; type 'inventory' marks a full reload.
+        '''
+        with self._lock:
+            self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        with self._lock:
+            if callback in self._listeners:
+                self._listeners.remove(callback)
+
+    def _notify(self, event):
+        with self._lock:
+            listeners = list(self._listeners)
+        for callback in listeners:
+            try:
+                callback(event)
+            except Exception:
+                pass
+
+    # ============ Queries ============
+
+    def _render(self, cid, now):
+        container = dict(self._containers[cid])
+        tpl = self._status_tpl.get(cid)
+        if tpl:
+            container['status'] = tpl[0].format(human_duration(now - tpl[1]))
+        return container
+
+    def containers(self):
+        '''All containers, newest first (same order as `docker ps -a`).'''
+        self._ensure_fresh()
+        now = time.time()
+        with self._lock:
+            return [self._render(cid, now) for cid in self._containers]
+
+    def names(self):
+        self._ensure_fresh()
+        with self._lock:
+            return [c['name'] for c in self._containers.values()]
+
+    def get(self, name):
+        '''Container dict by name, or None.'''
+        self._ensure_fresh()
+        with self._lock:
+            cid = self._names.get(name)
+            return self._render(cid, time.time()) if cid else None
+
+    def status(self, name):
+        '''Container state (running, exited, ...) or 'unknown'.'''
+        self._ensure_fresh()
+        with self._lock:
+            cid = self._names.get(name)
+            return self._containers[cid]['state'] if cid else 'unknown'
+
+    def statuses(self):
+        '''{name: state} for every container, from a single snapshot.'''
+        self._ensure_fresh()
+        with self._lock:
+            return {c['name']: c['state'] for c in self._containers.values()}
+
+    def exists(self, name):
+        self._ensure_fresh()
+        with self._lock:
+            return name in self._names
+
+    def volumes(self):
+        self._ensure_fresh()
+        with self._lock:
+            return sorted(self._volumes)
+
+    def invalidate(self):
+        '''Force the next query to resync from the daemon (also while following,
+        so a read right after our own action doesn't race its event).
+        '''
+        with self._lock:
+            self._synced_at = 0
+
+    def get_stats(self):
+        '''Cache counters plus staleness information.'''
+        now = time.time()
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'loaded': self._loaded,
+                'following': self._following,
+                'containers': len(self._containers),
+                'age': round(now - self._synced_at, 1) if self._synced_at else None,
+                'last_event_age': round(now - self._last_event_at, 1) if self._last_event_at else None,
+            })
+        return stats
+
+
+# Global instance
+_inventory = None
+_inventory_lock = threading.Lock()
+
+
+def get_inventory():
+    '''Get global container inventory instance'''
+    global _inventory
+    if _inventory is None:
+        with _inventory_lock:
+            if _inventory is None:
+                _inventory = ContainerInventory()
+    return _inventory
@@ -1,6 +1,5 @@
-import json
-import subprocess
 from utils.docker_utils import ORCHIX_NETWORK
+from utils import docker_api
 
 # Maps db_type → (image keywords, exposed ports)
 # Both methods are used: image name is fast and reliable,
@@ -24,24 +23,19 @@ _CREDENTIAL_ENV_MAP = {
 
 def _get_container_info(container_name):
     """Return (image_lower, exposed_ports_set) for a container."""
-    result = subprocess.run(
-        ['docker', 'inspect', container_name,
-         '--format', '{{.Config.Image}}\t{{json .Config.ExposedPorts}}'],
-        capture_output=True, text=True
-    )
-    if result.returncode != 0:
+    data = docker_api.inspect_container(container_name)
+    if not data:
         return '', set()
 
-    parts = result.stdout.strip().split('\t', 1)
-    image = parts[0].lower() if parts else ''
+    config = data.get('Config') or {}
+    image = (config.get('Image') or '').lower()
 
     ports = set()
-    if len(parts) > 1:
-        try:
-            exposed = json.loads(parts[1]) or {}
-            ports = {int(p.split('/')[0]) for p in (exposed.keys() if exposed else [])}
-        except Exception:
-            pass
+    try:
+        exposed = config.get('ExposedPorts') or {}
+        ports = {int(p.split('/')[0]) for p in exposed.keys()}
+    except Exception:
+        pass
 
     return image, ports
 
@@ -70,17 +64,13 @@ def discover_db_containers(db_types=None):
         type_defs = _DB_TYPES
 
     try:
-        net_result = subprocess.run(
-            ['docker', 'network', 'inspect', ORCHIX_NETWORK,
-             '--format', '{{range $k, $v := .Containers}}{{$v.Name}}\n{{end}}'],
-            capture_output=True, text=True
-        )
-        if net_result.returncode != 0:
+        network = docker_api.inspect_network(ORCHIX_NETWORK)
+        if not network:
             return []
 
         candidates = []
-        for name in net_result.stdout.strip().splitlines():
-            name = name.strip()
+        for member in (network.get('Containers') or {}).values():
+            name = (member.get('Name') or '').strip()
             if not name:
                 continue
 
@@ -100,9 +90,9 @@ def get_db_credentials(container_name):
     Read user/password/database credentials from a DB container's compose file.
     Returns dict with keys 'user', 'password', 'database' (whichever are available).
     """
-    from pathlib import Path
+    from utils.orchix_instances import get_instance_registry
 
-    compose_file = Path(f'docker-compose-{container_name}.yml')
+    compose_file = get_instance_registry().compose_path(container_name)
     if not compose_file.exists():
         return {}
 
@@ -120,11 +110,8 @@ def get_db_credentials(container_name):
             env_vars[key.strip()] = val.strip()
 
     # Get image to select the right credential map
-    img_result = subprocess.run(
-        ['docker', 'inspect', container_name, '--format', '{{.Config.Image}}'],
-        capture_output=True, text=True
-    )
-    image = img_result.stdout.strip().lower() if img_result.returncode == 0 else ''
+    data = docker_api.inspect_container(container_name) or {}
+    image = ((data.get('Config') or {}).get('Image') or '').lower()
 
     for img_kw, mapping in _CREDENTIAL_ENV_MAP.items():
         if img_kw in image or any(k in env_vars for k in mapping.values()):
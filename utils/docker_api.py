@@ -0,0 +1,733 @@
+# ORCHIX v1.4 - Docker Engine API access layer
+'''Talks HTTP to the Docker daemon over its unix socket instead of forking the
+docker CLI for every read. Each public helper falls back to the CLI when the
+socket is not usable (Windows named pipes, remote DOCKER_HOST, permissions).
+'''
+import http.client
+import json
+import os
+import queue
+import socket
+import subprocess
+import threading
+import time
+from datetime import datetime
+from urllib.parse import quote, urlencode
+
+from utils.docker_metrics import api_command, record_call
+from utils.docker_utils import BACKGROUND, INTERACTIVE, DockerUnavailable, get_executor, safe_docker_run
+
+DOCKER_SOCKET = '/var/run/docker.sock'
+
+_POOL_SIZE = 4
+_DEFAULT_TIMEOUT = 10
+_RETRY_UNAVAILABLE = 30  # seconds before probing a dead socket again
+
+
+class DockerAPIError(Exception):
+    '''Raised for failed Engine API calls.
+    status is the HTTP status, or None when the socket itself failed.
+    '''
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    '''HTTPConnection that connects to a unix socket instead of TCP.'''
+
+    def __init__(self, socket_path, timeout=_DEFAULT_TIMEOUT):
+        super().__init__('localhost', timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        self.sock = sock
+
+
+class DockerStream:
+    '''Iterator over a newline-delimited JSON stream (events, stats).
+    Owns its own connection; close() may be called from another thread.
+    '''
+
+    def __init__(self, conn, response):
+        self._conn = conn
+        self._response = response
+
+    def __iter__(self):
+        try:
+            while True:
+                line = self._response.readline()
+                if not line:
+                    return
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        except (OSError, ValueError, AttributeError, http.client.HTTPException):
+            # AttributeError: http.client internals after close() from another thread
+            return
+        finally:
+            self.close()
+
+    def close(self):
+        try:
+            if self._conn.sock:
+                self._conn.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self._conn.close()
+
+
+class DockerAPIClient:
+    '''Minimal Docker Engine API client with a pool of keep-alive connections.'''
+
+    def __init__(self, socket_path=DOCKER_SOCKET, pool_size=_POOL_SIZE, timeout=_DEFAULT_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._pool = queue.LifoQueue(maxsize=pool_size)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait(), True
+        except queue.Empty:
+            return _UnixHTTPConnection(self.socket_path, self.timeout), False
+
+    def _release(self, conn):
+        try:
+            self._pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def _timed(self, method, path, func):
+        '''Run func() and record it in the docker call statistics.'''
+        started = time.monotonic()
+        try:
+            result = func()
+        except DockerAPIError as e:
+            record_call(api_command(method, path), time.monotonic() - started,
+                        failed=True, timed_out=isinstance(e.__cause__, socket.timeout))
+            raise
+        record_call(api_command(method, path), time.monotonic() - started)
+        return result
+
+    def request(self, method, path, params=None, body=None, timeout=None):
+        '''Send a request and return the decoded JSON body (or raw text).'''
+        return self._timed(method, path, lambda: self._request(method, path, params, body, timeout))
+
+    def _request(self, method, path, params, body, timeout):
+        url = path
+        if params:
+            url += '?' + urlencode(params)
+        payload = json.dumps(body).encode('utf-8') if body is not None else None
+        headers = {'Content-Type': 'application/json'} if payload is not None else {}
+
+        # A pooled connection may have been closed by the daemon while idle;
+        # retry once on a fresh connection before giving up.
+        for attempt in range(2):
+            conn, reused = self._acquire()
+            conn.timeout = timeout or self.timeout
+            if conn.sock:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, url, body=payload, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if reused and attempt == 0 and not isinstance(e, socket.timeout):
+                    continue
+                raise DockerAPIError(f'Docker socket error: {e}') from e
+
+            if response.will_close:
+                conn.close()
+            else:
+                self._release(conn)
+            break
+
+        content_type = response.getheader('Content-Type', '')
+        if response.status >= 400:
+            message = data.decode('utf-8', errors='ignore').strip()
+            if 'json' in content_type:
+                try:
+                    message = json.loads(data).get('message', message)
+                except (ValueError, AttributeError):
+                    pass
+            raise DockerAPIError(message or f'HTTP {response.status}', response.status)
+
+        if not data:
+            return None
+        if 'json' in content_type:
+            return json.loads(data)
+        return data.decode('utf-8', errors='ignore')
+
+    def get(self, path, params=None, timeout=None):
+        return self.request('GET', path, params=params, timeout=timeout)
+
+    def post(self, path, params=None, body=None, timeout=None):
+        return self.request('POST', path, params=params, body=body, timeout=timeout)
+
+    def stream(self, path, params=None):
+        '''Open a long-lived GET stream on a dedicated connection.'''
+        return self._timed('GET', path, lambda: self._open_stream(path, params))
+
+    def _open_stream(self, path, params):
+        url = path
+        if params:
+            url += '?' + urlencode(params)
+        conn = _UnixHTTPConnection(self.socket_path, timeout=None)
+        try:
+            conn.request('GET', url)
+            response = conn.getresponse()
+        except (OSError, http.client.HTTPException) as e:
+            conn.close()
+            raise DockerAPIError(f'Docker socket error: {e}') from e
+        if response.status >= 400:
+            message = response.read().decode('utf-8', errors='ignore').strip()
+            conn.close()
+            raise DockerAPIError(message or f'HTTP {response.status}', response.status)
+        return DockerStream(conn, response)
+
+    def ping(self):
+        try:
+            return self.get('/_ping', timeout=3) == 'OK'
+        except DockerAPIError:
+            return False
+
+
+# ============ Shared client ============
+
+_client = None
+_client_checked = 0
+_client_lock = threading.Lock()
+
+
+def _socket_path():
+    '''Resolve the daemon socket, honouring DOCKER_HOST=unix://...'''
+    host = os.environ.get('DOCKER_HOST', '')
+    if host.startswith('unix://'):
+        return host[len('unix://'):]
+    if host:
+        return None  # tcp:// or ssh:// hosts are left to the CLI
+    return DOCKER_SOCKET
+
+
+def get_client():
+    '''Return the shared API client, or None when the socket is not usable.'''
+    global _client, _client_checked
+    if _client is not None:
+        return _client
+
+    # Callers arriving during a probe wait for its result
+    with _client_lock:
+        if _client is not None:
+            return _client
+        now = time.time()
+        if now - _client_checked < _RETRY_UNAVAILABLE:
+            return None
+        _client_checked = now
+        path = _socket_path()
+        if not path or not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+            return None
+        client = DockerAPIClient(path)
+        if client.ping():
+            _client = client
+        return _client
+
+
+def _invalidate_client():
+    '''Drop the shared client after a socket failure so the CLI takes over.'''
+    global _client, _client_checked
+    _client = None
+    _client_checked = time.time()
+
+
+def _api(method, path, params=None, body=None, timeout=None):
+    '''Call the API. Returns (ok, result); ok is None when the socket is unavailable.'''
+    client = get_client()
+    if client is None:
+        return None, None
+    try:
+        return True, get_executor().call(
+            lambda: client.request(method, path, params=params, body=body, timeout=timeout),
+            priority=BACKGROUND if method == 'GET' else INTERACTIVE,
+        )
+    except DockerUnavailable:
+        record_call(api_command(method, path), 0, rejected=True)
+        # The CLI fallback fails fast the same way
+        return None, None
+    except DockerAPIError as e:
+        if e.status is None:
+            _invalidate_client()
+            return None, None
+        return False, e
+
+
+def _run_cli(command, timeout=_DEFAULT_TIMEOUT):
+    '''Run a docker CLI command; returns CompletedProcess or None.'''
+    try:
+        return safe_docker_run(
+            command, capture_output=True, text=True,
+            encoding='utf-8', errors='ignore', timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        return None
+
+
+# ============ Formatting ============
+
+def human_size(size):
+    '''Decimal size string the way the docker CLI prints it (e.g. "523.5MB").'''
+    units = ['B', 'kB', 'MB', 'GB', 'TB', 'PB']
+    size = float(size or 0)
+    i = 0
+    while size >= 1000 and i < len(units) - 1:
+        size /= 1000
+        i += 1
+    return f"{size:.4g}{units[i]}"
+
+
+def bytes_size(size):
+    '''Binary size string the way the docker CLI prints it (e.g. "12.5MiB").'''
+    units = ['B', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB']
+    size = float(size or 0)
+    i = 0
+    while size >= 1024 and i < len(units) - 1:
+        size /= 1024
+        i += 1
+    return f"{size:.4g}{units[i]}"
+
+
+# ============ Containers ============
+
+def _state_from_status(status):
+    '''Derive a container state from a docker ps status string.'''
+    low = status.lower()
+    if low.startswith('up'):
+        return 'paused' if '(paused)' in low else 'running'
+    for state in ('exited', 'created', 'restarting', 'removing', 'dead'):
+        if low.startswith(state):
+            return state
+    return 'unknown'
+
+
+def _parse_port_string(raw):
+    '''Parse "0.0.0.0:8080->80/tcp, 443/tcp" into port dicts.'''
+    ports = []
+    for seg in raw.split(','):
+        seg = seg.strip()
+        if not seg:
+            continue
+        public, ip = None, ''
+        if '->' in seg:
+            host_part, seg = seg.split('->', 1)
+            ip, _, public = host_part.rpartition(':')
+        private, _, proto = seg.partition('/')
+        try:
+            ports.append({
+                'ip': ip,
+                'private': int(private),
+                'public': int(public) if public else None,
+                'type': proto or 'tcp',
+            })
+        except ValueError:
+            continue  # port ranges are not expanded
+    return ports
+
+
+def _parse_label_string(raw):
+    labels = {}
+    for pair in raw.split(','):
+        if '=' in pair:
+            k, v = pair.split('=', 1)
+            labels[k.strip()] = v.strip()
+    return labels
+
+
+def _normalize_api_container(c):
+    names = c.get('Names') or ['']
+    networks = ((c.get('NetworkSettings') or {}).get('Networks') or {})
+    return {
+        'id': c.get('Id', ''),
+        'name': names[0].lstrip('/'),
+        'image': c.get('Image', ''),
+        'image_id': c.get('ImageID', ''),
+        'state': c.get('State', '') or _state_from_status(c.get('Status', '')),
+        'status': c.get('Status', ''),
+        'ports': [
+            {
+                'ip': p.get('IP', ''),
+                'private': p.get('PrivatePort'),
+                'public': p.get('PublicPort'),
+                'type': p.get('Type', 'tcp'),
+            }
+            for p in (c.get('Ports') or [])
+        ],
+        'labels': c.get('Labels') or {},
+        'networks': list(networks.keys()),
+        'size': human_size(c['SizeRootFs']) if c.get('SizeRootFs') is not None else '',
+        'created': c.get('Created', 0),
+    }
+
+
+def _parse_created_at(raw):
+    '''Parse "2024-05-01 12:34:56 +0200 CEST" into an epoch timestamp.'''
+    try:
+        return datetime.strptime(' '.join(raw.split()[:3]), '%Y-%m-%d %H:%M:%S %z').timestamp()
+    except (ValueError, AttributeError):
+        return 0
+
+
+def _normalize_cli_container(c):
+    status = c.get('Status', '')
+    size = c.get('Size', '')
+    if 'virtual' in size:
+        size = size.split('virtual', 1)[1].strip(' )')
+    return {
+        'id': c.get('ID', ''),
+        'name': c.get('Names', '').split(',')[0],
+        'image': c.get('Image', ''),
+        'image_id': '',
+        'state': c.get('State') or _state_from_status(status),
+        'status': status,
+        'ports': _parse_port_string(c.get('Ports', '')),
+        'labels': _parse_label_string(c.get('Labels', '')),
+        'networks': [n for n in c.get('Networks', '').split(',') if n],
+        'size': size,
+        'created': _parse_created_at(c.get('CreatedAt', '')),
+    }
+
+
+def list_containers(all=True, size=False, filters=None):
+    '''List containers as normalized dicts.
+    Keys: id, name, image, image_id, state, status, ports, labels, networks, size, created.
+    Returns None when Docker is unreachable.
+    '''
+    params = {'all': '1' if all else '0'}
+    if size:
+        params['size'] = '1'
+    if filters:
+        params['filters'] = json.dumps(filters)
+
+    ok, result = _api('GET', '/containers/json', params=params, timeout=30 if size else None)
+    if ok:
+        return [_normalize_api_container(c) for c in result or []]
+    if ok is False:
+        return None
+
+    cmd = ['docker', 'ps', '--no-trunc', '--format', '{{json .}}']
+    if all:
+        cmd.append('-a')
+    if size:
+        cmd.append('-s')
+    for key, values in (filters or {}).items():
+        for value in values:
+            cmd += ['--filter', f'{key}={value}']
+    result = _run_cli(cmd, timeout=30 if size else _DEFAULT_TIMEOUT)
+    if not result or result.returncode != 0:
+        return None
+    containers = []
+    for line in result.stdout.splitlines():
+        try:
+            containers.append(_normalize_cli_container(json.loads(line)))
+        except ValueError:
+            continue
+    return containers
+
+
+def inspect_container(name):
+    '''Return the full inspect document for a container, or None.'''
+    ok, result = _api('GET', f'/containers/{quote(name, safe="")}/json')
+    if ok:
+        return result
+    if ok is False:
+        return None
+
+    result = _run_cli(['docker', 'inspect', '--type', 'container', name])
+    if not result or result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)[0]
+    except (ValueError, IndexError):
+        return None
+
+
+def container_action(name, action, timeout=120):
+    '''Run start/stop/restart on a container. Returns (success, error_message).'''
+    if action not in ('start', 'stop', 'restart'):
+        raise ValueError(f"Unsupported container action: {action}")
+
+    from utils.container_inventory import get_inventory
+    try:
+        ok, result = _api('POST', f'/containers/{quote(name, safe="")}/{action}', timeout=timeout)
+    finally:
+        # Reads right after the action must not see the old state
+        get_inventory().invalidate()
+    if ok:
+        return True, ''
+    if ok is False:
+        if result.status == 304:  # already started / stopped
+            return True, ''
+        return False, str(result)
+
+    # safe_docker_run invalidates the inventory itself
+    result = _run_cli(['docker', action, name], timeout=timeout)
+    if result is None:
+        return False, 'Docker unavailable'
+    if result.returncode == 0:
+        return True, ''
+    return False, result.stderr.strip()
+
+
+# ============ Networks, images, volumes ============
+
+def inspect_network(name):
+    '''Return the inspect document for a network, or None.'''
+    ok, result = _api('GET', f'/networks/{quote(name, safe="")}')
+    if ok:
+        return result
+    if ok is False:
+        return None
+
+    result = _run_cli(['docker', 'network', 'inspect', name])
+    if not result or result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)[0]
+    except (ValueError, IndexError):
+        return None
+
+
+def create_network(name):
+    '''Create a bridge network. Returns True on success.'''
+    ok, _ = _api('POST', '/networks/create', body={'Name': name, 'CheckDuplicate': True})
+    if ok is not None:
+        return ok
+    result = _run_cli(['docker', 'network', 'create', name])
+    return bool(result and result.returncode == 0)
+
+
+def connect_network(network, container):
+    '''Attach a container to a network. Returns True on success.'''
+    ok, _ = _api('POST', f'/networks/{quote(network, safe="")}/connect',
+                 body={'Container': container})
+    if ok is not None:
+        return ok
+    result = _run_cli(['docker', 'network', 'connect', network, container])
+    return bool(result and result.returncode == 0)
+
+
+def server_version():
+    '''Return the daemon version string (e.g. "24.0.7"), or "".'''
+    ok, result = _api('GET', '/version')
+    if ok:
+        return (result or {}).get('Version', '')
+    if ok is False:
+        return ''
+    result = _run_cli(['docker', 'version', '--format', '{{.Server.Version}}'], timeout=5)
+    return result.stdout.strip() if result and result.returncode == 0 else ''
+
+
+def _list_ids(path, cli_cmd, key):
+    ok, result = _api('GET', path)
+    if ok:
+        return [item.get(key, '') for item in result or []]
+    if ok is False:
+        return []
+    result = _run_cli(cli_cmd, timeout=5)
+    if not result or result.returncode != 0:
+        return []
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def list_images():
+    '''Return image IDs (one per image, like `docker images -q`).'''
+    return _list_ids('/images/json', ['docker', 'images', '-q'], 'Id')
+
+
+def list_networks():
+    '''Return network IDs.'''
+    return _list_ids('/networks', ['docker', 'network', 'ls', '-q'], 'Id')
+
+
+def list_volumes():
+    '''Return volume names.'''
+    ok, result = _api('GET', '/volumes')
+    if ok:
+        return [v.get('Name', '') for v in (result or {}).get('Volumes') or []]
+    if ok is False:
+        return []
+    result = _run_cli(['docker', 'volume', 'ls', '--format', '{{.Name}}'], timeout=5)
+    if not result or result.returncode != 0:
+        return []
+    return [line.strip() for line in result.stdout.splitlines() if line.strip()]
+
+
+def inspect_image(image):
+    '''Return the inspect document for a local image, or None if it isn't there.'''
+    ok, result = _api('GET', f'/images/{quote(image, safe="/:@")}/json')
+    if ok:
+        return result
+    if ok is False:
+        return None
+
+    result = _run_cli(['docker', 'image', 'inspect', image])
+    if not result or result.returncode != 0:
+        return None
+    try:
+        return json.loads(result.stdout)[0]
+    except (ValueError, IndexError):
+        return None
+
+
+def registry_digest(image, timeout=15):
+    '''Manifest digest the registry currently serves for image ("sha256:..."),
+    or None when it can't be asked (offline, private registry, no socket).
+    Only contacts the registry for the manifest; nothing is downloaded.
+    '''
+    ok, result = _api('GET', f'/distribution/{quote(image, safe="/:@")}/json', timeout=timeout)
+    if ok:
+        return ((result or {}).get('Descriptor') or {}).get('digest')
+    return None
+
+
+# ============ Stats ============
+
+_SIZE_UNITS = {
+    'b': 1, 'kb': 1000, 'mb': 1000 ** 2, 'gb': 1000 ** 3, 'tb': 1000 ** 4, 'pb': 1000 ** 5,
+    'kib': 1024, 'mib': 1024 ** 2, 'gib': 1024 ** 3, 'tib': 1024 ** 4, 'pib': 1024 ** 5,
+}
+
+
+def parse_size(text):
+    '''Parse "12.5MiB" / "1.2kB" back to bytes. Returns 0 for unparsable input.'''
+    text = (text or '').strip()
+    i = len(text)
+    while i and text[i - 1].isalpha():
+        i -= 1
+    try:
+        return float(text[:i]) * _SIZE_UNITS.get(text[i:].lower(), 1)
+    except ValueError:
+        return 0
+
+
+def stats_values(stats):
+    '''Numbers from a raw stats document, or None before a CPU delta exists.
+    Keys: cpu_percent, mem_used, mem_limit, net_rx, net_tx.
+    '''
+    cpu = stats.get('cpu_stats') or {}
+    precpu = stats.get('precpu_stats') or {}
+    if not precpu.get('system_cpu_usage'):
+        return None  # first frame of a stream has no previous sample
+    cpu_delta = (cpu.get('cpu_usage', {}).get('total_usage', 0)
+                 - precpu.get('cpu_usage', {}).get('total_usage', 0))
+    system_delta = cpu.get('system_cpu_usage', 0) - precpu.get('system_cpu_usage', 0)
+    online = cpu.get('online_cpus') or len(cpu.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+    cpu_pct = (cpu_delta / system_delta) * online * 100 if system_delta > 0 and cpu_delta > 0 else 0.0
+
+    mem = stats.get('memory_stats') or {}
+    mem_detail = mem.get('stats') or {}
+    cache = mem_detail.get('inactive_file', mem_detail.get('total_inactive_file', 0))
+
+    rx = tx = 0
+    for net in (stats.get('networks') or {}).values():
+        rx += net.get('rx_bytes', 0)
+        tx += net.get('tx_bytes', 0)
+
+    return {
+        'cpu_percent': cpu_pct,
+        'mem_used': max(0, mem.get('usage', 0) - cache),
+        'mem_limit': mem.get('limit', 0),
+        'net_rx': rx,
+        'net_tx': tx,
+    }
+
+
+def cli_stats_values(row):
+    '''Numbers from one `docker stats --format "{{json .}}"` row.'''
+    mem_used, _, mem_limit = (row.get('MemUsage') or '').partition('/')
+    rx, _, tx = (row.get('NetIO') or '').partition('/')
+    try:
+        cpu_pct = float((row.get('CPUPerc') or '0').rstrip('%') or 0)
+    except ValueError:
+        cpu_pct = 0.0
+    return {
+        'cpu_percent': cpu_pct,
+        'mem_used': parse_size(mem_used),
+        'mem_limit': parse_size(mem_limit),
+        'net_rx': parse_size(rx),
+        'net_tx': parse_size(tx),
+    }
+
+
+def format_stats_values(values):
+    '''docker-stats style display strings for stats_values() output.'''
+    return {
+        'cpu': f"{values['cpu_percent']:.2f}%",
+        'memory': f"{bytes_size(values['mem_used'])} / {bytes_size(values['mem_limit'])}",
+        'net_io': f"{human_size(values['net_rx'])} / {human_size(values['net_tx'])}",
+    }
+
+
+# ============ Events ============
+
+class _CLIEventStream:
+    '''`docker events` process exposed with the same interface as DockerStream.'''
+
+    def __init__(self, proc):
+        self._proc = proc
+
+    def __iter__(self):
+        try:
+            for line in self._proc.stdout:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        finally:
+            self.close()
+
+    def close(self):
+        if self._proc.poll() is None:
+            self._proc.terminate()
+            try:
+                self._proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+
+
+def stream_events(filters=None):
+    '''Follow the daemon event stream. Returns an iterable of event dicts
+    with a close() method, or None when Docker is unreachable.
+    '''
+    client = get_client()
+    if client is not None:
+        params = {'filters': json.dumps(filters)} if filters else None
+        try:
+            return client.stream('/events', params=params)
+        except DockerAPIError as e:
+            if e.status is not None:
+                return None
+            _invalidate_client()
+
+    cmd = ['docker', 'events', '--format', '{{json .}}']
+    for key, values in (filters or {}).items():
+        for value in values:
+            cmd += ['--filter', f'{key}={value}']
+    try:
+        proc = subprocess.Popen(
+            cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            text=True, encoding='utf-8', errors='ignore'
+        )
+    except (FileNotFoundError, OSError):
+        return None
+    return _CLIEventStream(proc)
@@ -0,0 +1,173 @@
+# ORCHIX v1.4 - Docker call instrumentation
+'''Counts and times every docker call (CLI forks and Engine API requests) by
+subcommand and by the Flask endpoint or background task that issued it.
+Set ORCHIX_DOCKER_SLOW_MS to log calls slower than that many milliseconds.
+'''
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Durations kept per (command, source) for percentiles
+_SAMPLES = 1000
+# Distinct (command, source) pairs tracked; further sources are folded into 'other'
+_MAX_KEYS = 500
+
+_log = logging.getLogger('orchix.docker')
+_local = threading.local()
+_THREAD_SUFFIX_RE = re.compile(r'[-_ ]?\d+$')
+_API_RESOURCES = {'containers', 'networks', 'volumes', 'images', 'exec', 'plugins', 'distribution'}
+
+
+def _slow_threshold():
+    try:
+        return float(os.environ.get('ORCHIX_DOCKER_SLOW_MS', '')) / 1000
+    except ValueError:
+        return None
+
+
+@contextmanager
+def call_source(name):
+    '''Tag docker calls made inside the block (overrides the thread name).'''
+    previous = getattr(_local, 'source', None)
+    _local.source = name
+    try:
+        yield
+    finally:
+        _local.source = previous
+
+
+def current_source():
+    '''"endpoint:<flask endpoint>", the call_source() tag, or "task:<thread name>".'''
+    flask = sys.modules.get('flask')
+    if flask is not None and flask.has_request_context():
+        return f'endpoint:{flask.request.endpoint or flask.request.path}'
+    source = getattr(_local, 'source', None)
+    if source:
+        return source
+    name = threading.current_thread().name
+    if name == 'MainThread':
+        return 'cli'
+    return 'task:' + _THREAD_SUFFIX_RE.sub('', name)
+
+
+def api_command(method, path):
+    '''"api GET /containers/{id}/json" for an Engine API request path.'''
+    parts = path.split('?', 1)[0].strip('/').split('/')
+    out = []
+    for i, part in enumerate(parts):
+        if i and parts[i - 1] in _API_RESOURCES and part not in ('json', 'create', 'prune'):
+            out.append('{id}')
+        else:
+            out.append(part)
+    return f"api {method} /{'/'.join(out)}"
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+class DockerCallStats:
+    '''Aggregates per (command, source): counts, failures, timeouts and durations.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self.since = time.time()
+
+    def record(self, command, duration, failed=False, timed_out=False, rejected=False, source=None):
+        source = source or current_source()
+        threshold = _slow_threshold()
+        if threshold is not None and duration >= threshold:
+            _log.warning("Slow docker call: %s took %.0f ms (%s)", command, duration * 1000, source)
+
+        with self._lock:
+            key = (command, source)
+            entry = self._entries.get(key)
+            if entry is None:
+                if len(self._entries) >= _MAX_KEYS:
+                    key = (command, 'other')
+                    entry = self._entries.get(key)
+                if entry is None:
+                    entry = self._entries[key] = {
+                        'count': 0, 'failures': 0, 'timeouts': 0, 'rejected': 0,
+                        'total': 0.0, 'max': 0.0, 'durations': deque(maxlen=_SAMPLES),
+                    }
+            entry['count'] += 1
+            entry['failures'] += bool(failed or timed_out or rejected)
+            entry['timeouts'] += bool(timed_out)
+            entry['rejected'] += bool(rejected)
+            if not rejected:
+                entry['total'] += duration
+                entry['max'] = max(entry['max'], duration)
+                entry['durations'].append(duration)
+
+    @staticmethod
+    def _summary(entries):
+        durations = sorted(d for e in entries for d in e['durations'])
+        ms = lambda v: None if v is None else round(v * 1000, 1)
+        return {
+            'count': sum(e['count'] for e in entries),
+            'failures': sum(e['failures'] for e in entries),
+            'timeouts': sum(e['timeouts'] for e in entries),
+            'rejected': sum(e['rejected'] for e in entries),
+            'p50_ms': ms(_percentile(durations, 50)),
+            'p95_ms': ms(_percentile(durations, 95)),
+            'p99_ms': ms(_percentile(durations, 99)),
+            'max_ms': ms(max((e['max'] for e in entries), default=None)),
+            'total_ms': ms(sum(e['total'] for e in entries)),
+        }
+
+    def snapshot(self):
+        '''Per-command rollup and per (command, source) rows, most total time first.'''
+        with self._lock:
+            items = [(key, dict(e, durations=list(e['durations']))) for key, e in self._entries.items()]
+
+        by_command = {}
+        for (command, _), entry in items:
+            by_command.setdefault(command, []).append(entry)
+        commands = [dict(command=c, **self._summary(entries)) for c, entries in by_command.items()]
+        calls = [dict(command=c, source=s, **self._summary([e])) for (c, s), e in items]
+        commands.sort(key=lambda r: r['total_ms'] or 0, reverse=True)
+        calls.sort(key=lambda r: r['total_ms'] or 0, reverse=True)
+        threshold = _slow_threshold()
+        return {
+            'since': self.since,
+            'slow_log_ms': threshold * 1000 if threshold is not None else None,
+            'commands': commands,
+            'calls': calls,
+        }
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+            self.since = time.time()
+
+
+# Global instance
+_stats = None
+_stats_lock = threading.Lock()
+
+
+def get_docker_call_stats():
+    '''Get global docker call statistics instance'''
+    global _stats
+    if _stats is None:
+        with _stats_lock:
+            if _stats is None:
+                _stats = DockerCallStats()
+    return _stats
+
+
+def record_call(command, duration, failed=False, timed_out=False, rejected=False):
+    '''Record one docker call; never raises.'''
+    try:
+        get_docker_call_stats().record(command, duration, failed, timed_out, rejected)
+    except Exception:
+        pass
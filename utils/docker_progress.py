@@ -87,6 +87,8 @@ def run_docker_with_progress(
         )
         monitor.set_result(result)
 
+    from utils.docker_utils import invalidate_inventory
+    invalidate_inventory(command)
     return result
 
 
@@ -118,6 +120,9 @@ def run_docker_pull_with_progress(image: str, callback: Optional[Callable[[int,
     """
     Pull Docker image with real-time progress tracking.
 
+    Goes through the image pull coordinator: joins a pull of the same image
+    already in flight, and skips the download when the local image is current.
+
     Args:
         image: Docker image name (e.g. 'nginx:latest')
         callback: Optional callback function(progress: int, status: str) for progress updates
@@ -125,18 +130,11 @@ def run_docker_pull_with_progress(image: str, callback: Optional[Callable[[int,
     Returns:
         subprocess.CompletedProcess with pull result
     """
-    console.print(f"  │     Pulling image {image}...")
+    from utils.image_pull import get_pull_coordinator
 
-    process = subprocess.Popen(
-        ['docker', 'pull', image],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.STDOUT,
-        text=True,
-        bufsize=1
-    )
+    console.print(f"  │     Pulling image {image}...")
 
-    layers_total = 0
-    layers_done = 0
+    pull = get_pull_coordinator().start(image)
     last_progress = 0
 
     with Progress(
@@ -148,39 +146,22 @@ def run_docker_pull_with_progress(image: str, callback: Optional[Callable[[int,
     ) as progress:
         task = progress.add_task("Pulling layers...", total=100)
 
-        for line in iter(process.stdout.readline, ''):
-            if not line:
-                break
+        for pct, status in pull.follow():
+            if pct > last_progress:
+                last_progress = pct
+                progress.update(task, completed=pct, description=status)
 
-            # Count total layers
-            if 'Pulling fs layer' in line:
-                layers_total += 1
-            elif 'Pull complete' in line or 'Already exists' in line:
-                layers_done += 1
+                # Call callback if provided (for web UI streaming)
+                if callback:
+                    callback(pct, status)
 
-            # Calculate progress
-            if layers_total > 0:
-                pct = int((layers_done / layers_total) * 100)
-                if pct > last_progress:
-                    last_progress = pct
-                    progress.update(task, completed=pct)
-                    status = f"Pulled {layers_done}/{layers_total} layers"
-                    progress.update(task, description=status)
+        result = pull.result
+        if pull.skipped:
+            progress.update(task, completed=100, description="Image is up to date")
 
-                    # Call callback if provided (for web UI streaming)
-                    if callback:
-                        callback(pct, status)
-
-    process.wait()
-
-    if process.returncode == 0:
+    if result.returncode == 0:
         console.print(f"  │     {SYMBOL_SUCCESS} Image pulled successfully!", style="bold green")
     else:
         console.print(f"  │     {SYMBOL_FAILED} Image pull failed!", style="bold red")
 
-    return subprocess.CompletedProcess(
-        args=['docker', 'pull', image],
-        returncode=process.returncode,
-        stdout='',
-        stderr=''
-    )
+    return result
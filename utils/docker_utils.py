@@ -1,4 +1,8 @@
+import os
+import socket
 import subprocess
+import threading
+import time
 
 
 def get_docker_compose_command():
@@ -31,16 +35,255 @@ def get_docker_compose_command():
     return ['docker', 'compose']
 
 
+# ============ Docker call executor ============
+
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Docker calls (CLI forks and API requests) allowed to run at once
+MAX_CONCURRENT_CALLS = 4
+# How long a call may wait for a free slot before failing, per priority
+_QUEUE_TIMEOUT = {INTERACTIVE: 30, BACKGROUND: 10}
+# Consecutive timeouts that mark the daemon unresponsive, and for how long
+_BREAKER_THRESHOLD = 3
+_BREAKER_COOLDOWN = 15
+
+# Default timeouts when the caller passes none
+DEFAULT_TIMEOUT = 60
+LONG_TIMEOUT = 1800
+# Long-running, user-initiated commands: default to LONG_TIMEOUT and don't take
+# a slot (holding one for minutes would starve everything else)
+_LONG_COMMANDS = {
+    'pull', 'push', 'build', 'save', 'load', 'cp', 'commit', 'export', 'import', 'run',
+    'compose up', 'compose down', 'compose pull', 'compose build', 'compose run', 'image pull', 'image push',
+    'system prune', 'image prune', 'volume prune',
+}
+# Read-only commands used for polling: lower priority than actions
+_READ_COMMANDS = {
+    'ps', 'inspect', 'stats', 'info', 'version', 'images', 'logs', 'top', 'port',
+    'compose ps', 'compose ls', 'compose config', 'compose logs', 'compose version',
+    'volume ls', 'volume inspect', 'network ls', 'network inspect',
+    'image ls', 'image inspect', 'container ls', 'container inspect', 'system df',
+}
+# Commands that change container state: the inventory is invalidated after them
+_STATE_COMMANDS = {
+    'start', 'stop', 'restart', 'kill', 'rm', 'run', 'create', 'rename', 'pause', 'unpause', 'update',
+    'container start', 'container stop', 'container restart', 'container kill', 'container rm',
+    'container run', 'container create', 'container rename', 'container update',
+    'compose up', 'compose down', 'compose start', 'compose stop', 'compose restart',
+    'compose rm', 'compose create', 'compose kill', 'compose run',
+}
+_GROUP_COMMANDS = {'compose', 'volume', 'network', 'image', 'container', 'system', 'buildx'}
+# Global and compose options that take a value before the subcommand
+_VALUE_FLAGS = {
+    '-H', '--host', '-c', '--context', '--config', '-l', '--log-level',
+    '-f', '--file', '-p', '--project-name', '--project-directory', '--env-file', '--profile',
+}
+
+
+class DockerUnavailable(Exception):
+    """Docker call rejected: daemon unresponsive or too many calls queued."""
+
+
+def docker_subcommand(command):
+    """'ps', 'volume ls', 'compose up', ... for a docker CLI argv."""
+    if isinstance(command, str):
+        command = command.split()
+    if not command:
+        return 'docker'
+    words = ['compose'] if os.path.basename(command[0]).startswith('docker-compose') else []
+    args = command[1:]
+    i = 0
+    while i < len(args) and len(words) < 2:
+        arg = args[i]
+        if arg.startswith('-'):
+            if arg in _VALUE_FLAGS:
+                i += 1
+        else:
+            words.append(arg)
+            if words[0] not in _GROUP_COMMANDS:
+                break
+        i += 1
+    return ' '.join(words) or 'docker'
+
+
+def _is_timeout(exc):
+    """True for timeouts, including socket timeouts wrapped by another error."""
+    timeouts = (subprocess.TimeoutExpired, socket.timeout)
+    return isinstance(exc, timeouts) or isinstance(exc.__cause__, timeouts)
+
+
+class DockerExecutor:
+    """Gate for every docker call.
+    Caps concurrency, lets interactive calls go ahead of background polling and
+    fails fast while the daemon is unresponsive instead of piling up blocked threads.
+    """
+
+    def __init__(self, max_concurrent=MAX_CONCURRENT_CALLS,
+                 threshold=_BREAKER_THRESHOLD, cooldown=_BREAKER_COOLDOWN):
+        self.max_concurrent = max_concurrent
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._cond = threading.Condition()
+        self._active = 0
+        self._waiting = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._timeouts = 0          # consecutive timeouts
+        self._open_until = 0        # breaker open until (monotonic)
+        self.rejected = 0
+
+    def unavailable(self):
+        """True while the breaker is open."""
+        return time.monotonic() < self._open_until
+
+    def _acquire(self, priority):
+        deadline = time.monotonic() + _QUEUE_TIMEOUT[priority]
+        with self._cond:
+            self._waiting[priority] += 1
+            try:
+                while (self._active >= self.max_concurrent
+                       or (priority == BACKGROUND and self._waiting[INTERACTIVE])):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+                self._active += 1
+                return True
+            finally:
+                self._waiting[priority] -= 1
+                # Background callers may have been held back by this waiter
+                self._cond.notify_all()
+
+    def _release(self):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def _record(self, timed_out):
+        with self._cond:
+            if not timed_out:
+                self._timeouts = 0
+                self._open_until = 0
+                return
+            self._timeouts += 1
+            if self._timeouts >= self.threshold:
+                # Re-opens on the first timeout after the cooldown as well
+                self._open_until = time.monotonic() + self.cooldown
+
+    def call(self, func, priority=INTERACTIVE, limit=True, breaker=True):
+        """Run func() in a slot. Raises DockerUnavailable instead of queueing
+        while the daemon is unresponsive or no slot frees up in time.
+        limit=False skips the slot; breaker=False keeps func's timeouts from
+        counting against the daemon.
+        """
+        if self.unavailable():
+            with self._cond:
+                self.rejected += 1
+            raise DockerUnavailable('Docker is not responding, try again shortly')
+        if limit and not self._acquire(priority):
+            with self._cond:
+                self.rejected += 1
+            raise DockerUnavailable('Too many Docker operations in progress, try again shortly')
+        try:
+            result = func()
+        except Exception as e:
+            if breaker and _is_timeout(e):
+                self._record(True)
+            raise
+        else:
+            if breaker:
+                self._record(False)
+            return result
+        finally:
+            if limit:
+                self._release()
+
+    def get_stats(self):
+        with self._cond:
+            return {
+                'active': self._active,
+                'waiting_interactive': self._waiting[INTERACTIVE],
+                'waiting_background': self._waiting[BACKGROUND],
+                'consecutive_timeouts': self._timeouts,
+                'unavailable': self.unavailable(),
+                'rejected': self.rejected,
+            }
+
+
+# Global instance
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Get global docker executor instance"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = DockerExecutor()
+    return _executor
+
+
+def invalidate_inventory(command):
+    """Drop the cached container inventory after a state-changing docker command."""
+    if docker_subcommand(command) in _STATE_COMMANDS:
+        from utils.container_inventory import get_inventory
+        get_inventory().invalidate()
+
+
+def _failed_result(command, message, kwargs):
+    """CompletedProcess standing in for a call that was not (fully) run."""
+    text = kwargs.get('text') or kwargs.get('universal_newlines') or kwargs.get('encoding')
+    empty = '' if text else b''
+    return subprocess.CompletedProcess(command, 1, empty, message if text else message.encode())
+
+
 def safe_docker_run(command, **kwargs):
-    """Run a docker command safely - returns None if Docker is not installed."""
+    """Run a docker command safely - returns None if Docker is not installed.
+    Goes through the docker executor: read-only commands queue behind actions,
+    calls without a timeout get a default one, and while the daemon is
+    unresponsive a failed result (returncode 1, message in stderr) comes back
+    immediately. TimeoutExpired is only raised when the caller set the timeout.
+    """
+    subcommand = docker_subcommand(command)
+    long_running = subcommand in _LONG_COMMANDS
+    explicit_timeout = 'timeout' in kwargs
+    if not explicit_timeout:
+        kwargs['timeout'] = LONG_TIMEOUT if long_running else DEFAULT_TIMEOUT
+
+    from utils.docker_metrics import record_call
+    started = time.monotonic()
     try:
-        return subprocess.run(command, **kwargs)
+        result = get_executor().call(
+            lambda: subprocess.run(command, **kwargs),
+            priority=BACKGROUND if subcommand in _READ_COMMANDS else INTERACTIVE,
+            limit=not long_running,
+            breaker=not long_running,
+        )
     except FileNotFoundError:
+        record_call(subcommand, time.monotonic() - started, failed=True)
         return None
+    except DockerUnavailable as e:
+        record_call(subcommand, time.monotonic() - started, rejected=True)
+        return _failed_result(command, str(e), kwargs)
+    except subprocess.TimeoutExpired:
+        record_call(subcommand, time.monotonic() - started, timed_out=True)
+        # It may still have changed something before timing out
+        invalidate_inventory(command)
+        if explicit_timeout:
+            raise
+        return _failed_result(command, f'docker {subcommand} timed out after {kwargs["timeout"]}s', kwargs)
+    invalidate_inventory(command)
+    record_call(subcommand, time.monotonic() - started, failed=result.returncode != 0)
+    return result
 
 
 def check_docker_status():
     """Check Docker availability and return detailed status."""
+    from utils.docker_api import get_client
+    if get_client() is not None:
+        return {'installed': True, 'running': True, 'message': 'Docker is running'}
+
     try:
         result = subprocess.run(
             ['docker', 'info'],
@@ -63,39 +306,37 @@ def check_docker_status():
 
 
 ORCHIX_NETWORK = 'orchix'
+# Containers attached to the orchix network at once
+_NETWORK_CONNECT_WORKERS = 4
+
+_network_lock = threading.Lock()
 
 
 def ensure_orchix_network():
-    """Create the global orchix network and connect all running ORCHIX containers."""
+    """Create the global orchix network and connect running ORCHIX containers
+    that aren't attached yet. Membership comes from one network inspect; the
+    missing containers are connected in parallel.
+    """
     try:
-        from pathlib import Path
+        from concurrent.futures import ThreadPoolExecutor
+        from utils import docker_api
+        from utils.orchix_instances import get_instance_registry
 
-        # Create network if it doesn't exist
-        inspect = subprocess.run(
-            ['docker', 'network', 'inspect', ORCHIX_NETWORK],
-            capture_output=True
-        )
-        if inspect.returncode != 0:
-            subprocess.run(
-                ['docker', 'network', 'create', ORCHIX_NETWORK],
-                capture_output=True
-            )
-
-        # Connect all running ORCHIX containers (those with a compose file in CWD)
-        ps = subprocess.run(
-            ['docker', 'ps', '--format', '{{.Names}}'],
-            capture_output=True, text=True
-        )
-        if ps.returncode != 0:
-            return
-
-        for name in ps.stdout.strip().splitlines():
-            if not name:
-                continue
-            if Path(f'docker-compose-{name}.yml').exists():
-                subprocess.run(
-                    ['docker', 'network', 'connect', ORCHIX_NETWORK, name],
-                    capture_output=True
-                )
+        with _network_lock:
+            info = docker_api.inspect_network(ORCHIX_NETWORK)
+            if info is None:
+                # Create network if it doesn't exist
+                if not docker_api.create_network(ORCHIX_NETWORK):
+                    return
+                attached = set()
+            else:
+                attached = {c.get('Name') for c in (info.get('Containers') or {}).values()}
+
+            missing = [name for name in get_instance_registry().names(running_only=True)
+                       if name not in attached]
+            if missing:
+                workers = min(_NETWORK_CONNECT_WORKERS, len(missing))
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='orchix-network') as pool:
+                    list(pool.map(lambda name: docker_api.connect_network(ORCHIX_NETWORK, name), missing))
     except Exception:
         pass
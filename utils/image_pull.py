@@ -0,0 +1,257 @@
+# ORCHIX v1.4 - Image pull coordinator
+'''One `docker pull` per image reference at a time. Callers that ask for an
+image already being pulled (two installs sharing an image, install_stream
+followed by the installer) join that pull and all receive its progress.
+The pull is skipped when the local image already has the digest the
+registry serves, or when the same reference was pulled moments ago.
+`docker pull` goes through the docker executor (rejected while the daemon is
+unresponsive) and is killed once every caller following it has gone away
+(e.g. its install job was cancelled).
+'''
+import subprocess
+import threading
+import time
+from collections import deque
+
+# A successful pull or digest check counts as current for this long (seconds)
+FRESH_FOR = 120
+# Output lines kept for error messages
+_OUTPUT_LINES = 50
+
+
+def _completed(image, returncode, stdout='', stderr=''):
+    return subprocess.CompletedProcess(['docker', 'pull', image], returncode, stdout, stderr)
+
+
+class ImagePull:
+    '''One pull that any number of callers can follow.'''
+
+    def __init__(self, image):
+        self.image = image
+        self.progress = 0
+        self.status = 'Checking image...'
+        self.result = None      # CompletedProcess once finished
+        self.skipped = False    # True when no download was needed
+        self._cond = threading.Condition()
+        self._version = 0
+        self._followers = 0
+        self._process = None
+        self.cancelled = False
+
+    @property
+    def done(self):
+        return self.result is not None
+
+    def _update(self, progress, status):
+        with self._cond:
+            self.progress, self.status = progress, status
+            self._version += 1
+            self._cond.notify_all()
+
+    def _finish(self, result, skipped=False):
+        with self._cond:
+            self.result, self.skipped = result, skipped
+            self._version += 1
+            self._cond.notify_all()
+
+    def follow(self):
+        '''Yield (percent, status) as the pull advances; returns once it is done.
+        Updates that arrive faster than the caller reads are coalesced. Closing
+        the generator early stops following; the last follower to leave an
+        unfinished pull cancels it.
+        '''
+        with self._cond:
+            self._followers += 1
+        seen = 0
+        try:
+            while True:
+                with self._cond:
+                    while self._version == seen and self.result is None:
+                        self._cond.wait()
+                    seen = self._version
+                    progress, status, done = self.progress, self.status, self.result is not None
+                if done:
+                    return
+                yield progress, status
+        finally:
+            self._leave()
+
+    def _leave(self):
+        with self._cond:
+            self._followers -= 1
+            if self._followers or self.result is not None:
+                return
+            self.cancelled = True
+            process = self._process
+        if process is not None:
+            try:
+                process.kill()
+            except OSError:
+                pass
+
+    def _attach(self, process):
+        '''Register the running `docker pull`; False if the pull was cancelled.'''
+        with self._cond:
+            if self.cancelled:
+                return False
+            self._process = process
+            return True
+
+    def wait(self):
+        with self._cond:
+            while self.result is None:
+                self._cond.wait()
+        return self.result
+
+
+def _is_current(image):
+    '''True if the local image matches what the registry serves for image.'''
+    from utils import docker_api
+
+    local = docker_api.inspect_image(image)
+    if not local:
+        return False
+    if '@sha256:' in image:
+        return True  # pinned by digest: the content can't change
+    remote = docker_api.registry_digest(image)
+    if not remote:
+        return False
+    return any(d.split('@', 1)[-1] == remote for d in local.get('RepoDigests') or [])
+
+
+class PullCoordinator:
+    '''Deduplicates in-flight pulls by image reference.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = {}     # image -> ImagePull
+        self._fresh = {}        # image -> monotonic time it was last known current
+
+    def start(self, image, force=False):
+        '''Return the pull for image: the one in flight, or a new one.
+        force=True skips the freshness and digest checks (always downloads).
+        '''
+        from utils import docker_api
+
+        with self._lock:
+            pull = self._inflight.get(image)
+            if pull is not None and not pull.cancelled:
+                return pull
+            fresh = self._fresh.get(image)
+        # Recently pulled and still present (an uninstall may have removed it)
+        if not force and fresh and time.monotonic() - fresh < FRESH_FOR \
+                and docker_api.inspect_image(image):
+            pull = ImagePull(image)
+            pull._update(100, 'Image is up to date')
+            pull._finish(_completed(image, 0), skipped=True)
+            return pull
+
+        with self._lock:
+            pull = self._inflight.get(image)
+            if pull is not None and not pull.cancelled:
+                return pull
+            # A cancelled pull still winding down is replaced, not joined
+            pull = self._inflight[image] = ImagePull(image)
+        threading.Thread(target=self._run, args=(pull, force),
+                         name='orchix-image-pull', daemon=True).start()
+        return pull
+
+    def pull(self, image, callback=None, force=False):
+        '''Pull (or join the pull of) image; callback(percent, status) gets progress.
+        Returns a CompletedProcess like `docker pull`.
+        '''
+        pull = self.start(image, force)
+        for progress, status in pull.follow():
+            if callback:
+                callback(progress, status)
+        return pull.result
+
+    def _run(self, pull, force):
+        result, skipped = None, False
+        try:
+            if not force and _is_current(pull.image):
+                pull._update(100, 'Image is up to date')
+                result, skipped = _completed(pull.image, 0), True
+            else:
+                result = self._docker_pull(pull)
+        except Exception as e:
+            result = _completed(pull.image, 1, stderr=str(e))
+        finally:
+            with self._lock:
+                if self._inflight.get(pull.image) is pull:
+                    del self._inflight[pull.image]
+                if result is not None and result.returncode == 0:
+                    self._fresh[pull.image] = time.monotonic()
+            pull._finish(result or _completed(pull.image, 1), skipped)
+
+    def _docker_pull(self, pull):
+        from utils.docker_metrics import record_call
+        from utils.docker_utils import get_executor, DockerUnavailable
+
+        pull._update(0, 'Pulling image...')
+        started = time.monotonic()
+        try:
+            # Fails fast while the daemon is unresponsive. Like other long
+            # commands it takes no slot (the dedup above bounds concurrent
+            # pulls), and its duration doesn't count against the daemon
+            return get_executor().call(lambda: self._run_pull(pull, started),
+                                       limit=False, breaker=False)
+        except DockerUnavailable as e:
+            record_call('pull', time.monotonic() - started, rejected=True)
+            return _completed(pull.image, 1, stderr=str(e))
+
+    def _run_pull(self, pull, started):
+        from utils.docker_metrics import record_call
+
+        if pull.cancelled:
+            return _completed(pull.image, 1, stderr='Pull cancelled')
+        process = subprocess.Popen(
+            ['docker', 'pull', pull.image],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            encoding='utf-8',
+            errors='ignore',
+            bufsize=1
+        )
+        if not pull._attach(process):
+            process.kill()
+
+        output = deque(maxlen=_OUTPUT_LINES)
+        layers_total = 0
+        layers_done = 0
+        for line in iter(process.stdout.readline, ''):
+            output.append(line)
+            if 'Pulling fs layer' in line:
+                layers_total += 1
+            elif 'Pull complete' in line or 'Already exists' in line:
+                layers_done += 1
+
+            if layers_total > 0:
+                pct = int((layers_done / layers_total) * 100)
+                if pct > pull.progress:
+                    pull._update(pct, f"Pulling image... ({layers_done}/{layers_total} layers)")
+
+        process.wait()
+        record_call('pull', time.monotonic() - started, failed=process.returncode != 0)
+        if pull.cancelled:
+            return _completed(pull.image, 1, stderr='Pull cancelled')
+        text = ''.join(output)
+        if process.returncode != 0:
+            return _completed(pull.image, process.returncode, stderr=text)
+        return _completed(pull.image, 0, stdout=text)
+
+
+# Global instance
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_pull_coordinator():
+    '''Get global image pull coordinator instance'''
+    global _coordinator
+    if _coordinator is None:
+        with _coordinator_lock:
+            if _coordinator is None:
+                _coordinator = PullCoordinator()
+    return _coordinator
@@ -0,0 +1,320 @@
+# ORCHIX v1.4 - Metrics history
+'''Fixed-memory time series for host and container metrics.
+Every series keeps one numeric ring buffer per resolution; samples are
+averaged into the current bucket of each ring, so coarser resolutions
+roll up automatically. Series are persisted as preallocated mmap'd files
+so history survives restarts.
+'''
+import atexit
+import mmap
+import os
+import struct
+import threading
+import time
+from array import array
+
+# (name, step seconds, slots)
+RESOLUTIONS = (
+    ('3s', 3, 1200),       # 1 hour
+    ('1m', 60, 1440),      # 24 hours
+    ('15m', 900, 2880),    # 30 days
+)
+
+# Oldest series are evicted beyond this (containers that went away)
+MAX_SERIES = 1000
+# File descriptors left for everything else (sockets, stats streams, logs)
+# when the mapped series are capped by RLIMIT_NOFILE
+_FD_RESERVE = 256
+
+RANGES = {
+    '15m': 900, '1h': 3600, '6h': 6 * 3600, '12h': 12 * 3600,
+    '24h': 86400, '7d': 7 * 86400, '30d': 30 * 86400,
+}
+
+
+def parse_range(value, default=3600):
+    '''"1h" / "7d" / "900" -> seconds.'''
+    if not value:
+        return default
+    if value in RANGES:
+        return RANGES[value]
+    try:
+        return max(1, int(value))
+    except ValueError:
+        return default
+
+
+class Ring:
+    '''Numeric ring buffer at one resolution.
+    times holds the bucket start (uint32 epoch) of each slot, values the
+    running average of the samples that fell into it (float32).
+    '''
+
+    def __init__(self, step, slots, times=None, values=None):
+        self.step = step
+        self.slots = slots
+        self.times = times if times is not None else array('I', bytes(4 * slots))
+        self.values = values if values is not None else array('f', bytes(4 * slots))
+        self._bucket = 0
+        self._sum = 0.0
+        self._count = 0
+
+    def add(self, ts, value):
+        bucket = int(ts) // self.step * self.step
+        i = (bucket // self.step) % self.slots
+        if bucket != self._bucket:
+            self._bucket = bucket
+            if self.times[i] == bucket:
+                # Bucket already partly filled (e.g. before a restart): keep averaging
+                self._sum, self._count = float(self.values[i]), 1
+            else:
+                self._sum, self._count = 0.0, 0
+        self._sum += value
+        self._count += 1
+        self.times[i] = bucket
+        self.values[i] = self._sum / self._count
+
+    def query(self, start, end):
+        '''[(bucket_start, value), ...] for buckets in [start, end], oldest first.'''
+        first = int(start) // self.step * self.step
+        last = int(end) // self.step * self.step
+        first = max(first, last - (self.slots - 1) * self.step)
+        count = (last - first) // self.step + 1
+        start_i = (first // self.step) % self.slots
+
+        # At most two contiguous slices (the range may wrap around the ring);
+        # slicing a memoryview-backed ring does not copy
+        segments = [(start_i, min(self.slots, start_i + count))]
+        if start_i + count > self.slots:
+            segments.append((0, start_i + count - self.slots))
+
+        points = []
+        bucket = first
+        for a, b in segments:
+            for t, v in zip(self.times[a:b], self.values[a:b]):
+                if t == bucket:
+                    points.append((bucket, round(float(v), 3)))
+                bucket += self.step
+        return points
+
+    @property
+    def span(self):
+        return self.step * self.slots
+
+
+class Series:
+    '''One metric at every resolution.'''
+
+    def __init__(self, rings=None):
+        self.rings = rings or [Ring(step, slots) for _, step, slots in RESOLUTIONS]
+        self.updated = 0
+
+    def add(self, ts, value):
+        for ring in self.rings:
+            ring.add(ts, value)
+        self.updated = ts
+
+    def query(self, seconds, now=None):
+        '''Points from the finest resolution that covers the requested range.'''
+        now = now or time.time()
+        ring = next((r for r in self.rings if r.span >= seconds), self.rings[-1])
+        return ring.step, ring.query(now - seconds, now)
+
+
+def _fd_limited(max_series):
+    '''max_series, lowered so the mapped series (one descriptor each) leave
+    _FD_RESERVE descriptors free. Raises the soft RLIMIT_NOFILE towards the
+    hard limit first when that is allowed.
+    '''
+    try:
+        import resource
+    except ImportError:
+        return max_series  # Windows: no per-process descriptor limit to check
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        wanted = max_series + _FD_RESERVE
+        if soft != resource.RLIM_INFINITY and soft < wanted:
+            raised = wanted if hard == resource.RLIM_INFINITY else min(wanted, hard)
+            if raised > soft:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (raised, hard))
+                soft = raised
+    except (ValueError, OSError):
+        return max_series
+    if soft == resource.RLIM_INFINITY:
+        return max_series
+    return max(1, min(max_series, soft - _FD_RESERVE))
+
+
+class MetricsHistory:
+    '''Named series store; safe for one writer and many readers.'''
+
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def record(self, values, ts=None):
+        '''Add one sample per series: {series_name: number}. None values are skipped.'''
+        ts = ts or time.time()
+        with self._lock:
+            for name, value in values.items():
+                if value is None:
+                    continue
+                series = self._series.get(name)
+                if series is None:
+                    if len(self._series) >= self.max_series:
+                        self._evict()
+                    series = self._series[name] = self._new_series(name)
+                series.add(ts, float(value))
+
+    def query(self, name, seconds):
+        '''{'step': seconds, 'points': [[t, v], ...]} or None for unknown series.'''
+        with self._lock:
+            series = self._series.get(name)
+            if series is None:
+                return None
+            step, points = series.query(seconds)
+        return {'step': step, 'points': [list(p) for p in points]}
+
+    def series_names(self):
+        with self._lock:
+            return sorted(self._series)
+
+    def _new_series(self, name):
+        return Series()
+
+    def _evict(self):
+        oldest = min(self._series, key=lambda n: self._series[n].updated)
+        del self._series[oldest]
+
+    def close(self):
+        pass
+
+
+# ============ On-disk store ============
+
+_MAGIC = b'OXMS'
+_VERSION = 1
+# magic, version, resolution count, then (step, slots) per resolution
+_HEADER = struct.Struct('<4sHH' + 'II' * len(RESOLUTIONS))
+_HEADER_SIZE = 64
+_FILE_SUFFIX = '.ring'
+
+
+def _series_file_size():
+    return _HEADER_SIZE + sum(8 * slots for _, _, slots in RESOLUTIONS)
+
+
+class MmapMetricsHistory(MetricsHistory):
+    '''MetricsHistory whose rings live in one preallocated mmap'd file per series.
+    Layout: 64-byte header, then per resolution a uint32 bucket-time column and a
+    float32 value column. Rings write in place; reads index the mapped pages
+    directly. Disk use is bounded by max_series * file size.
+    '''
+
+    def __init__(self, directory, max_series=MAX_SERIES):
+        # Each mapped series keeps one descriptor open
+        super().__init__(_fd_limited(max_series))
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._maps = {}   # series name -> (mmap, view, rings)
+        self._load_existing()
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + _FILE_SUFFIX)
+
+    def _open(self, name, create):
+        path = self._path(name)
+        size = _series_file_size()
+        header = _HEADER.pack(_MAGIC, _VERSION, len(RESOLUTIONS),
+                              *[v for _, step, slots in RESOLUTIONS for v in (step, slots)])
+        if create or not os.path.exists(path) or os.path.getsize(path) != size:
+            with open(path, 'wb') as f:
+                f.write(header.ljust(_HEADER_SIZE, b'\0'))
+                f.truncate(size)
+
+        # mmap keeps its own duplicate of the descriptor; close ours
+        with open(path, 'r+b') as f:
+            mm = mmap.mmap(f.fileno(), size)
+        if mm[:_HEADER.size] != header:
+            # Written with different resolutions: start over
+            mm.close()
+            return self._open(name, create=True)
+
+        view = memoryview(mm)
+        rings = []
+        offset = _HEADER_SIZE
+        for _, step, slots in RESOLUTIONS:
+            times = view[offset:offset + 4 * slots].cast('I')
+            offset += 4 * slots
+            values = view[offset:offset + 4 * slots].cast('f')
+            offset += 4 * slots
+            rings.append(Ring(step, slots, times, values))
+
+        series = Series(rings)
+        series.updated = max(rings[0].times)
+        self._maps[name] = (mm, view, rings)
+        return series
+
+    def _load_existing(self):
+        try:
+            files = [n for n in os.listdir(self.directory) if n.endswith(_FILE_SUFFIX)]
+        except OSError:
+            return
+        for filename in files:
+            name = filename[:-len(_FILE_SUFFIX)]
+            try:
+                self._series[name] = self._open(name, create=False)
+            except (OSError, ValueError):
+                continue
+        while len(self._series) > self.max_series:
+            self._evict()
+
+    def _new_series(self, name):
+        return self._open(name, create=True)
+
+    def _release(self, name):
+        mm, view, rings = self._maps.pop(name)
+        for ring in rings:
+            # Views into the map must be released before it can close
+            ring.times.release()
+            ring.values.release()
+        view.release()
+        mm.close()
+
+    def _evict(self):
+        oldest = min(self._series, key=lambda n: self._series[n].updated)
+        del self._series[oldest]
+        self._release(oldest)
+        try:
+            os.remove(self._path(oldest))
+        except OSError:
+            pass
+
+    def close(self):
+        '''Flush and unmap every series file.'''
+        with self._lock:
+            for name in list(self._maps):
+                self._maps[name][0].flush()
+                self._release(name)
+            self._series.clear()
+
+
+# Global instance
+_history = None
+_history_lock = threading.Lock()
+
+
+def get_metrics_history():
+    '''Get global metrics history instance (on disk, in memory if that fails)'''
+    global _history
+    if _history is None:
+        with _history_lock:
+            if _history is None:
+                from config import ORCHIX_CONFIG_DIR
+                try:
+                    _history = MmapMetricsHistory(str(ORCHIX_CONFIG_DIR / 'metrics'))
+                except (OSError, ValueError):
+                    _history = MetricsHistory()
+                atexit.register(_history.close)
+    return _history
@@ -0,0 +1,165 @@
+# ORCHIX v1.4 - Registry of ORCHIX-managed instances
+'''Which containers ORCHIX manages, and where their compose files live.
+
+Compose files generated by ORCHIX stamp three labels on the service
+(orchix.instance, orchix.template, orchix.compose_path), so the daemon can
+list managed containers with one label-filtered query regardless of the
+process CWD. Instances installed before the labels existed are still found
+by their docker-compose-<name>.yml in the ORCHIX root (one directory listing).
+The index is cached and dropped on container events from the inventory.
+'''
+import os
+import threading
+import time
+from pathlib import Path
+
+LABEL_INSTANCE = 'orchix.instance'
+LABEL_TEMPLATE = 'orchix.template'
+LABEL_COMPOSE_PATH = 'orchix.compose_path'
+
+ORCHIX_ROOT = Path(__file__).parent.parent
+
+# Cache lifetime when no event stream is invalidating it (seconds)
+_UNWATCHED_TTL = 3
+
+
+def default_compose_path(name):
+    '''Where ORCHIX writes an instance's compose file.'''
+    return ORCHIX_ROOT / f'docker-compose-{name}.yml'
+
+
+def _legacy_compose_names():
+    '''Instance names from docker-compose-<name>.yml files in the ORCHIX root.'''
+    names = []
+    try:
+        entries = os.listdir(ORCHIX_ROOT)
+    except OSError:
+        return names
+    for entry in entries:
+        if entry.startswith('docker-compose-') and entry.endswith('.yml'):
+            name = entry[len('docker-compose-'):-len('.yml')]
+            if name:
+                names.append(name)
+    return names
+
+
+class InstanceRegistry:
+    '''Index of ORCHIX instances: name -> {name, template, compose_path, state, labeled}.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._loaded_at = 0
+        self._listening = False
+
+    def _on_event(self, event):
+        if event.get('type') in ('container', 'inventory'):
+            self.invalidate()
+
+    def _listen(self):
+        if self._listening:
+            return
+        try:
+            from utils.container_inventory import get_inventory
+            get_inventory().add_listener(self._on_event)
+            self._listening = True
+        except Exception:
+            pass
+
+    def _following(self):
+        try:
+            from utils.container_inventory import get_inventory
+            return get_inventory().get_stats().get('following', False)
+        except Exception:
+            return False
+
+    def _load(self):
+        from utils import docker_api
+
+        index = {}
+        labeled = docker_api.list_containers(all=True, filters={'label': [LABEL_INSTANCE]})
+        for c in labeled or []:
+            labels = c.get('labels') or {}
+            name = c['name']
+            index[name] = {
+                'name': name,
+                'instance': labels.get(LABEL_INSTANCE, name),
+                'template': labels.get(LABEL_TEMPLATE),
+                'compose_path': labels.get(LABEL_COMPOSE_PATH) or str(default_compose_path(name)),
+                'state': c.get('state', ''),
+                'labeled': True,
+            }
+
+        legacy = [n for n in _legacy_compose_names() if n not in index]
+        if legacy:
+            from apps.manifest_resolver import get_manifest_resolver
+            from utils.container_inventory import get_inventory
+            resolver = get_manifest_resolver()
+            inventory = get_inventory()
+            for name in legacy:
+                index[name] = {
+                    'name': name,
+                    'instance': name,
+                    'template': resolver.template_for_name(name),
+                    'compose_path': str(default_compose_path(name)),
+                    'state': inventory.status(name),
+                    'labeled': False,
+                }
+        return index
+
+    def _current(self):
+        self._listen()
+        now = time.monotonic()
+        with self._lock:
+            index, loaded_at = self._index, self._loaded_at
+        if index is not None and (self._following() or now - loaded_at < _UNWATCHED_TTL):
+            return index
+        index = self._load()
+        with self._lock:
+            self._index, self._loaded_at = index, now
+        return index
+
+    # ============ Queries ============
+
+    def instances(self, running_only=False):
+        '''Metadata dicts for all ORCHIX instances, sorted by name.'''
+        items = sorted(self._current().values(), key=lambda i: i['name'])
+        if running_only:
+            items = [i for i in items if i['state'] == 'running']
+        return [dict(i) for i in items]
+
+    def names(self, running_only=False):
+        return [i['name'] for i in self.instances(running_only)]
+
+    def get(self, name):
+        '''Metadata for one instance, or None if ORCHIX doesn't manage it.'''
+        info = self._current().get(name)
+        return dict(info) if info else None
+
+    def compose_path(self, name):
+        '''Path of an instance's compose file. The label wins when the file it
+        names exists (an imported container may carry another host's path).
+        '''
+        info = self._current().get(name)
+        if info and info['labeled'] and os.path.exists(info['compose_path']):
+            return Path(info['compose_path'])
+        return default_compose_path(name)
+
+    def invalidate(self):
+        with self._lock:
+            self._index = None
+
+
+# Global instance
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_instance_registry():
+    '''Get global instance registry'''
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = InstanceRegistry()
+    return _registry
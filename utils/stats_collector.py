@@ -0,0 +1,230 @@
+# ORCHIX v1.4 - Persistent container stats collector
+'''Keeps one streaming stats connection per running container (or a single
+long-lived `docker stats` process when the API socket is unavailable) and
+holds the latest sample of each in memory.
+'''
+import json
+import re
+import subprocess
+import threading
+import time
+
+from utils import docker_api
+from utils.container_inventory import get_inventory
+
+# Samples older than this are treated as missing
+_SAMPLE_MAX_AGE = 10
+# Stop all streams when nobody read stats for this long
+_IDLE_TIMEOUT = 60
+# Cold start: how long the first read waits for streams to report
+_WARMUP = 2.5
+
+_ANSI_RE = re.compile(r'\x1b\[[0-9;]*[A-Za-z]')
+
+
+class StatsCollector:
+    '''Latest per-container stats, fed by long-lived streams.'''
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples = {}       # name -> (timestamp, values)
+        self._streams = {}       # container id -> {'name', 'stream'}
+        self._cli_proc = None
+        self._running = False
+        self._last_read = 0
+
+    # ============ Lifecycle ============
+
+    def _ensure_started(self):
+        with self._lock:
+            self._last_read = time.time()
+            if self._running:
+                return False
+            self._running = True
+        get_inventory().add_listener(self._on_inventory_event)
+        threading.Thread(target=self._reaper, name='orchix-stats-reaper', daemon=True).start()
+        self._sync()
+        return True
+
+    def stop(self):
+        '''Close every stream; the next read starts them again.'''
+        get_inventory().remove_listener(self._on_inventory_event)
+        with self._lock:
+            self._running = False
+            streams = list(self._streams.values())
+            self._streams.clear()
+            self._samples.clear()
+            proc, self._cli_proc = self._cli_proc, None
+        for entry in streams:
+            if entry['stream'] is not None:
+                entry['stream'].close()
+        if proc is not None and proc.poll() is None:
+            proc.terminate()
+
+    def _reaper(self):
+        while True:
+            time.sleep(_IDLE_TIMEOUT / 4)
+            with self._lock:
+                if not self._running:
+                    return
+                idle = time.time() - self._last_read > _IDLE_TIMEOUT
+            if idle:
+                self.stop()
+                return
+            # Re-attach streams the daemon closed without a matching event
+            self._sync()
+
+    def _on_inventory_event(self, event):
+        if event['type'] in ('container', 'inventory'):
+            self._sync()
+
+    # ============ Stream management ============
+
+    def _sync(self):
+        '''Attach streams to newly running containers, detach stopped ones.'''
+        with self._lock:
+            if not self._running:
+                return
+        if docker_api.get_client() is None:
+            self._ensure_cli_process()
+            return
+
+        running = {c['id']: c['name'] for c in get_inventory().containers() if c['state'] == 'running'}
+        to_close = []
+        with self._lock:
+            for cid in list(self._streams):
+                if running.get(cid) != self._streams[cid]['name']:
+                    entry = self._streams.pop(cid)
+                    self._samples.pop(entry['name'], None)
+                    to_close.append(entry)
+            new = [(cid, name) for cid, name in running.items() if cid not in self._streams]
+            for cid, name in new:
+                self._streams[cid] = {'name': name, 'stream': None}
+
+        for entry in to_close:
+            if entry['stream'] is not None:
+                entry['stream'].close()
+        for cid, name in new:
+            threading.Thread(
+                target=self._follow, args=(cid, name),
+                name=f'orchix-stats-{name}', daemon=True
+            ).start()
+
+    def _follow(self, cid, name):
+        client = docker_api.get_client()
+        stream = None
+        if client is not None:
+            try:
+                stream = client.stream(f'/containers/{cid}/stats')
+            except docker_api.DockerAPIError:
+                stream = None
+
+        with self._lock:
+            entry = self._streams.get(cid)
+            if entry is None or stream is None:
+                # Detached while connecting, or the container is gone
+                if entry is not None:
+                    del self._streams[cid]
+                if stream is not None:
+                    stream.close()
+                return
+            entry['stream'] = stream
+
+        try:
+            for raw in stream:
+                values = docker_api.stats_values(raw)
+                if values is not None:
+                    with self._lock:
+                        self._samples[name] = (time.time(), values)
+        finally:
+            stream.close()
+            with self._lock:
+                if self._streams.get(cid) is entry:
+                    del self._streams[cid]
+                    self._samples.pop(name, None)
+
+    def _ensure_cli_process(self):
+        '''Fallback: one `docker stats` process streaming all running containers.'''
+        with self._lock:
+            if self._cli_proc is not None and self._cli_proc.poll() is None:
+                return
+            try:
+                self._cli_proc = subprocess.Popen(
+                    ['docker', 'stats', '--format', '{{json .}}'],
+                    stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                    text=True, encoding='utf-8', errors='ignore'
+                )
+            except (FileNotFoundError, OSError):
+                self._cli_proc = None
+                return
+            proc = self._cli_proc
+        threading.Thread(target=self._read_cli, args=(proc,), name='orchix-stats-cli', daemon=True).start()
+
+    def _read_cli(self, proc):
+        for line in proc.stdout:
+            line = _ANSI_RE.sub('', line).strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            name = row.get('Name', '')
+            if name:
+                with self._lock:
+                    self._samples[name] = (time.time(), docker_api.cli_stats_values(row))
+        with self._lock:
+            if self._cli_proc is proc:
+                self._cli_proc = None
+
+    # ============ Queries ============
+
+    def get_values(self, names):
+        '''{name: stats_values dict} for the given containers that have a fresh sample.'''
+        names = list(names)
+        if self._ensure_started() and names:
+            # Cold start: give the new streams a moment to deliver a first delta
+            deadline = time.time() + _WARMUP
+            while time.time() < deadline:
+                with self._lock:
+                    if all(n in self._samples for n in names):
+                        break
+                time.sleep(0.1)
+
+        now = time.time()
+        result = {}
+        with self._lock:
+            for name in names:
+                sample = self._samples.get(name)
+                if sample and now - sample[0] <= _SAMPLE_MAX_AGE:
+                    result[name] = sample[1]
+        return result
+
+    def snapshot(self, names):
+        '''{name: {'cpu', 'memory', 'net_io'}} display strings for the given containers.'''
+        return {name: docker_api.format_stats_values(values)
+                for name, values in self.get_values(names).items()}
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                'running': self._running,
+                'streams': len(self._streams),
+                'cli_fallback': self._cli_proc is not None,
+                'samples': len(self._samples),
+            }
+
+
+# Global instance
+_collector = None
+_collector_lock = threading.Lock()
+
+
+def get_stats_collector():
+    '''Get global stats collector instance'''
+    global _collector
+    if _collector is None:
+        with _collector_lock:
+            if _collector is None:
+                _collector = StatsCollector()
+    return _collector
@@ -1,7 +1,7 @@
-from flask import Blueprint, jsonify, request, Response, stream_with_context
+from flask import Blueprint, jsonify, request
 from web.auth import require_permission
+from web.api.jobs import start_job, job_stream_response
 from utils.validation import validate_container_name, validate_port
-import json
 
 bp = Blueprint('api_apps', __name__, url_prefix='/api')
 
@@ -86,14 +86,32 @@ def get_db_credentials_endpoint(container_name):
     return jsonify(get_db_credentials(container_name))
 
 
+def _pull_events(image, start, end):
+    '''Progress events for pulling image, scaled into start..end percent.
+    Joins a pull of the same image already in flight; returns the ImagePull.
+    '''
+    from utils.image_pull import get_pull_coordinator
+
+    pull = get_pull_coordinator().start(image)
+    last = start
+    updates = pull.follow()
+    try:
+        for pct, status in updates:
+            progress = start + int(pct * (end - start) / 100)
+            if progress > last:
+                last = progress
+                yield {'progress': progress, 'status': status}
+    finally:
+        # Job cancelled mid-pull: stop following, which kills the pull if
+        # nobody else is waiting for it
+        updates.close()
+    return pull
+
+
 @bp.route('/apps/install-stream', methods=['POST'])
 @require_permission('apps.install')
 def install_stream():
-    """Install app with Server-Sent Events progress streaming."""
-    import subprocess
-    import re
-    from utils.docker_utils import safe_docker_run
-
+    """Install app as a background job; streams its progress as Server-Sent Events."""
     data = request.json
     app_name = data.get('app_name')
     instance_name = data.get('instance_name', app_name)
@@ -108,7 +126,7 @@ def install_stream():
             manifests = load_all_manifests()
             manifest = manifests.get(app_name)
             if not manifest:
-                yield f"data: {json.dumps({'error': 'App not found'})}\n\n"
+                yield {'error': 'App not found'}
                 return
 
             lm = get_license_manager()
@@ -117,21 +135,21 @@ def install_stream():
             from cli.container_menu import get_all_containers
             current = len(get_all_containers())
             if current >= limit:
-                yield f"data: {json.dumps({'error': f'Container limit reached ({limit})'})}\n\n"
+                yield {'error': f'Container limit reached ({limit})'}
                 return
 
             from cli.install_menu import check_container_exists
             if lm.is_free():
                 instance_name_final = app_name
                 if check_container_exists(app_name):
-                    yield f"data: {json.dumps({'error': 'Container already exists. Multi-Instance requires PRO.'})}\n\n"
+                    yield {'error': 'Container already exists. Multi-Instance requires PRO.'}
                     return
             else:
                 instance_name_final = instance_name
 
             InstallerClass = manifest.get('installer_class')
             if not InstallerClass:
-                yield f"data: {json.dumps({'error': 'No installer available'})}\n\n"
+                yield {'error': 'No installer available'}
                 return
 
             installer = InstallerClass(manifest)
@@ -156,50 +174,21 @@ def install_stream():
 
             # Stream progress: Pull image with progress tracking
             if image:
-                yield f"data: {json.dumps({'progress': 10, 'status': 'Pulling image...'})}\n\n"
-
-                # Pull image with progress
-                process = subprocess.Popen(
-                    ['docker', 'pull', image],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1
-                )
-
-                layers_total = 0
-                layers_done = 0
-                last_progress = 10
-
-                for line in iter(process.stdout.readline, ''):
-                    if not line:
-                        break
-
-                    # Count total layers
-                    if 'Pulling fs layer' in line:
-                        layers_total += 1
-                    elif 'Pull complete' in line or 'Already exists' in line:
-                        layers_done += 1
-
-                    # Calculate progress based on completed layers
-                    if layers_total > 0:
-                        layer_pct = int((layers_done / layers_total) * 100)
-                        progress = 10 + int(layer_pct * 0.6)  # Scale 0-100% to 10-70%
-                        if progress > last_progress:
-                            last_progress = progress
-                            status = f"Pulling image... ({layers_done}/{layers_total} layers)"
-                            yield f"data: {json.dumps({'progress': progress, 'status': status})}\n\n"
-
-                process.wait()
-                yield f"data: {json.dumps({'progress': 70, 'status': 'Image pulled'})}\n\n"
+                yield {'progress': 10, 'status': 'Pulling image...'}
+
+                pull = yield from _pull_events(image, 10, 70)
+                if pull.result.returncode != 0:
+                    yield {'error': f'Failed to pull image {image}'}
+                    return
+                yield {'progress': 70, 'status': 'Image is up to date' if pull.skipped else 'Image pulled'}
 
             # Install (compose up)
-            yield f"data: {json.dumps({'progress': 75, 'status': 'Starting container...'})}\n\n"
+            yield {'progress': 75, 'status': 'Starting container...'}
 
             success = installer.install(config, instance_name_final)
 
             if success:
-                yield f"data: {json.dumps({'progress': 95, 'status': 'Finalizing...'})}\n\n"
+                yield {'progress': 95, 'status': 'Finalizing...'}
 
                 # Audit log
                 try:
@@ -231,15 +220,18 @@ def install_stream():
                         'container_name': instance_name_final,
                     }
 
-                yield f"data: {json.dumps(response)}\n\n"
+                yield response
             else:
                 err = installer.get_last_error() if hasattr(installer, 'get_last_error') else ''
-                yield f"data: {json.dumps({'error': f'Installation failed: {err}'})}\n\n"
+                yield {'error': f'Installation failed: {err}'}
 
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield {'error': str(e)}
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    target = instance_name or app_name
+    job = start_job('install', generate, resource=f'container:{target}',
+                    title=f'Install {target}', permission='apps.install')
+    return job_stream_response(job)
 
 
 @bp.route('/apps/update', methods=['POST'])
@@ -263,12 +255,11 @@ def update_app():
     if update_type not in allowed_update_types:
         return jsonify({'success': False, 'message': 'Invalid update type'}), 400
 
-    from apps.manifest_loader import load_all_manifests
-    from cli.update_menu import _resolve_manifest, _retag_after_update
+    from apps.manifest_resolver import resolve_manifest
+    from cli.update_menu import _retag_after_update
     from license import get_license_manager
 
-    manifests = load_all_manifests()
-    manifest = _resolve_manifest(container_name, manifests)
+    manifest = resolve_manifest(container_name)
 
     if not manifest:
         return jsonify({'success': False, 'message': f'No manifest found for {container_name}'}), 400
@@ -309,10 +300,7 @@ def update_app():
 @bp.route('/apps/update-stream', methods=['POST'])
 @require_permission('apps.update')
 def update_app_stream():
-    """Update app with Server-Sent Events progress streaming."""
-    import subprocess
-    import re
-
+    """Update app as a background job; streams its progress as Server-Sent Events."""
     data = request.json
     container_name = data.get('container_name')
     update_type = data.get('update_type', 'version_update')
@@ -320,97 +308,67 @@ def update_app_stream():
     def generate():
         try:
             if not container_name:
-                yield f"data: {json.dumps({'error': 'container_name required'})}\n\n"
+                yield {'error': 'container_name required'}
                 return
 
             try:
                 validated_name = validate_container_name(container_name)
             except ValueError as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                yield {'error': str(e)}
                 return
 
             allowed_update_types = {'version_update', 'config_update', 'beta_update', 'next_update'}
             if update_type not in allowed_update_types:
-                yield f"data: {json.dumps({'error': 'Invalid update type'})}\n\n"
+                yield {'error': 'Invalid update type'}
                 return
 
-            from apps.manifest_loader import load_all_manifests
-            from cli.update_menu import _resolve_manifest, _retag_after_update
+            from apps.manifest_resolver import resolve_manifest
+            from cli.update_menu import _retag_after_update
             from license import get_license_manager
 
-            manifests = load_all_manifests()
-            manifest = _resolve_manifest(validated_name, manifests)
+            manifest = resolve_manifest(validated_name)
 
             if not manifest:
-                yield f"data: {json.dumps({'error': f'No manifest found for {validated_name}'})}\n\n"
+                yield {'error': f'No manifest found for {validated_name}'}
                 return
 
             UpdaterClass = manifest.get('updater_class')
             if not UpdaterClass:
-                yield f"data: {json.dumps({'error': 'No updater available'})}\n\n"
+                yield {'error': 'No updater available'}
                 return
 
             updater = UpdaterClass(manifest)
             actions = updater.get_available_actions()
             if update_type not in actions:
-                yield f"data: {json.dumps({'error': f'Update type \"{update_type}\" not available'})}\n\n"
+                yield {'error': f'Update type \"{update_type}\" not available'}
                 return
 
-            yield f"data: {json.dumps({'progress': 10, 'status': 'Pulling latest image...'})}\n\n"
+            yield {'progress': 10, 'status': 'Pulling latest image...'}
 
             # Get image from manifest for pull tracking
             template = manifest.get('_template', {})
             image = template.get('image', '')
 
             if image:
-                # Pull new image with progress
-                process = subprocess.Popen(
-                    ['docker', 'pull', image],
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1
-                )
-
-                layers_total = 0
-                layers_done = 0
-                last_progress = 10
-
-                for line in iter(process.stdout.readline, ''):
-                    if not line:
-                        break
-
-                    if 'Pulling fs layer' in line:
-                        layers_total += 1
-                    elif 'Pull complete' in line or 'Already exists' in line:
-                        layers_done += 1
-
-                    if layers_total > 0:
-                        pct = int((layers_done / layers_total) * 100)
-                        progress = 10 + int(pct * 0.6)  # 10-70%
-                        if progress > last_progress:
-                            last_progress = progress
-                            status = f"Pulling image... ({layers_done}/{layers_total} layers)"
-                            yield f"data: {json.dumps({'progress': progress, 'status': status})}\n\n"
-
-                process.wait()
-                if process.returncode != 0:
-                    yield f"data: {json.dumps({'error': 'Failed to pull new image'})}\n\n"
+                # Pull new image with progress (skipped if the local image is current)
+                pull = yield from _pull_events(image, 10, 70)
+                if pull.result.returncode != 0:
+                    yield {'error': 'Failed to pull new image'}
                     return
 
-            yield f"data: {json.dumps({'progress': 75, 'status': 'Updating container...'})}\n\n"
+            yield {'progress': 75, 'status': 'Updating container...'}
 
             # Run update
             method = getattr(updater, update_type, None)
             if not method:
-                yield f"data: {json.dumps({'error': f'Unknown update type: {update_type}'})}\n\n"
+                yield {'error': f'Unknown update type: {update_type}'}
                 return
 
             success = method()
 
             if success:
                 _retag_after_update(validated_name)
-                yield f"data: {json.dumps({'progress': 95, 'status': 'Finalizing...'})}\n\n"
+                yield {'progress': 95, 'status': 'Finalizing...'}
 
                 # Audit log
                 try:
@@ -423,14 +381,16 @@ def update_app_stream():
                 except Exception:
                     pass
 
-                yield f"data: {json.dumps({'success': True, 'message': f'{validated_name} updated successfully', 'progress': 100})}\n\n"
+                yield {'success': True, 'message': f'{validated_name} updated successfully', 'progress': 100}
             else:
-                yield f"data: {json.dumps({'error': 'Update failed'})}\n\n"
+                yield {'error': 'Update failed'}
 
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield {'error': str(e)}
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    job = start_job('update', generate, resource=f'container:{container_name}',
+                    title=f'Update {container_name}', permission='apps.update')
+    return job_stream_response(job)
 
 
 @bp.route('/apps/set-password', methods=['POST'])
@@ -452,11 +412,9 @@ def set_container_password():
         return jsonify({'success': False, 'message': str(e)}), 400
 
     # Find the manifest to get the command template
-    from apps.manifest_loader import load_all_manifests
-    from cli.update_menu import _resolve_manifest
+    from apps.manifest_resolver import resolve_manifest
 
-    manifests = load_all_manifests()
-    manifest = _resolve_manifest(container_name, manifests)
+    manifest = resolve_manifest(container_name)
     if not manifest:
         return jsonify({'success': False, 'message': 'Unknown container'}), 400
 
@@ -497,11 +455,9 @@ def check_conflicts():
 @require_permission('apps.read')
 def get_update_actions(container_name):
     """Get available update actions for a container."""
-    from apps.manifest_loader import load_all_manifests
-    from cli.update_menu import _resolve_manifest
+    from apps.manifest_resolver import resolve_manifest
 
-    manifests = load_all_manifests()
-    manifest = _resolve_manifest(container_name, manifests)
+    manifest = resolve_manifest(container_name)
 
     if not manifest:
         return jsonify({'actions': []})
@@ -4,6 +4,15 @@ from web.auth import require_permission
 bp = Blueprint('api_audit', __name__, url_prefix='/api')
 
 
+def _limit_arg(default):
+    """?limit clamped to 1..1000 (default when missing or invalid)."""
+    try:
+        limit = int(request.args.get('limit', default))
+    except (ValueError, TypeError):
+        limit = default
+    return max(1, min(limit, 1000))
+
+
 @bp.route('/audit')
 @require_permission('audit.read')
 def get_audit_logs():
@@ -18,18 +27,30 @@ def get_audit_logs():
 
     event_type = request.args.get('event_type')
     app_name = request.args.get('app_name')
+    user = request.args.get('user')
+    since = request.args.get('since')
+    until = request.args.get('until')
+    limit = _limit_arg(100)
     try:
-        limit = min(int(request.args.get('limit', '100')), 1000)
-    except (ValueError, TypeError):
-        limit = 100
+        before = int(request.args['before']) if request.args.get('before') else None
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor'}), 400
 
     events = logger.get_recent_events(
         limit=limit,
         event_type=event_type,
-        app_name=app_name
+        app_name=app_name,
+        user=user,
+        since=since,
+        until=until,
+        before=before
     )
 
-    return jsonify(events)
+    response = jsonify(events)
+    # Cursor for the next (older) page
+    if len(events) >= limit and events and 'id' in events[-1]:
+        response.headers['X-Next-Cursor'] = str(events[-1]['id'])
+    return response
 
 
 @bp.route('/audit/users')
@@ -44,9 +65,7 @@ def get_audit_users():
         return jsonify({'error': 'PRO license required'}), 403
 
     logger = get_audit_logger(enabled=True)
-    events = logger.get_recent_events(limit=1000)
-    users = sorted(set(e.get('user', 'unknown') for e in events))
-    return jsonify(users)
+    return jsonify(logger.get_users())
 
 
 @bp.route('/audit/user-activity')
@@ -61,7 +80,7 @@ def get_user_activity():
         return jsonify({'error': 'PRO license required'}), 403
 
     username = request.args.get('user')
-    limit = int(request.args.get('limit', '50'))
+    limit = _limit_arg(50)
 
     logger = get_audit_logger(enabled=True)
     events = logger.get_user_activity(username=username, limit=limit)
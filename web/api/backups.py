@@ -4,6 +4,8 @@ from datetime import datetime
 from pathlib import Path
 from flask import Blueprint, jsonify, request
 from web.auth import require_permission
+from web.api.jobs import start_job
+from utils.docker_utils import safe_docker_run
 from utils.validation import validate_filename, validate_container_name
 
 _ORCHIX_ROOT = Path(__file__).parent.parent.parent
@@ -41,12 +43,12 @@ def _alpine_image_exists() -> bool:
 def _start_container(container_name: str, compose_file: Path):
     """Start container via compose if available (preserves env vars), else via docker start."""
     if compose_file.exists():
-        subprocess.run(
+        safe_docker_run(
             ['docker', 'compose', '-f', str(compose_file), 'up', '-d'],
             capture_output=True
         )
     else:
-        subprocess.run(['docker', 'start', container_name], capture_output=True)
+        safe_docker_run(['docker', 'start', container_name], capture_output=True)
 
 
 def _generic_volume_backup(container_name: str) -> bool:
@@ -141,7 +143,7 @@ def _generic_volume_restore(container_name: str, backup_file: Path) -> bool:
         alpine_existed = _alpine_image_exists()
 
         # Stop container before modifying its volume
-        subprocess.run(['docker', 'stop', container_name], capture_output=True)
+        safe_docker_run(['docker', 'stop', container_name], capture_output=True)
 
         # Restore compose file from sidecar so the container config (env vars, ports) matches
         compose_sidecar = _get_compose_sidecar_path(backup_file)
@@ -253,37 +255,44 @@ def create_backup():
     except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
 
-    from apps.manifest_loader import load_all_manifests
-    from apps.hook_loader import get_hook_loader
+    def generate():
+        from apps.manifest_resolver import resolve_manifest
+        from apps.hook_loader import get_hook_loader
 
-    manifests = load_all_manifests()
-    hook_loader = get_hook_loader()
+        yield {'progress': 10, 'status': f'Creating backup of {container_name}...'}
 
-    # Try to match container to manifest
-    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-    base_name = base_name.split('-')[0] if '-' in base_name else base_name
-    manifest = manifests.get(base_name)
+        hook_loader = get_hook_loader()
 
-    if manifest and hook_loader.has_hook(manifest, 'backup'):
-        try:
-            success = hook_loader.execute_hook(manifest, 'backup', container_name)
-        except Exception as e:
-            return jsonify({'success': False, 'message': f'Backup error: {str(e)}'}), 500
-    else:
-        # Generic volume backup fallback
-        success = _generic_volume_backup(container_name)
+        # Match container to manifest (by name, else by its image)
+        manifest = resolve_manifest(container_name, inspect=True)
 
-    if success:
-        try:
-            from license import get_license_manager
-            from license.audit_logger import get_audit_logger, AuditEventType
-            lm = get_license_manager()
-            logger = get_audit_logger(enabled=lm.is_pro())
-            logger.log_event(AuditEventType.BACKUP, container_name, {'source': 'web_ui'})
-        except Exception:
-            pass
-        return jsonify({'success': True, 'message': f'Backup created for {container_name}'})
-    return jsonify({'success': False, 'message': 'Backup failed'}), 500
+        if manifest and hook_loader.has_hook(manifest, 'backup'):
+            try:
+                success = hook_loader.execute_hook(manifest, 'backup', container_name)
+            except Exception as e:
+                yield {'error': f'Backup error: {str(e)}'}
+                return
+        else:
+            # Generic volume backup fallback
+            success = _generic_volume_backup(container_name)
+
+        if success:
+            try:
+                from license import get_license_manager
+                from license.audit_logger import get_audit_logger, AuditEventType
+                lm = get_license_manager()
+                logger = get_audit_logger(enabled=lm.is_pro())
+                logger.log_event(AuditEventType.BACKUP, container_name, {'source': 'web_ui'})
+            except Exception:
+                pass
+            yield {'success': True, 'message': f'Backup created for {container_name}', 'progress': 100}
+        else:
+            yield {'error': 'Backup failed'}
+
+    # Runs as a background job; follow it with /api/jobs/<job_id>/stream
+    job = start_job('backup', generate, resource=f'container:{container_name}',
+                    title=f'Backup {container_name}', permission='backups.create')
+    return jsonify({'success': True, 'job_id': job.id, 'message': f'Backup of {container_name} started'}), 202
 
 
 @bp.route('/backups/restore', methods=['POST'])
@@ -344,14 +353,13 @@ def restore_backup():
     if not container_name:
         return jsonify({'success': False, 'message': 'Cannot determine container — metadata file missing and filename does not match expected pattern'}), 400
 
-    from apps.manifest_loader import load_all_manifests
+    from apps.manifest_loader import get_template_registry
+    from apps.manifest_resolver import resolve_manifest
     from apps.hook_loader import get_hook_loader
 
-    manifests = load_all_manifests()
     hook_loader = get_hook_loader()
 
-    base_name = container_name.split('_')[0] if '_' in container_name else container_name
-    manifest = manifests.get(base_name) or manifests.get(app_type)
+    manifest = resolve_manifest(container_name) or get_template_registry().get(app_type)
 
     if manifest and hook_loader.has_hook(manifest, 'restore'):
         try:
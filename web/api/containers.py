@@ -1,4 +1,3 @@
-import json as json_mod
 import os
 import shutil
 from pathlib import Path
@@ -6,18 +5,20 @@ from flask import Blueprint, jsonify, request
 from flask import session as flask_session
 from web.auth import require_permission
 from utils.docker_utils import safe_docker_run
+from utils import docker_api
 from utils.validation import validate_container_name
+from utils.orchix_instances import get_instance_registry
 
 bp = Blueprint('api_containers', __name__, url_prefix='/api')
 
 
-def _log_audit(event_type, app_name, details=None):
+def _log_audit(event_type, app_name, details=None, username=None):
     try:
         from license import get_license_manager
         from license.audit_logger import get_audit_logger, AuditEventType
         lm = get_license_manager()
         logger = get_audit_logger(enabled=lm.is_pro())
-        logger.set_web_user(flask_session.get('username', 'unknown'))
+        logger.set_web_user(username or flask_session.get('username', 'unknown'))
         logger.log_event(AuditEventType[event_type], app_name, details or {'source': 'web_ui'})
     except Exception:
         pass
@@ -33,59 +34,42 @@ def _get_visible_container_names():
 @bp.route('/containers')
 @require_permission('containers.read')
 def list_containers():
-    from cli.container_menu import get_container_status
+    from cli.container_menu import get_container_statuses
 
     containers = _get_visible_container_names()
     result = []
 
-    # Get sizes and ports together
+    # Get status, sizes and ports together
+    statuses = {}
     sizes = {}
     ports_map = {}
     images_map = {}
     try:
-        import re
-        pr = safe_docker_run(
-            ['docker', 'ps', '-a', '--format', '{{.Names}}|{{.Size}}|{{.Ports}}|{{.Image}}'],
-            capture_output=True, text=True, timeout=10
-        )
-        if pr and pr.returncode == 0:
-            for line in pr.stdout.strip().split('\n'):
-                if '|' not in line:
+        for c in docker_api.list_containers(all=True, size=True) or []:
+            cname = c['name']
+            statuses[cname] = c['state']
+            sizes[cname] = c['size']
+            images_map[cname] = c['image']
+
+            seen_hosts = set()
+            ports_list = []
+            for p in c['ports']:
+                if p['public'] is None or p['public'] in seen_hosts:
                     continue
-                parts = line.split('|', 3)
-                cname = parts[0].strip()
-                raw_size = parts[1].strip() if len(parts) > 1 else ''
-                raw_ports = parts[2].strip() if len(parts) > 2 else ''
-                images_map[cname] = parts[3].strip() if len(parts) > 3 else ''
-
-                virtual_match = re.search(r'virtual\s+([\d.]+\s*[kKMGT]?B)', raw_size)
-                sizes[cname] = virtual_match.group(1) if virtual_match else raw_size.split('(')[0].strip()
-
-                # Parse port bindings: "0.0.0.0:8080->80/tcp, :::8080->80/tcp"
-                seen_hosts = set()
-                ports_list = []
-                for seg in raw_ports.split(','):
-                    seg = seg.strip()
-                    if '->' not in seg:
-                        continue
-                    host_part, cont_part = seg.split('->', 1)
-                    host_port = host_part.split(':')[-1]
-                    cont_port = cont_part.split('/')[0]
-                    if host_port not in seen_hosts:
-                        seen_hosts.add(host_port)
-                        try:
-                            ports_list.append({'host': int(host_port), 'container': int(cont_port)})
-                        except ValueError:
-                            pass
-                ports_map[cname] = ports_list
+                seen_hosts.add(p['public'])
+                ports_list.append({'host': p['public'], 'container': p['private']})
+            ports_map[cname] = ports_list
     except Exception:
         pass
 
+    missing = [name for name in containers if name not in statuses]
+    if missing:
+        statuses.update(get_container_statuses(missing))
+
     for name in containers:
-        status = get_container_status(name)
         result.append({
             'name': name,
-            'status': status,
+            'status': statuses[name],
             'size': sizes.get(name, ''),
             'ports': ports_map.get(name, []),
             'image': images_map.get(name, '')
@@ -111,17 +95,15 @@ def selection_needed():  # Any authenticated user can check status
 def all_for_selection():
     """Get ALL containers for selection UI (only when selection is needed)."""
     from license import get_license_manager
-    from cli.container_menu import get_all_containers, get_container_status
+    from cli.container_menu import get_all_containers, get_container_statuses
     lm = get_license_manager()
 
     if not lm.needs_container_selection():
         return jsonify({'containers': [], 'message': 'Selection not needed'}), 400
 
     containers = get_all_containers()
-    result = []
-    for name in containers:
-        status = get_container_status(name)
-        result.append({'name': name, 'status': status})
+    statuses = get_container_statuses(containers)
+    result = [{'name': name, 'status': statuses[name]} for name in containers]
     return jsonify({
         'containers': result,
         'limit': lm.get_container_limit()
@@ -176,8 +158,8 @@ def select_containers():
 
 def _is_visible_container(name):
     """Check if container is in the visible set for current tier."""
-    visible = _get_visible_container_names()
-    return name in visible
+    from license.visibility import get_visibility_service
+    return get_visibility_service().is_visible(name)
 
 
 @bp.route('/containers/<name>/start', methods=['POST'])
@@ -189,11 +171,11 @@ def start_container(name):
         return jsonify({'success': False, 'message': str(e)}), 400
     if not _is_visible_container(name):
         return jsonify({'success': False, 'message': 'Container not in managed set'}), 403
-    result = safe_docker_run(['docker', 'start', name], capture_output=True, text=True)
-    if result and result.returncode == 0:
+    success, error = docker_api.container_action(name, 'start')
+    if success:
         _log_audit('CONTAINER_START', name)
         return jsonify({'success': True, 'message': f'{name} started'})
-    return jsonify({'success': False, 'message': result.stderr.strip() if result else 'Docker unavailable'}), 500
+    return jsonify({'success': False, 'message': error}), 500
 
 
 @bp.route('/containers/<name>/stop', methods=['POST'])
@@ -205,11 +187,11 @@ def stop_container(name):
         return jsonify({'success': False, 'message': str(e)}), 400
     if not _is_visible_container(name):
         return jsonify({'success': False, 'message': 'Container not in managed set'}), 403
-    result = safe_docker_run(['docker', 'stop', name], capture_output=True, text=True)
-    if result and result.returncode == 0:
+    success, error = docker_api.container_action(name, 'stop')
+    if success:
         _log_audit('CONTAINER_STOP', name)
         return jsonify({'success': True, 'message': f'{name} stopped'})
-    return jsonify({'success': False, 'message': result.stderr.strip() if result else 'Docker unavailable'}), 500
+    return jsonify({'success': False, 'message': error}), 500
 
 
 @bp.route('/containers/<name>/restart', methods=['POST'])
@@ -221,10 +203,10 @@ def restart_container(name):
         return jsonify({'success': False, 'message': str(e)}), 400
     if not _is_visible_container(name):
         return jsonify({'success': False, 'message': 'Container not in managed set'}), 403
-    result = safe_docker_run(['docker', 'restart', name], capture_output=True, text=True)
-    if result and result.returncode == 0:
+    success, error = docker_api.container_action(name, 'restart')
+    if success:
         return jsonify({'success': True, 'message': f'{name} restarted'})
-    return jsonify({'success': False, 'message': result.stderr.strip() if result else 'Docker unavailable'}), 500
+    return jsonify({'success': False, 'message': error}), 500
 
 
 @bp.route('/containers/<name>/logs')
@@ -258,9 +240,8 @@ def inspect_container(name):
         return jsonify({'error': str(e)}), 400
     if not _is_visible_container(name):
         return jsonify({'error': 'Container not in managed set'}), 403
-    result = safe_docker_run(['docker', 'inspect', name], capture_output=True, text=True)
-    if result and result.returncode == 0:
-        data = json_mod.loads(result.stdout)[0]
+    data = docker_api.inspect_container(name)
+    if data:
         state = data.get('State', {})
         config = data.get('Config', {})
         network = data.get('NetworkSettings', {})
@@ -290,13 +271,13 @@ def get_compose(name):
         name = validate_container_name(name)
     except ValueError as e:
         return jsonify({'error': str(e), 'content': ''}), 400
-    compose_file = f"docker-compose-{name}.yml"
+    compose_file = str(get_instance_registry().compose_path(name))
     if not os.path.exists(compose_file):
         return jsonify({'error': 'No compose file found', 'content': ''}), 404
     try:
         with open(compose_file, 'r', encoding='utf-8') as f:
             content = f.read()
-        return jsonify({'content': content, 'filename': compose_file})
+        return jsonify({'content': content, 'filename': os.path.basename(compose_file)})
     except Exception as e:
         return jsonify({'error': str(e), 'content': ''}), 500
 
@@ -309,7 +290,7 @@ def save_compose(name):
         name = validate_container_name(name)
     except ValueError as e:
         return jsonify({'success': False, 'message': str(e)}), 400
-    compose_file = f"docker-compose-{name}.yml"
+    compose_file = str(get_instance_registry().compose_path(name))
     if not os.path.exists(compose_file):
         return jsonify({'success': False, 'message': 'No compose file found'}), 404
 
@@ -346,7 +327,7 @@ def uninstall_container(name):
     )
 
     removal_details = {'volumes_removed': [], 'files_removed': [], 'errors': []}
-    compose_file = f"docker-compose-{name}.yml"
+    compose_file = str(get_instance_registry().compose_path(name))
 
     # Collect images before removal
     images_to_remove = _get_container_images(name, compose_file)
@@ -444,16 +425,17 @@ def uninstall_container(name):
 @bp.route('/containers/<name>/uninstall-stream', methods=['POST'])
 @require_permission('containers.uninstall')
 def uninstall_container_stream(name):
-    """Completely uninstall a container with Server-Sent Events progress streaming."""
-    from flask import Response, stream_with_context
-    import json
+    """Uninstall a container as a background job; streams its progress as Server-Sent Events."""
+    from web.api.jobs import start_job, job_stream_response
+
+    username = flask_session.get('username', 'unknown')
 
     def generate():
         try:
             try:
                 validated_name = validate_container_name(name)
             except ValueError as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
+                yield {'error': str(e)}
                 return
 
             from cli.uninstall_menu import (
@@ -461,9 +443,9 @@ def uninstall_container_stream(name):
             )
 
             removal_details = {'volumes_removed': [], 'files_removed': [], 'errors': []}
-            compose_file = f"docker-compose-{validated_name}.yml"
+            compose_file = str(get_instance_registry().compose_path(validated_name))
 
-            yield f"data: {json.dumps({'progress': 10, 'status': 'Collecting container info...'})}\n\n"
+            yield {'progress': 10, 'status': 'Collecting container info...'}
 
             # Collect images before removal
             images_to_remove = _get_container_images(validated_name, compose_file)
@@ -479,7 +461,7 @@ def uninstall_container_stream(name):
                     if vol.strip():
                         container_volumes.add(vol.strip())
 
-            yield f"data: {json.dumps({'progress': 25, 'status': 'Stopping container...'})}\n\n"
+            yield {'progress': 25, 'status': 'Stopping container...'}
 
             # 1. Stop and remove container
             safe_docker_run(['docker', 'stop', validated_name], capture_output=True, text=True)
@@ -487,7 +469,7 @@ def uninstall_container_stream(name):
             if result and result.returncode != 0 and result.stderr and "No such container" not in result.stderr:
                 removal_details['errors'].append(f"Container: {result.stderr.strip()}")
 
-            yield f"data: {json.dumps({'progress': 50, 'status': 'Removing volumes...'})}\n\n"
+            yield {'progress': 50, 'status': 'Removing volumes...'}
 
             # 2. Remove volumes
             result = safe_docker_run(
@@ -501,7 +483,7 @@ def uninstall_container_stream(name):
                         if r and r.returncode == 0:
                             removal_details['volumes_removed'].append(vol)
 
-            yield f"data: {json.dumps({'progress': 70, 'status': 'Cleaning up files...'})}\n\n"
+            yield {'progress': 70, 'status': 'Cleaning up files...'}
 
             # 3. Remove files
             for path in [compose_file, f"Dockerfile-{validated_name}"]:
@@ -525,7 +507,7 @@ def uninstall_container_stream(name):
                         except Exception:
                             pass
 
-            yield f"data: {json.dumps({'progress': 85, 'status': 'Removing images...'})}\n\n"
+            yield {'progress': 85, 'status': 'Removing images...'}
 
             # 4. Remove images
             instance_image = f"{validated_name}:orchix"
@@ -552,17 +534,19 @@ def uninstall_container_stream(name):
                 if r and r.returncode == 0:
                     removal_details['files_removed'].append(f"Image: {image}")
 
-            yield f"data: {json.dumps({'progress': 95, 'status': 'Finalizing...'})}\n\n"
+            yield {'progress': 95, 'status': 'Finalizing...'}
 
             # 5. Prune unused networks
             safe_docker_run(['docker', 'network', 'prune', '-f'], capture_output=True, text=True)
 
             # 6. Audit log
-            _log_audit('UNINSTALL', validated_name, removal_details)
+            _log_audit('UNINSTALL', validated_name, removal_details, username=username)
 
-            yield f"data: {json.dumps({'success': True, 'message': f'{validated_name} completely uninstalled', 'details': removal_details, 'progress': 100})}\n\n"
+            yield {'success': True, 'message': f'{validated_name} completely uninstalled', 'details': removal_details, 'progress': 100}
 
         except Exception as e:
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield {'error': str(e)}
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    job = start_job('uninstall', generate, resource=f'container:{name}',
+                    title=f'Uninstall {name}', permission='containers.uninstall')
+    return job_stream_response(job)
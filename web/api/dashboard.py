@@ -1,11 +1,12 @@
-import json
 import time
-import subprocess
 import psutil
 import shutil
 import platform
-from flask import Blueprint, Response, jsonify, session
+from flask import Blueprint, Response, jsonify, request, session
 from web.auth import require_permission
+from utils import docker_api
+from utils.container_inventory import get_inventory
+from utils.cgroup_metrics import collect_container_metrics, METRIC_KEYS
 
 bp = Blueprint('api_dashboard', __name__, url_prefix='/api')
 
@@ -16,24 +17,6 @@ _docker_info_cache = None
 _docker_info_time = 0
 _DOCKER_INFO_TTL = 30
 
-# Network speed tracking (per SSE generator)
-_prev_net = None
-_prev_net_time = 0
-
-
-def _safe_run(cmd, timeout=10):
-    """Run a command with timeout, return stdout or empty string."""
-    try:
-        result = subprocess.run(
-            cmd, capture_output=True, text=True,
-            timeout=timeout, encoding='utf-8', errors='ignore'
-        )
-        if result.returncode == 0:
-            return result.stdout.strip()
-    except (subprocess.TimeoutExpired, FileNotFoundError, Exception):
-        pass
-    return ''
-
 
 def _get_visible_names():
     """Get set of container names visible to current tier."""
@@ -48,31 +31,24 @@ def _get_visible_names():
 def _get_containers():
     """Get container list with stats. Timeout-safe."""
     containers = []
+    ids = {}
     visible_names = _get_visible_names()
 
     # Get container list (fast, <1s)
-    out = _safe_run(
-        ['docker', 'ps', '-a', '--format', '{{.Names}}|{{.Status}}|{{.Ports}}|{{.Image}}'],
-        timeout=5
-    )
-    if not out:
+    listing = get_inventory().containers()
+    if not listing:
         return containers
 
-    for line in out.split('\n'):
-        if not line.strip():
-            continue
-        parts = line.split('|')
-        if len(parts) < 2:
+    for entry in listing:
+        name = entry['name']
+        if not name:
             continue
 
-        name = parts[0].strip()
-
         # Filter by visible containers
         if visible_names is not None and name not in visible_names:
             continue
-        status_raw = parts[1].strip()
-        ports_raw = parts[2].strip() if len(parts) > 2 else ''
-        image = parts[3].strip() if len(parts) > 3 else '-'
+        status_raw = entry['status']
+        image = entry['image'] or '-'
 
         if '/' in image:
             image = image.split('/')[-1]
@@ -97,14 +73,12 @@ def _get_containers():
 
         # Parse ports
         host_ports = []
-        if ports_raw:
-            for mapping in ports_raw.split(', '):
-                if '->' in mapping:
-                    host_part = mapping.split('->')[0]
-                    port = host_part.split(':')[-1] if ':' in host_part else host_part
-                    if port and port not in host_ports:
-                        host_ports.append(port)
+        for p in entry['ports']:
+            port = str(p['public']) if p['public'] else ''
+            if port and port not in host_ports:
+                host_ports.append(port)
 
+        ids[name] = entry['id']
         containers.append({
             'name': name,
             'status': status_raw,
@@ -112,31 +86,22 @@ def _get_containers():
             'uptime': uptime,
             'ports': ', '.join(host_ports) if host_ports else '-',
             'image': image,
-            'cpu': '-',
-            'memory': '-',
-            'net_io': '-',
+            'cpu': None,
+            'mem_used': None,
+            'mem_limit': None,
+            'net_rx': None,
+            'net_tx': None,
+            'io_read': None,
+            'io_write': None,
         })
 
-    # Get stats (can be slow ~1-2s, timeout at 8s)
-    stats_out = _safe_run(
-        ['docker', 'stats', '--no-stream', '--format', '{{.Name}}|{{.CPUPerc}}|{{.MemUsage}}|{{.NetIO}}'],
-        timeout=8
-    )
-    if stats_out:
-        stats_map = {}
-        for line in stats_out.split('\n'):
-            if not line.strip():
-                continue
-            parts = line.split('|')
-            if len(parts) >= 4:
-                stats_map[parts[0].strip()] = {
-                    'cpu': parts[1].strip(),
-                    'memory': parts[2].strip(),
-                    'net_io': parts[3].strip(),
-                }
-        for c in containers:
-            if c['name'] in stats_map:
-                c.update(stats_map[c['name']])
+    # Typed metrics: cgroup v2 files, docker stats streams as fallback
+    metrics = collect_container_metrics((ids[c['name']], c['name']) for c in containers if c['running'])
+    for c in containers:
+        m = metrics.get(c['name'])
+        if m:
+            c.update({key: m[key] for key in METRIC_KEYS if key != 'cpu_percent'})
+            c['cpu'] = round(m['cpu_percent'], 2) if m['cpu_percent'] is not None else None
 
     return containers
 
@@ -178,23 +143,16 @@ def _get_docker_info():
 
     info = {'version': '?', 'images': 0, 'volumes': 0, 'networks': 0, 'volume_names': []}
 
-    v = _safe_run(['docker', 'version', '--format', '{{.Server.Version}}'], timeout=5)
+    v = docker_api.server_version()
     if v:
         info['version'] = f'v{v}'
 
-    imgs = _safe_run(['docker', 'images', '-q'], timeout=5)
-    if imgs:
-        info['images'] = len([l for l in imgs.split('\n') if l])
+    info['images'] = len(docker_api.list_images())
+    info['networks'] = len(docker_api.list_networks())
 
-    nets = _safe_run(['docker', 'network', 'ls', '-q'], timeout=5)
-    if nets:
-        info['networks'] = len([l for l in nets.split('\n') if l])
-
-    vols = _safe_run(['docker', 'volume', 'ls', '--format', '{{.Name}}'], timeout=5)
-    if vols:
-        names = [v.strip() for v in vols.split('\n') if v.strip()]
-        info['volume_names'] = names
-        info['volumes'] = len(names)
+    names = get_inventory().volumes()
+    info['volume_names'] = names
+    info['volumes'] = len(names)
 
     _docker_info_cache = info
     _docker_info_time = now
@@ -210,12 +168,8 @@ def _get_alerts(containers, sys_data):
             alerts.append(f"{c['name']} DOWN")
 
     for c in containers:
-        try:
-            cpu_num = float(c.get('cpu', '-').replace('%', ''))
-            if cpu_num > 80:
-                alerts.append(f"{c['name']} CPU:{c['cpu']}")
-        except (ValueError, TypeError):
-            pass
+        if c.get('cpu') is not None and c['cpu'] > 80:
+            alerts.append(f"{c['name']} CPU:{c['cpu']:.2f}%")
 
     if sys_data['disk_percent'] >= 90:
         alerts.append(f"Disk CRITICAL {sys_data['disk_percent']}%")
@@ -233,10 +187,13 @@ def _get_alerts(containers, sys_data):
     return alerts
 
 
-def _get_network():
-    """Get network interface speeds."""
-    global _prev_net, _prev_net_time
+def _get_network(state):
+    """Get network interface speeds.
+    state holds the previous counters between calls (owned by the sampler).
+    """
     now = time.time()
+    prev_net = state.get('counters')
+    prev_time = state.get('time', 0)
 
     try:
         counters = psutil.net_io_counters(pernic=True)
@@ -248,14 +205,14 @@ def _get_network():
     total_up = 0
     total_down = 0
 
-    if _prev_net and (now - _prev_net_time) >= 0.5:
-        elapsed = now - _prev_net_time
+    if prev_net and (now - prev_time) >= 0.5:
+        elapsed = now - prev_time
         for name, cnt in counters.items():
             if name.lower() in ('lo', 'loopback'):
                 continue
             is_up = name in stats and stats[name].isup
-            if name in _prev_net:
-                prev = _prev_net[name]
+            if name in prev_net:
+                prev = prev_net[name]
                 up = max(0, (cnt.bytes_sent - prev.bytes_sent) / elapsed)
                 down = max(0, (cnt.bytes_recv - prev.bytes_recv) / elapsed)
                 if is_up or up > 0 or down > 0:
@@ -268,8 +225,8 @@ def _get_network():
                     total_up += up
                     total_down += down
 
-    _prev_net = counters
-    _prev_net_time = now
+    state['counters'] = counters
+    state['time'] = now
 
     # Sort: active first, then by name
     interfaces.sort(key=lambda x: (not x['active'], x['name']))
@@ -290,57 +247,59 @@ def _format_speed(bps):
     return f"{bps:.0f} B/s"
 
 
-@bp.route('/dashboard')
-@require_permission('dashboard.read')
-def get_dashboard():
+def build_snapshot(net_state):
+    """Collect one full dashboard snapshot."""
     containers = _get_containers()
     sys_data = _get_system()
     docker_info = _get_docker_info()
     alerts = _get_alerts(containers, sys_data)
-    network = _get_network()
+    network = _get_network(net_state)
 
-    return jsonify({
+    return {
         'containers': containers,
         'system': sys_data,
         'docker': docker_info,
         'alerts': alerts,
         'network': network,
         'timestamp': time.time()
-    })
+    }
+
+
+@bp.route('/dashboard')
+@require_permission('dashboard.read')
+def get_dashboard():
+    from web.dashboard_sampler import get_sampler
+    sampler = get_sampler()
+    snapshot = sampler.latest(max_age=sampler.interval * 2)
+    if snapshot is None:
+        snapshot = sampler.sample_now()
+    return jsonify(snapshot)
 
 
 @bp.route('/dashboard/stream')
 @require_permission('dashboard.read')
 def dashboard_stream():
+    """Live dashboard. ?mode=delta sends a full snapshot, then only changes."""
+    from web.dashboard_sampler import get_sampler
+    import queue
+
+    mode = 'delta' if request.args.get('mode') == 'delta' else 'full'
+
     def generate():
-        # Prime psutil CPU (first call always returns 0)
-        psutil.cpu_percent(interval=None)
-        time.sleep(0.1)
-
-        while True:
-            try:
-                containers = _get_containers()
-                sys_data = _get_system()
-                docker_info = _get_docker_info()
-                alerts = _get_alerts(containers, sys_data)
-                network = _get_network()
-
-                data = json.dumps({
-                    'containers': containers,
-                    'system': sys_data,
-                    'docker': docker_info,
-                    'alerts': alerts,
-                    'network': network,
-                    'timestamp': time.time()
-                })
-
-                yield f"data: {data}\n\n"
-            except GeneratorExit:
-                return
-            except Exception as e:
-                yield f"data: {json.dumps({'error': str(e)})}\n\n"
-
-            time.sleep(3)
+        sampler = get_sampler()
+        sub = sampler.subscribe(mode=mode)
+        try:
+            while True:
+                try:
+                    payload = sub.get(timeout=15)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if payload is None:
+                    return  # dropped as a slow client; EventSource reconnects
+                yield f"data: {payload}\n\n"
+        finally:
+            sampler.unsubscribe(sub)
 
     return Response(
         generate(),
@@ -0,0 +1,18 @@
+import time
+from flask import Blueprint, jsonify
+from web.auth import require_permission
+
+bp = Blueprint('api_debug', __name__, url_prefix='/api')
+
+
+@bp.route('/debug/docker-calls')
+@require_permission('debug.read')
+def docker_calls():
+    """Docker call counts, failures and latency percentiles by subcommand and caller."""
+    from utils.docker_metrics import get_docker_call_stats
+    from utils.docker_utils import get_executor
+
+    data = get_docker_call_stats().snapshot()
+    data['uptime'] = round(time.time() - data['since'], 1)
+    data['executor'] = get_executor().get_stats()
+    return jsonify(data)
@@ -0,0 +1,128 @@
+import json
+import queue
+from flask import Blueprint, jsonify, request, Response, session
+from web.auth import require_permission, ROLE_PERMISSIONS
+
+bp = Blueprint('api_jobs', __name__, url_prefix='/api')
+
+# Permissions that start jobs; holding any of them gives access to /api/jobs
+JOB_PERMISSIONS = (
+    'apps.install', 'apps.update', 'containers.uninstall',
+    'backups.create', 'migration.export', 'migration.import',
+)
+
+# Set by the stream gateway on requests it proxies. Job streams are then handed
+# back to it (HANDOFF_HEADER: "<job id> <after>") and served from its event loop.
+GATEWAY_HEADER = 'X-Orchix-Gateway'
+HANDOFF_HEADER = 'X-Orchix-Job-Stream'
+_KEEPALIVE = 15
+
+
+def sse_event(seq, event):
+    '''One SSE message; the id lets a client resume with ?after=<id>.'''
+    return f"id: {seq}\ndata: {json.dumps(event)}\n\n"
+
+
+def start_job(kind, func, resource=None, title='', permission=None):
+    '''Submit a job on behalf of the logged-in user.'''
+    from core.jobs import get_job_manager
+    return get_job_manager().submit(
+        kind, func, resource=resource, title=title,
+        owner=session.get('username'), permission=permission,
+    )
+
+
+def job_stream_response(job, after=0):
+    '''SSE response with the job's events after seq `after` until it finishes.
+    Closing it does not stop the job; reattach with /api/jobs/<id>/stream.
+    '''
+    headers = {'X-Job-Id': job.id, 'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    if request.headers.get(GATEWAY_HEADER):
+        headers[HANDOFF_HEADER] = f'{job.id} {after}'
+        return Response(b'', headers=headers, mimetype='text/event-stream')
+
+    def generate():
+        channel = queue.Queue()
+        last = after
+        job.subscribe(channel, after)
+        try:
+            while True:
+                try:
+                    item = channel.get(timeout=_KEEPALIVE)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+                    continue
+                if item is None:
+                    if job.done and last >= job.last_seq:
+                        return
+                    job.subscribe(channel, last)
+                    continue
+                last = item[0]
+                yield sse_event(*item)
+        finally:
+            job.unsubscribe(channel)
+
+    return Response(generate(), headers=headers, mimetype='text/event-stream')
+
+
+def _can_see(job):
+    perms = ROLE_PERMISSIONS.get(session.get('role', 'viewer'), set())
+    return not job.permission or job.permission in perms
+
+
+def _find_job(job_id):
+    from core.jobs import get_job_manager
+    job = get_job_manager().get(job_id)
+    if job is None or not _can_see(job):
+        return None
+    return job
+
+
+@bp.route('/jobs')
+@require_permission(*JOB_PERMISSIONS)
+def list_jobs():
+    """Recent jobs, newest first."""
+    from core.jobs import get_job_manager
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), 200)
+    except ValueError:
+        limit = 50
+    return jsonify([job.to_dict() for job in get_job_manager().list(limit) if _can_see(job)])
+
+
+@bp.route('/jobs/<job_id>')
+@require_permission(*JOB_PERMISSIONS)
+def get_job(job_id):
+    """Job state, progress and result; ?events=1 includes the event log."""
+    job = _find_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job.to_dict(events=request.args.get('events') == '1'))
+
+
+@bp.route('/jobs/<job_id>/stream')
+@require_permission(*JOB_PERMISSIONS)
+def stream_job(job_id):
+    """Reattach to a job's progress stream (?after=<seq> or Last-Event-ID)."""
+    job = _find_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    try:
+        after = max(0, int(request.args.get('after') or request.headers.get('Last-Event-ID') or 0))
+    except ValueError:
+        after = 0
+    return job_stream_response(job, after)
+
+
+@bp.route('/jobs/<job_id>/cancel', methods=['POST'])
+@require_permission(*JOB_PERMISSIONS)
+def cancel_job(job_id):
+    """Cancel a queued or running job."""
+    from core.jobs import get_job_manager
+    job = _find_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.done:
+        return jsonify({'success': False, 'message': f'Job already {job.state}'}), 409
+    get_job_manager().cancel(job.id)
+    return jsonify({'success': True, 'message': 'Cancellation requested', 'job': job.to_dict()})
@@ -0,0 +1,46 @@
+from flask import Blueprint, jsonify, request
+from web.auth import require_permission
+
+bp = Blueprint('api_metrics', __name__, url_prefix='/api')
+
+_MAX_SERIES_PER_REQUEST = 50
+
+
+def _visible_series(names):
+    """Hide per-container series of containers outside the current tier's visible set."""
+    from web.api.dashboard import _get_visible_names
+    visible = _get_visible_names()
+    if visible is None:
+        return names
+    result = []
+    for name in names:
+        if name.startswith('container.'):
+            container = name[len('container.'):].rsplit('.', 1)[0]
+            if container not in visible:
+                continue
+        result.append(name)
+    return result
+
+
+@bp.route('/metrics/history')
+@require_permission('dashboard.read')
+def get_metrics_history():
+    """Time series for charts: ?series=host.cpu,container.web.mem&range=1h"""
+    from utils.metrics_history import get_metrics_history as _history, parse_range
+
+    history = _history()
+    requested = [s.strip() for s in request.args.get('series', '').split(',') if s.strip()]
+    if not requested:
+        return jsonify({'series_names': _visible_series(history.series_names())})
+
+    if len(requested) > _MAX_SERIES_PER_REQUEST:
+        return jsonify({'error': f'At most {_MAX_SERIES_PER_REQUEST} series per request'}), 400
+
+    seconds = parse_range(request.args.get('range'))
+    result = {}
+    for name in _visible_series(requested):
+        data = history.query(name, seconds)
+        if data is not None:
+            result[name] = data
+
+    return jsonify({'range': seconds, 'series': result})
@@ -5,9 +5,11 @@ import tarfile
 import socket
 from pathlib import Path
 from datetime import datetime
-from flask import Blueprint, jsonify, request, Response, stream_with_context
+from flask import Blueprint, jsonify, request
 from web.auth import require_permission
+from web.api.jobs import start_job, job_stream_response
 from utils.validation import validate_container_name
+from utils.orchix_instances import ORCHIX_ROOT, get_instance_registry
 
 _log = logging.getLogger(__name__)
 
@@ -141,9 +143,9 @@ def export_migration():
         }
 
         # Copy compose file
-        compose_src = Path(f'docker-compose-{container_name}.yml')
+        compose_src = get_instance_registry().compose_path(container_name)
         if compose_src.exists():
-            shutil.copy2(compose_src, package_dir / compose_src.name)
+            shutil.copy2(compose_src, package_dir / f'docker-compose-{container_name}.yml')
 
         # Create backup
         try:
@@ -181,7 +183,7 @@ def export_migration():
 @bp.route('/migrations/export-stream', methods=['POST'])
 @require_permission('migration.export')
 def export_migration_stream():
-    """Export migration package with SSE progress updates."""
+    """Export migration package as a background job with SSE progress updates."""
     blocked = _require_pro()
     if blocked:
         return blocked
@@ -223,12 +225,12 @@ def export_migration_stream():
             }
 
             total = len(containers)
-            yield f"data: {json.dumps({'progress': 5, 'status': 'Creating package structure...'})}\n\n"
+            yield {'progress': 5, 'status': 'Creating package structure...'}
 
             for idx, container_name in enumerate(containers):
                 base_progress = 10 + (idx * 70 // total)
 
-                yield f"data: {json.dumps({'progress': base_progress, 'status': f'Processing {container_name}...'})}\n\n"
+                yield {'progress': base_progress, 'status': f'Processing {container_name}...'}
 
                 container_data = {
                     'name': container_name,
@@ -237,13 +239,13 @@ def export_migration_stream():
                 }
 
                 # Copy compose file
-                yield f"data: {json.dumps({'progress': base_progress + 10, 'status': f'Copying {container_name} files...'})}\n\n"
-                compose_src = Path(f'docker-compose-{container_name}.yml')
+                yield {'progress': base_progress + 10, 'status': f'Copying {container_name} files...'}
+                compose_src = get_instance_registry().compose_path(container_name)
                 if compose_src.exists():
-                    shutil.copy2(compose_src, package_dir / compose_src.name)
+                    shutil.copy2(compose_src, package_dir / f'docker-compose-{container_name}.yml')
 
                 # Create backup
-                yield f"data: {json.dumps({'progress': base_progress + 30, 'status': f'Creating {container_name} backup...'})}\n\n"
+                yield {'progress': base_progress + 30, 'status': f'Creating {container_name} backup...'}
                 try:
                     from cli.migration_menu import _create_container_backup
                     backup_file = _create_container_backup(container_name, package_dir, target_is_windows)
@@ -255,13 +257,13 @@ def export_migration_stream():
                 migration_data['containers'].append(container_data)
 
             # Write manifest
-            yield f"data: {json.dumps({'progress': 85, 'status': 'Writing manifest...'})}\n\n"
+            yield {'progress': 85, 'status': 'Writing manifest...'}
             manifest_file = package_dir / 'migration_manifest.json'
             with open(manifest_file, 'w', encoding='utf-8') as f:
                 json.dump(migration_data, f, indent=2)
 
             # Create tarball
-            yield f"data: {json.dumps({'progress': 90, 'status': 'Creating package archive...'})}\n\n"
+            yield {'progress': 90, 'status': 'Creating package archive...'}
             tarball_path = MIGRATION_DIR / f"{package_name}.tar.gz"
             with tarfile.open(tarball_path, 'w:gz') as tar:
                 tar.add(package_dir, arcname=package_name)
@@ -269,13 +271,15 @@ def export_migration_stream():
             shutil.rmtree(package_dir)
 
             size = tarball_path.stat().st_size
-            yield f"data: {json.dumps({'progress': 100, 'status': 'Export complete!', 'success': True, 'filename': tarball_path.name, 'size': size})}\n\n"
+            yield {'progress': 100, 'status': 'Export complete!', 'success': True, 'filename': tarball_path.name, 'size': size}
 
         except Exception as e:
             _log.error(f"Export stream error: {e}")
-            yield f"data: {json.dumps({'progress': 100, 'status': f'Error: {str(e)}', 'success': False})}\n\n"
+            yield {'progress': 100, 'status': f'Error: {str(e)}', 'success': False}
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    job = start_job('export', generate, resource='migration',
+                    title=f'Export {len(containers)} containers', permission='migration.export')
+    return job_stream_response(job)
 
 
 @bp.route('/migrations/import', methods=['POST'])
@@ -321,11 +325,10 @@ def import_migration():
     with open(manifest_file, 'r', encoding='utf-8') as f:
         manifest_data = json.load(f)
 
-    from apps.manifest_loader import load_all_manifests
+    from apps.manifest_resolver import resolve_manifest
     from apps.hook_loader import get_hook_loader
     from utils.docker_utils import safe_docker_run
 
-    manifests = load_all_manifests()
     hook_loader = get_hook_loader()
     BACKUP_DIR.mkdir(exist_ok=True)
 
@@ -356,8 +359,10 @@ def import_migration():
         compose_file = container_data.get('compose_file')
         if compose_file:
             compose_src = extract_dir / compose_file
+            # Into the ORCHIX root, where the instance registry looks for it
+            compose_file = str(ORCHIX_ROOT / Path(compose_file).name)
             if compose_src.exists():
-                shutil.copy2(compose_src, Path(compose_file))
+                shutil.copy2(compose_src, compose_file)
 
         # Deploy container
         if compose_file:
@@ -390,8 +395,7 @@ def import_migration():
                 time.sleep(3)
 
                 # Restore via hook, or fall back to generic volume restore
-                base_name = container_name.split('_')[0] if '_' in container_name else container_name
-                manifest = manifests.get(base_name)
+                manifest = resolve_manifest(container_name, inspect=True)
                 if manifest and hook_loader.has_hook(manifest, 'restore'):
                     try:
                         hook_loader.execute_hook(manifest, 'restore', backup_dst, container_name)
@@ -420,7 +424,7 @@ def import_migration():
 @bp.route('/migrations/import-stream', methods=['POST'])
 @require_permission('migration.import')
 def import_migration_stream():
-    """Import migration package with Server-Sent Events progress streaming."""
+    """Import migration package as a background job with Server-Sent Events progress streaming."""
     blocked = _require_pro()
     if blocked:
         return blocked
@@ -431,24 +435,24 @@ def import_migration_stream():
     def generate():
         try:
             if not filename:
-                yield f"data: {json.dumps({'error': 'filename required'})}\n\n"
+                yield {'error': 'filename required'}
                 return
 
             # Validate filename
             import re
             if not re.match(r'^orchix_migration_\d{8}_\d{6}\.tar\.gz$', filename):
-                yield f"data: {json.dumps({'error': 'Invalid filename format'})}\n\n"
+                yield {'error': 'Invalid filename format'}
                 return
 
             package_path = MIGRATION_DIR / filename
             if not str(package_path.resolve()).startswith(str(MIGRATION_DIR.resolve())):
-                yield f"data: {json.dumps({'error': 'Invalid file path'})}\n\n"
+                yield {'error': 'Invalid file path'}
                 return
             if not package_path.exists():
-                yield f"data: {json.dumps({'error': 'Package not found'})}\n\n"
+                yield {'error': 'Package not found'}
                 return
 
-            yield f"data: {json.dumps({'progress': 5, 'status': 'Extracting package...'})}\n\n"
+            yield {'progress': 5, 'status': 'Extracting package...'}
 
             # Extract
             extract_dir = MIGRATION_DIR / filename.replace('.tar.gz', '')
@@ -456,24 +460,23 @@ def import_migration_stream():
                 with tarfile.open(package_path, 'r:gz') as tar:
                     _safe_tar_extract(tar, MIGRATION_DIR)
             except Exception as e:
-                yield f"data: {json.dumps({'error': f'Failed to extract: {str(e)}'})}\n\n"
+                yield {'error': f'Failed to extract: {str(e)}'}
                 return
 
             # Read manifest
             manifest_file = extract_dir / 'migration_manifest.json'
             if not manifest_file.exists():
                 shutil.rmtree(extract_dir)
-                yield f"data: {json.dumps({'error': 'Invalid package (no manifest)'})}\n\n"
+                yield {'error': 'Invalid package (no manifest)'}
                 return
 
             with open(manifest_file, 'r', encoding='utf-8') as f:
                 manifest_data = json.load(f)
 
-            from apps.manifest_loader import load_all_manifests
+            from apps.manifest_resolver import resolve_manifest
             from apps.hook_loader import get_hook_loader
             from utils.docker_utils import safe_docker_run
 
-            manifests = load_all_manifests()
             hook_loader = get_hook_loader()
             BACKUP_DIR.mkdir(exist_ok=True)
 
@@ -481,18 +484,18 @@ def import_migration_stream():
             total = len(containers_list)
 
             if total == 0:
-                yield f"data: {json.dumps({'error': 'No containers in package'})}\n\n"
+                yield {'error': 'No containers in package'}
                 shutil.rmtree(extract_dir)
                 return
 
-            yield f"data: {json.dumps({'progress': 10, 'status': f'Importing {total} containers...'})}\n\n"
+            yield {'progress': 10, 'status': f'Importing {total} containers...'}
 
             imported = 0
             for idx, container_data in enumerate(containers_list):
                 container_name = container_data.get('name')
                 base_progress = 10 + (idx * 80 // total)
 
-                yield f"data: {json.dumps({'progress': base_progress, 'status': f'Importing {container_name}...'})}\n\n"
+                yield {'progress': base_progress, 'status': f'Importing {container_name}...'}
 
                 # Validate
                 try:
@@ -506,18 +509,20 @@ def import_migration_stream():
                     capture_output=True, text=True
                 )
                 if r and container_name in r.stdout:
-                    yield f"data: {json.dumps({'progress': base_progress + 5, 'status': f'{container_name} already exists - skipped'})}\n\n"
+                    yield {'progress': base_progress + 5, 'status': f'{container_name} already exists - skipped'}
                     continue
 
                 # Copy compose file
                 compose_file = container_data.get('compose_file')
                 if compose_file:
                     compose_src = extract_dir / compose_file
+                    # Into the ORCHIX root, where the instance registry looks for it
+                    compose_file = str(ORCHIX_ROOT / Path(compose_file).name)
                     if compose_src.exists():
-                        shutil.copy2(compose_src, Path(compose_file))
+                        shutil.copy2(compose_src, compose_file)
 
                 # Deploy
-                yield f"data: {json.dumps({'progress': base_progress + 10, 'status': f'Starting {container_name}...'})}\n\n"
+                yield {'progress': base_progress + 10, 'status': f'Starting {container_name}...'}
 
                 if compose_file:
                     r = safe_docker_run(
@@ -525,13 +530,13 @@ def import_migration_stream():
                         capture_output=True, text=True
                     )
                     if not r or r.returncode != 0:
-                        yield f"data: {json.dumps({'progress': base_progress + 15, 'status': f'Failed to start {container_name}'})}\n\n"
+                        yield {'progress': base_progress + 15, 'status': f'Failed to start {container_name}'}
                         continue
 
                 # Restore backup
                 backup_file = container_data.get('backup_file')
                 if backup_file:
-                    yield f"data: {json.dumps({'progress': base_progress + 20, 'status': f'Restoring {container_name}...'})}\n\n"
+                    yield {'progress': base_progress + 20, 'status': f'Restoring {container_name}...'}
 
                     backup_src = extract_dir / backup_file
                     backup_dst = BACKUP_DIR / backup_file
@@ -550,8 +555,7 @@ def import_migration_stream():
                         time.sleep(3)
 
                         # Restore via hook, or fall back to generic volume restore
-                        base_name = container_name.split('_')[0] if '_' in container_name else container_name
-                        manifest = manifests.get(base_name)
+                        manifest = resolve_manifest(container_name, inspect=True)
                         if manifest and hook_loader.has_hook(manifest, 'restore'):
                             try:
                                 hook_loader.execute_hook(manifest, 'restore', backup_dst, container_name)
@@ -568,10 +572,12 @@ def import_migration_stream():
             # Cleanup
             shutil.rmtree(extract_dir)
 
-            yield f"data: {json.dumps({'progress': 100, 'status': 'Import complete!', 'success': True, 'message': f'Imported {imported}/{total} containers'})}\n\n"
+            yield {'progress': 100, 'status': 'Import complete!', 'success': True, 'message': f'Imported {imported}/{total} containers'}
 
         except Exception as e:
             _log.error(f"Import stream error: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield {'error': str(e)}
 
-    return Response(stream_with_context(generate()), mimetype='text/event-stream')
+    job = start_job('import', generate, resource='migration',
+                    title=f'Import {filename}', permission='migration.import')
+    return job_stream_response(job)
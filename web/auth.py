@@ -46,6 +46,7 @@ ROLE_PERMISSIONS = {
         'license.read', 'license.activate', 'license.deactivate',
         'system.read', 'system.update',
         'users.read', 'users.create', 'users.edit', 'users.delete',
+        'debug.read',
     },
     'operator': {
         'dashboard.read',
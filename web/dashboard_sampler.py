@@ -0,0 +1,290 @@
+# ORCHIX v1.4 - Shared dashboard sampler
+'''One background thread builds the dashboard snapshot every interval and
+publishes it to all SSE subscribers, so open tabs don't multiply docker load.
+Delta subscribers get one full snapshot, then only the fields that changed,
+with a full keyframe every KEYFRAME_INTERVAL samples.
+'''
+import json
+import queue
+import threading
+import time
+
+SAMPLE_INTERVAL = 3
+# Snapshots buffered per subscriber before it counts as a slow client
+SUBSCRIBER_BUFFER = 4
+# Stop sampling after this many idle intervals without subscribers
+_IDLE_INTERVALS = 10
+# Delta streams get a full snapshot every this many samples
+KEYFRAME_INTERVAL = 20
+
+
+class Subscription:
+    '''Bounded queue of serialized snapshots for one stream client.
+    channel may replace the queue with any object that has queue.Queue's
+    put_nowait/get_nowait semantics (the stream gateway uses one that hands
+    payloads to its event loop).
+    '''
+
+    def __init__(self, maxsize=SUBSCRIBER_BUFFER, mode='full', channel=None):
+        self.queue = channel if channel is not None else queue.Queue(maxsize=maxsize)
+        self.mode = mode     # 'full' or 'delta'
+        self.needs_keyframe = mode == 'delta'
+        self.dropped = False
+
+    def get(self, timeout=None):
+        '''Next JSON payload; None once the subscriber was dropped.
+        Raises queue.Empty on timeout.
+        '''
+        return self.queue.get(timeout=timeout)
+
+
+class DashboardSampler:
+    '''Samples dashboard data once per interval and fans it out.'''
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._sample_lock = threading.Lock()
+        self._subscribers = set()
+        self._thread = None
+        self._latest = None          # (timestamp, snapshot dict, json payload)
+        self._published = None       # (timestamp, snapshot dict, keyframe payload) last fanned out
+        self._since_keyframe = 0
+        self._net_state = {}         # previous network counters, owned by the sampler
+        self._container_net = {}     # name -> (time, rx, tx) for per-container rates
+        self._primed = False
+        self.persistent = False      # keep sampling without subscribers (history)
+        self.dropped_clients = 0
+
+    # ============ Sampling ============
+
+    def _build(self):
+        from web.api.dashboard import build_snapshot
+
+        with self._sample_lock:
+            if not self._primed:
+                # First psutil.cpu_percent() call always returns 0
+                import psutil
+                psutil.cpu_percent(interval=None)
+                time.sleep(0.1)
+                self._primed = True
+            try:
+                snapshot = build_snapshot(self._net_state)
+            except Exception as e:
+                snapshot = {'error': str(e)}
+            payload = json.dumps(snapshot)
+            self._latest = (time.time(), snapshot, payload)
+            if 'error' not in snapshot:
+                try:
+                    self._record_history(snapshot)
+                except Exception:
+                    pass
+            return snapshot, payload
+
+    def _record_history(self, snapshot):
+        '''Feed host and per-container series of the metrics history.'''
+        from utils.metrics_history import get_metrics_history
+
+        ts = snapshot['timestamp']
+        system = snapshot['system']
+        network = snapshot['network']
+        values = {
+            'host.cpu': system['cpu'],
+            'host.ram': system['ram_percent'],
+            'host.disk': system['disk_percent'],
+            'host.net_up': network['total_up'],
+            'host.net_down': network['total_down'],
+        }
+
+        seen = set()
+        for c in snapshot['containers']:
+            if not c['running']:
+                continue
+            name = c['name']
+            seen.add(name)
+            values[f'container.{name}.cpu'] = c.get('cpu')
+            values[f'container.{name}.mem'] = c.get('mem_used')
+            rx, tx = c.get('net_rx'), c.get('net_tx')
+            if rx is None or tx is None:
+                continue
+            prev = self._container_net.get(name)
+            self._container_net[name] = (ts, rx, tx)
+            if prev and ts > prev[0]:
+                elapsed = ts - prev[0]
+                values[f'container.{name}.net_rx'] = max(0, (rx - prev[1]) / elapsed)
+                values[f'container.{name}.net_tx'] = max(0, (tx - prev[2]) / elapsed)
+        for name in list(self._container_net):
+            if name not in seen:
+                del self._container_net[name]
+
+        get_metrics_history().record(values, ts)
+
+    def sample_now(self):
+        '''Build a fresh snapshot outside the loop (e.g. for /api/dashboard).'''
+        snapshot, _ = self._build()
+        return snapshot
+
+    def latest(self, max_age=None):
+        '''Most recent snapshot dict, or None if missing or older than max_age.'''
+        latest = self._latest
+        if not latest:
+            return None
+        if max_age is not None and time.time() - latest[0] > max_age:
+            return None
+        return latest[1]
+
+    def _run(self):
+        idle = 0
+        while True:
+            started = time.time()
+            with self._lock:
+                has_subscribers = bool(self._subscribers)
+            if has_subscribers or self.persistent:
+                idle = 0
+                snapshot, payload = self._build()
+                self._publish(snapshot, payload)
+            else:
+                idle += 1
+                if idle >= _IDLE_INTERVALS:
+                    with self._lock:
+                        if not self._subscribers and not self.persistent:
+                            self._thread = None
+                            return
+            time.sleep(max(0.0, self.interval - (time.time() - started)))
+
+    def _publish(self, snapshot, payload):
+        keyframe = json.dumps(dict(snapshot, type='full'))
+        delta = None
+        with self._lock:
+            prev = self._published
+            self._since_keyframe += 1
+            if prev is not None and self._since_keyframe < KEYFRAME_INTERVAL:
+                delta = diff_snapshot(prev[1], snapshot)
+            if delta is None:
+                self._since_keyframe = 0
+            # Set under the lock so a delta subscriber's base is never skipped
+            self._published = (time.time(), snapshot, keyframe)
+            subscribers = list(self._subscribers)
+
+        delta_payload = json.dumps(delta) if delta is not None else keyframe
+        for sub in subscribers:
+            if sub.mode == 'delta':
+                item = keyframe if sub.needs_keyframe else delta_payload
+                sub.needs_keyframe = False
+            else:
+                item = payload
+            try:
+                sub.queue.put_nowait(item)
+            except queue.Full:
+                self._drop(sub)
+
+    def _drop(self, sub):
+        '''Disconnect a subscriber that stopped draining its buffer.'''
+        with self._lock:
+            self._subscribers.discard(sub)
+            self.dropped_clients += 1
+        sub.dropped = True
+        try:
+            while True:
+                sub.queue.get_nowait()
+        except queue.Empty:
+            pass
+        sub.queue.put_nowait(None)
+
+    # ============ Subscribers ============
+
+    def _ensure_running(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='orchix-dashboard-sampler', daemon=True)
+                self._thread.start()
+
+    def start(self, persistent=True):
+        '''Start sampling now; persistent keeps it running with no subscribers.'''
+        self.persistent = persistent
+        self._ensure_running()
+
+    def subscribe(self, mode='full', channel=None):
+        '''Register a stream client. The latest snapshot is delivered right away.
+        mode='delta' streams changes against the previous sample after that.
+        '''
+        sub = Subscription(mode=mode, channel=channel)
+        with self._lock:
+            # Delta clients must start from the snapshot the next delta is based on
+            latest = self._published if mode == 'delta' else self._latest
+            if latest and time.time() - latest[0] < self.interval * 2:
+                sub.queue.put_nowait(latest[2])
+                sub.needs_keyframe = False
+            self._subscribers.add(sub)
+        self._ensure_running()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def subscriber_count(self):
+        with self._lock:
+            return len(self._subscribers)
+
+
+# ============ Deltas ============
+
+def _diff_fields(prev, cur):
+    '''Keys of cur whose value differs from prev.'''
+    return {k: v for k, v in cur.items() if prev.get(k) != v}
+
+
+def diff_snapshot(prev, cur):
+    '''Changes from prev to cur as a delta event, or None if a keyframe is needed.
+    Containers are keyed by name: changed rows carry only changed fields.
+    '''
+    if 'error' in prev or 'error' in cur:
+        return None
+
+    delta = {'type': 'delta', 'timestamp': cur['timestamp']}
+    for section in ('system', 'docker', 'network'):
+        changed = _diff_fields(prev.get(section) or {}, cur.get(section) or {})
+        if changed:
+            delta[section] = changed
+    if prev.get('alerts') != cur.get('alerts'):
+        delta['alerts'] = cur['alerts']
+
+    old = {c['name']: c for c in prev['containers']}
+    new = {c['name']: c for c in cur['containers']}
+    containers = {}
+    changed = {}
+    for name, row in new.items():
+        if name in old:
+            fields = _diff_fields(old[name], row)
+            if fields:
+                changed[name] = fields
+    if changed:
+        containers['changed'] = changed
+    added = [row for name, row in new.items() if name not in old]
+    if added:
+        containers['added'] = added
+    removed = [name for name in old if name not in new]
+    if removed:
+        containers['removed'] = removed
+    order = [c['name'] for c in cur['containers']]
+    if added or removed or order != [c['name'] for c in prev['containers']]:
+        containers['order'] = order
+    if containers:
+        delta['containers'] = containers
+    return delta
+
+
+# Global instance
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_sampler():
+    '''Get global dashboard sampler instance'''
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = DashboardSampler()
+    return _sampler
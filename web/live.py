@@ -0,0 +1,467 @@
+# ORCHIX v1.4 - Live WebSocket hub
+'''One WebSocket per browser tab at /api/live, multiplexing topic
+subscriptions over JSON text frames. Served from the stream gateway's event loop.
+
+Client -> server:  {"op": "subscribe", "topic": "dashboard", "params": {...}}
+                   {"op": "unsubscribe", "topic": "dashboard"}
+Server -> client:  {"topic": "dashboard", "data": ...}
+                   {"topic": "dashboard", "error": "..."}
+
+Topics: dashboard, containers (inventory events), logs:<container>, job:<id>.
+Other modules add theirs with register_topic().
+'''
+import asyncio
+import base64
+import hashlib
+import ipaddress
+import json
+import logging
+import os
+import struct
+import time
+from urllib.parse import parse_qs, urlsplit
+
+_log = logging.getLogger('orchix.live')
+
+_WS_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Largest client message accepted (subscriptions are tiny)
+_MAX_MESSAGE = 64 * 1024
+# Outgoing messages buffered per connection before it counts as a slow client
+_SEND_BUFFER = 256
+# Server ping interval; connections silent for two intervals are closed
+_PING_INTERVAL = 20
+# Log tail lines sent per message, and how long a batch may wait to fill
+_LOG_BATCH = 200
+_LOG_BATCH_WAIT = 0.1
+
+# topic or prefix -> (permission, provider coroutine, is_prefix)
+_topics = {}
+
+
+def register_topic(name, permission, provider, prefix=False):
+    '''Add a topic. provider(conn, topic, params) runs until unsubscribed
+    (it is cancelled) and publishes with conn.publish(topic, data).
+    prefix=True matches "<name><anything>" (e.g. "logs:" -> "logs:web").
+    '''
+    _topics[name] = (permission, provider, prefix)
+
+
+def _find_topic(topic):
+    entry = _topics.get(topic)
+    if entry and not entry[2]:
+        return entry
+    for name, entry in _topics.items():
+        if entry[2] and topic.startswith(name) and len(topic) > len(name):
+            return entry
+    return None
+
+
+# ============ Framing ============
+
+def accept_key(key):
+    digest = hashlib.sha1((key + _WS_GUID).encode('ascii')).digest()
+    return base64.b64encode(digest).decode('ascii')
+
+
+def _frame(opcode, payload=b''):
+    header = bytes([0x80 | opcode])
+    length = len(payload)
+    if length < 126:
+        header += bytes([length])
+    elif length < 65536:
+        header += bytes([126]) + struct.pack('!H', length)
+    else:
+        header += bytes([127]) + struct.pack('!Q', length)
+    return header + payload
+
+
+class _ProtocolError(Exception):
+    pass
+
+
+async def _read_frame(reader):
+    '''(fin, opcode, payload) of one client frame.'''
+    b0, b1 = await reader.readexactly(2)
+    fin, opcode = bool(b0 & 0x80), b0 & 0x0F
+    if not b1 & 0x80:
+        raise _ProtocolError('client frames must be masked')
+    length = b1 & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    if length > _MAX_MESSAGE:
+        raise _ProtocolError('message too large')
+    mask = await reader.readexactly(4)
+    data = await reader.readexactly(length)
+    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+    return fin, opcode, payload
+
+
+# ============ Connection ============
+
+class LiveConnection:
+    '''One client socket: reader, writer and ping tasks plus a task per topic.'''
+
+    def __init__(self, reader, writer, session):
+        self.reader = reader
+        self.writer = writer
+        self.session = session
+        self.outbox = asyncio.Queue(maxsize=_SEND_BUFFER)
+        self.subscriptions = {}      # topic -> asyncio.Task
+        self.last_seen = time.monotonic()
+        self.closed = False
+
+    def _send(self, opcode, payload):
+        if self.closed:
+            return
+        try:
+            self.outbox.put_nowait((opcode, payload))
+        except asyncio.QueueFull:
+            # Slow client: close rather than buffer without bound; it reconnects
+            self.close(1013, 'Client too slow')
+
+    def publish(self, topic, data):
+        self._send(OP_TEXT, json.dumps({'topic': topic, 'data': data}).encode('utf-8'))
+
+    def publish_raw(self, topic, data_json):
+        '''Publish an already serialized JSON payload without re-encoding it.'''
+        self._send(OP_TEXT, f'{{"topic": {json.dumps(topic)}, "data": {data_json}}}'.encode('utf-8'))
+
+    def error(self, topic, message):
+        self._send(OP_TEXT, json.dumps({'topic': topic, 'error': message}).encode('utf-8'))
+
+    def close(self, code=1000, reason=''):
+        if self.closed:
+            return
+        self.closed = True
+        for task in self.subscriptions.values():
+            task.cancel()
+        self.subscriptions.clear()
+        payload = struct.pack('!H', code) + reason.encode('utf-8')
+        try:
+            self.outbox.put_nowait((OP_CLOSE, payload))
+        except asyncio.QueueFull:
+            self.writer.close()
+
+    # ============ Subscriptions ============
+
+    def _allowed(self, permission):
+        from web.auth import ROLE_PERMISSIONS
+        return permission in ROLE_PERMISSIONS.get(self.session.get('role', 'viewer'), set())
+
+    def subscribe(self, topic, params):
+        if topic in self.subscriptions:
+            return
+        entry = _find_topic(topic)
+        if entry is None:
+            self.error(topic, 'Unknown topic')
+            return
+        permission, provider, _ = entry
+        if not self._allowed(permission):
+            self.error(topic, 'Permission denied')
+            return
+        self.subscriptions[topic] = asyncio.create_task(self._run_topic(provider, topic, params))
+
+    async def _run_topic(self, provider, topic, params):
+        try:
+            await provider(self, topic, params)
+        except asyncio.CancelledError:
+            raise
+        except ValueError as e:
+            self.error(topic, str(e))
+        except Exception:
+            _log.exception("Live topic %s failed", topic)
+            self.error(topic, 'Topic failed')
+        finally:
+            if self.subscriptions.get(topic) is asyncio.current_task():
+                del self.subscriptions[topic]
+
+    def unsubscribe(self, topic):
+        task = self.subscriptions.pop(topic, None)
+        if task:
+            task.cancel()
+
+    def _handle_message(self, payload):
+        try:
+            msg = json.loads(payload)
+            op, topic = msg.get('op'), msg.get('topic')
+        except (ValueError, AttributeError):
+            return
+        if not isinstance(topic, str):
+            return
+        if op == 'subscribe':
+            params = msg.get('params')
+            self.subscribe(topic, params if isinstance(params, dict) else {})
+        elif op == 'unsubscribe':
+            self.unsubscribe(topic)
+
+    # ============ Loops ============
+
+    async def _write_loop(self):
+        while True:
+            opcode, payload = await self.outbox.get()
+            self.writer.write(_frame(opcode, payload))
+            await self.writer.drain()
+            if opcode == OP_CLOSE:
+                return
+
+    async def _read_loop(self):
+        message = []
+        while not self.closed:
+            fin, opcode, payload = await _read_frame(self.reader)
+            self.last_seen = time.monotonic()
+            if opcode == OP_CLOSE:
+                self.close()
+                return
+            if opcode == OP_PING:
+                self._send(OP_PONG, payload)
+            elif opcode in (OP_TEXT, OP_CONT):
+                message.append(payload)
+                if sum(len(p) for p in message) > _MAX_MESSAGE:
+                    raise _ProtocolError('message too large')
+                if fin:
+                    self._handle_message(b''.join(message))
+                    message = []
+
+    async def _ping_loop(self):
+        while not self.closed:
+            await asyncio.sleep(_PING_INTERVAL)
+            if time.monotonic() - self.last_seen > 2 * _PING_INTERVAL:
+                self.close(1001, 'Ping timeout')
+                return
+            self._send(OP_PING, b'')
+
+    async def run(self):
+        reader_task = asyncio.create_task(self._read_loop())
+        writer_task = asyncio.create_task(self._write_loop())
+        ping_task = asyncio.create_task(self._ping_loop())
+        tasks = (reader_task, writer_task, ping_task)
+        try:
+            # Ends when the client goes away or once our close frame is written
+            await asyncio.wait({reader_task, writer_task}, return_when=asyncio.FIRST_COMPLETED)
+            if reader_task.done() and not reader_task.cancelled() \
+                    and isinstance(reader_task.exception(), _ProtocolError):
+                self.close(1002, str(reader_task.exception()))
+            self.close()
+            if not writer_task.done():
+                await asyncio.wait({writer_task}, timeout=2)
+        finally:
+            self.close()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+
+# ============ Handshake ============
+
+def _allowed_origins():
+    '''Extra origins from ORCHIX_ALLOWED_ORIGINS (comma-separated, e.g. https://orchix.example.com).'''
+    return {o.strip().rstrip('/').lower()
+            for o in os.getenv('ORCHIX_ALLOWED_ORIGINS', '').split(',') if o.strip()}
+
+
+def _is_loopback(ip):
+    try:
+        return ipaddress.ip_address(ip).is_loopback
+    except ValueError:
+        return False
+
+
+def _same_origin(request, peer_ip=''):
+    '''Reject cross-site WebSocket hijacking: Origin must match Host, the
+    X-Forwarded-Host set by a reverse proxy on this machine, or an entry of
+    ORCHIX_ALLOWED_ORIGINS.
+    '''
+    origin = request.header('origin')
+    if not origin:
+        return False
+    if origin.rstrip('/').lower() in _allowed_origins():
+        return True
+    hosts = [request.header('host')]
+    if _is_loopback(peer_ip):
+        hosts.append(request.header('x-forwarded-host').split(',')[0].strip())
+    netloc = urlsplit(origin).netloc.lower()
+    return any(h and h.lower() == netloc for h in hosts)
+
+
+def _valid_csrf(gateway, request, token):
+    from flask_wtf.csrf import validate_csrf
+    from wtforms import ValidationError
+    with gateway.app.test_request_context(request.path, headers={'Cookie': request.header('cookie')}):
+        try:
+            validate_csrf(token)
+            return True
+        except ValidationError:
+            return False
+
+
+async def serve_live(gateway, request, reader, writer):
+    '''Upgrade one request to a live connection and run it until it closes.'''
+    session = gateway._session(request)
+    if not session.get('authenticated'):
+        return await gateway._respond(writer, 401, {'error': 'Not authenticated'}, False)
+    token = (parse_qs(request.query).get('csrf') or [''])[0]
+    peer = writer.get_extra_info('peername')
+    if not _same_origin(request, peer[0] if peer else '') or not _valid_csrf(gateway, request, token):
+        return await gateway._respond(writer, 403, {'error': 'CSRF validation failed'}, False)
+    key = request.header('sec-websocket-key')
+    if not key or request.header('sec-websocket-version') != '13':
+        return await gateway._respond(writer, 400, {'error': 'Bad WebSocket handshake'}, False)
+
+    writer.write((
+        'HTTP/1.1 101 Switching Protocols\r\n'
+        'Upgrade: websocket\r\n'
+        'Connection: Upgrade\r\n'
+        f'Sec-WebSocket-Accept: {accept_key(key)}\r\n\r\n'
+    ).encode('latin-1'))
+    await writer.drain()
+
+    conn = LiveConnection(reader, writer, session)
+    gateway.open_streams += 1
+    try:
+        await conn.run()
+    finally:
+        gateway.open_streams -= 1
+    return False
+
+
+# ============ Topics ============
+
+async def _dashboard_topic(conn, topic, params):
+    from web.dashboard_sampler import SUBSCRIBER_BUFFER, get_sampler
+    from web.stream_gateway import LoopChannel
+
+    mode = 'delta' if params.get('mode') == 'delta' else 'full'
+    sampler = get_sampler()
+    channel = LoopChannel(asyncio.get_running_loop(), SUBSCRIBER_BUFFER)
+    sub = sampler.subscribe(mode=mode, channel=channel)
+    try:
+        while True:
+            payload = await channel.get()
+            if payload is None:
+                # Dropped by the sampler: start over from a keyframe
+                sub = sampler.subscribe(mode=mode, channel=channel)
+                continue
+            conn.publish_raw(topic, payload)
+    finally:
+        sampler.unsubscribe(sub)
+
+
+async def _containers_topic(conn, topic, params):
+    '''Container lifecycle events from the inventory, limited to visible containers.'''
+    from utils.container_inventory import get_inventory
+    from web.api.containers import _get_visible_container_names
+    from web.stream_gateway import LoopChannel
+
+    loop = asyncio.get_running_loop()
+    channel = LoopChannel(loop, _SEND_BUFFER)
+
+    def on_event(event):
+        try:
+            channel.put_nowait(event)
+        except Exception:
+            pass
+
+    inventory = get_inventory()
+    inventory.add_listener(on_event)
+    try:
+        visible, visible_at = None, 0
+        while True:
+            event = await channel.get()
+            if event is None or event['type'] not in ('container', 'inventory'):
+                continue
+            if event['type'] == 'container':
+                if time.monotonic() - visible_at > 30:
+                    visible = set(await loop.run_in_executor(None, _get_visible_container_names))
+                    visible_at = time.monotonic()
+                if event['name'] not in visible:
+                    continue
+            conn.publish(topic, event)
+    finally:
+        inventory.remove_listener(on_event)
+
+
+async def _logs_topic(conn, topic, params):
+    '''Follow a container's logs; lines arrive in batches.'''
+    from utils.validation import validate_container_name
+    from web.api.containers import _is_visible_container
+
+    name = validate_container_name(topic.split(':', 1)[1])
+    loop = asyncio.get_running_loop()
+    if not await loop.run_in_executor(None, _is_visible_container, name):
+        raise ValueError('Container not in managed set')
+    try:
+        tail = min(max(int(params.get('tail', 0)), 0), 10000)
+    except (TypeError, ValueError):
+        tail = 0
+
+    try:
+        proc = await asyncio.create_subprocess_exec(
+            'docker', 'logs', '--follow', '--tail', str(tail), name,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            stdin=asyncio.subprocess.DEVNULL,
+        )
+    except OSError:
+        raise ValueError('Docker unavailable')
+
+    try:
+        while True:
+            line = await proc.stdout.readline()
+            if not line:
+                break
+            batch = [line]
+            deadline = loop.time() + _LOG_BATCH_WAIT
+            while len(batch) < _LOG_BATCH and loop.time() < deadline:
+                try:
+                    line = await asyncio.wait_for(proc.stdout.readline(), deadline - loop.time())
+                except asyncio.TimeoutError:
+                    break
+                if not line:
+                    break
+                batch.append(line)
+            conn.publish(topic, {'lines': [b.decode('utf-8', errors='replace').rstrip('\n') for b in batch]})
+        conn.publish(topic, {'ended': True})
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+async def _job_topic(conn, topic, params):
+    '''Progress events of one job; params.after resumes after that event.'''
+    from core.jobs import get_job_manager
+    from web.stream_gateway import LoopChannel
+
+    job = get_job_manager().get(topic.split(':', 1)[1])
+    if job is None or (job.permission and not conn._allowed(job.permission)):
+        raise ValueError('Job not found')
+    try:
+        last = max(int(params.get('after', 0)), 0)
+    except (TypeError, ValueError):
+        last = 0
+
+    channel = LoopChannel(asyncio.get_running_loop(), _SEND_BUFFER)
+    job.subscribe(channel, last)
+    try:
+        while True:
+            item = await channel.get()
+            if item is None:
+                if job.done and last >= job.last_seq:
+                    conn.publish(topic, {'ended': True, 'state': job.state})
+                    return
+                job.subscribe(channel, last)
+                continue
+            last = item[0]
+            conn.publish(topic, {'seq': item[0], 'event': item[1]})
+    finally:
+        job.unsubscribe(channel)
+
+
+register_topic('dashboard', 'dashboard.read', _dashboard_topic)
+register_topic('containers', 'containers.read', _containers_topic)
+register_topic('logs:', 'containers.logs', _logs_topic, prefix=True)
+# Any role may ask; _job_topic checks the permission the job was started with
+register_topic('job:', 'dashboard.read', _job_topic, prefix=True)
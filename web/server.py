@@ -13,6 +13,26 @@ def _secure_file(path):
         pass  # Windows handles permissions differently
 
 
+def security_headers():
+    """Headers added to every response (also used by the stream gateway)."""
+    headers = {
+        'X-Content-Type-Options': 'nosniff',
+        'X-Frame-Options': 'DENY',
+        'Referrer-Policy': 'strict-origin-when-cross-origin',
+        'Content-Security-Policy': (
+            "default-src 'self'; "
+            "script-src 'self'; "
+            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
+            "font-src 'self' https://fonts.gstatic.com; "
+            "img-src 'self' data:; "
+            "connect-src 'self'"
+        ),
+    }
+    if os.environ.get('ORCHIX_HTTPS', '').lower() == 'true':
+        headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+    return headers
+
+
 def create_app():
     app = Flask(
         __name__,
@@ -48,19 +68,7 @@ def create_app():
     # Security headers
     @app.after_request
     def set_security_headers(response):
-        response.headers['X-Content-Type-Options'] = 'nosniff'
-        response.headers['X-Frame-Options'] = 'DENY'
-        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        response.headers['Content-Security-Policy'] = (
-            "default-src 'self'; "
-            "script-src 'self'; "
-            "style-src 'self' 'unsafe-inline' https://fonts.googleapis.com; "
-            "font-src 'self' https://fonts.gstatic.com; "
-            "img-src 'self' data:; "
-            "connect-src 'self'"
-        )
-        if os.environ.get('ORCHIX_HTTPS', '').lower() == 'true':
-            response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+        response.headers.update(security_headers())
         return response
 
     # Register auth blueprint
@@ -76,6 +84,9 @@ def create_app():
     from web.api.license import bp as license_bp
     from web.api.system import bp as system_bp
     from web.api.migration import bp as migration_bp
+    from web.api.metrics import bp as metrics_bp
+    from web.api.debug import bp as debug_bp
+    from web.api.jobs import bp as jobs_bp
 
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(containers_bp)
@@ -85,6 +96,9 @@ def create_app():
     app.register_blueprint(license_bp)
     app.register_blueprint(system_bp)
     app.register_blueprint(migration_bp)
+    app.register_blueprint(metrics_bp)
+    app.register_blueprint(debug_bp)
+    app.register_blueprint(jobs_bp)
 
     from web.api.users import bp as users_bp
     app.register_blueprint(users_bp)
@@ -125,13 +139,33 @@ def run_web(host='0.0.0.0', port=5000):
     ensure_users_exist()
 
     app = create_app()
+
+    # Keep the container inventory current from docker events for the server's lifetime
+    from utils.container_inventory import get_inventory
+    get_inventory().start_watching()
+
+    # Sample continuously so /api/metrics/history has data without open dashboards
+    from web.dashboard_sampler import get_sampler
+    get_sampler().start(persistent=True)
+
+    # Streams are served by the asyncio gateway unless ORCHIX_STREAM_GATEWAY=false
+    use_gateway = os.environ.get('ORCHIX_STREAM_GATEWAY', '').lower() not in ('0', 'false', 'no')
+
     print(f"\n  Listening  : http://{host}:{port}", flush=True)
-    print(f"  Server     : Waitress  (threads=8)", flush=True)
+    if use_gateway:
+        print(f"  Server     : asyncio stream gateway + Waitress  (threads=8)", flush=True)
+    else:
+        print(f"  Server     : Waitress  (threads=8)", flush=True)
     if not is_tty:
         print(f"  Log file   : ~/.orchix_configs/orchix.log", flush=True)
         print(f"{'-' * 72}\n", flush=True)
     else:
         print("", flush=True)
 
+    if use_gateway:
+        from web.stream_gateway import serve as serve_gateway
+        serve_gateway(app, host=host, port=port)
+        return
+
     from waitress import serve
     serve(app, host=host, port=port, threads=8, channel_timeout=120)
@@ -350,48 +350,25 @@ async function doInstall(appName, fields) {
             })
         });
 
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
-        let buffer = '';
         let finalResult = null;
+        let failed = false;
 
-        while (true) {
-            const { value, done } = await reader.read();
-            if (done) break;
-
-            buffer += decoder.decode(value, { stream: true });
-            const lines = buffer.split('\n');
-            buffer = lines.pop() || '';
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    const data = JSON.parse(line.substring(6));
-
-                    if (data.error) {
-                        hideProgressModal();
-                        window._installFlow = null;
-                        showToast('error', data.error);
-                        return;
-                    }
-
-                    if (data.progress !== undefined) {
-                        updateProgressBar(data.progress, data.status || '');
-                    }
-
-                    if (data.success) {
-                        finalResult = data;
-                    }
-                }
+        await readJobStream(response, data => {
+            if (data.error) {
+                hideProgressModal();
+                window._installFlow = null;
+                showToast('error', data.error);
+                failed = true;
+                return true;
+            }
+            if (data.progress !== undefined) {
+                updateProgressBar(data.progress, data.status || '');
             }
-        }
-
-        // Process remaining buffer at end of stream
-        if (buffer.trim() && buffer.startsWith('data: ')) {
-            const data = JSON.parse(buffer.substring(6));
             if (data.success) {
                 finalResult = data;
             }
-        }
+        });
+        if (failed) return;
 
         hideProgressModal();
 
@@ -572,7 +549,22 @@ async function doCreateBackup() {
     window._backupFlow = true;
 
     updateProgressBar(20, 'Stopping container if needed...');
-    const res = await API.post('/api/backups/create', { container_name: name });
+    let res = await API.post('/api/backups/create', { container_name: name });
+
+    if (res && res.job_id) {
+        // Runs as a background job; wait for its final event
+        const jobId = res.job_id;
+        res = null;
+        try {
+            await followJob(jobId, data => {
+                if (data.progress !== undefined) updateProgressBar(Math.max(20, data.progress), data.status || '');
+                if (data.error !== undefined) res = { success: false, message: data.error };
+                else if (data.success !== undefined) res = data;
+            });
+        } catch (err) {
+            res = { success: false, message: 'Backup failed: ' + err.message };
+        }
+    }
 
     if (res && res.success) {
         updateProgressBar(100, 'Backup created!');
@@ -908,33 +900,18 @@ async function doExport() {
             })
         });
 
-        if (!response.ok) {
-            throw new Error('Export failed');
-        }
-
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
         let finalResult = null;
 
-        while (true) {
-            const { done, value } = await reader.read();
-            if (done) break;
-
-            const text = decoder.decode(value);
-            const lines = text.split('\n');
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    const data = JSON.parse(line.substring(6));
-
-                    updateProgressBar(data.progress, data.status || 'Processing...');
-
-                    if (data.progress === 100) {
-                        finalResult = data;
-                    }
-                }
+        await readJobStream(response, data => {
+            if (data.error) {
+                finalResult = { success: false, status: data.error };
+                return true;
             }
-        }
+            updateProgressBar(data.progress, data.status || 'Processing...');
+            if (data.progress === 100) {
+                finalResult = data;
+            }
+        });
 
         window._exportFlow = false;
         hideModal();
@@ -998,48 +975,25 @@ async function doImport() {
             body: JSON.stringify({ filename: filename })
         });
 
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
-        let buffer = '';
         let finalResult = null;
-
-        while (true) {
-            const { value, done } = await reader.read();
-            if (done) break;
-
-            buffer += decoder.decode(value, { stream: true });
-            const lines = buffer.split('\n');
-            buffer = lines.pop() || '';
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    const data = JSON.parse(line.substring(6));
-
-                    if (data.error) {
-                        hideProgressModal();
-                        window._importFlow = null;
-                        showToast('error', data.error);
-                        return;
-                    }
-
-                    if (data.progress !== undefined) {
-                        updateProgressBar(data.progress, data.status || '');
-                    }
-
-                    if (data.success) {
-                        finalResult = data;
-                    }
-                }
+        let failed = false;
+
+        await readJobStream(response, data => {
+            if (data.error) {
+                hideProgressModal();
+                window._importFlow = null;
+                showToast('error', data.error);
+                failed = true;
+                return true;
+            }
+            if (data.progress !== undefined) {
+                updateProgressBar(data.progress, data.status || '');
             }
-        }
-
-        // Process remaining buffer
-        if (buffer.trim() && buffer.trim().startsWith('data: ')) {
-            const data = JSON.parse(buffer.trim().substring(6));
             if (data.success) {
                 finalResult = data;
             }
-        }
+        });
+        if (failed) return;
 
         hideProgressModal();
         window._importFlow = null;
@@ -26,6 +26,15 @@ Router.register('#/containers', async function(el) {
         <div id="containers-list"><div class="loading"><span class="spinner"></span> Loading containers...</div></div>
     `;
     await refreshContainers();
+
+    // Refresh on container start/stop/create/destroy events (debounced)
+    let pending = null;
+    Router.currentSSE = Live.subscribe('containers', {
+        onMessage: () => {
+            clearTimeout(pending);
+            pending = setTimeout(refreshContainers, 500);
+        }
+    });
 });
 
 const _CLI_MAP = {
@@ -221,12 +230,31 @@ async function viewContainerLogs(name) {
         const logContent = (res.logs || '') + (res.stderr ? '\n--- STDERR ---\n' + res.stderr : '');
         showModal(
             'Logs: ' + name,
-            `<div class="logs-viewer">${esc(logContent || 'No logs available')}</div>`,
+            `<div class="logs-viewer" id="logs-viewer">${esc(logContent || 'No logs available')}</div>`,
             [{ label: 'Close', cls: 'btn-primary' }]
         );
+        followContainerLogs(name);
     }
 }
 
+// Append new log lines while the logs modal is open
+function followContainerLogs(name) {
+    const MAX_CHARS = 500000;
+    const live = Live.subscribe('logs:' + name, {
+        params: { tail: 0 },
+        onMessage: (data) => {
+            const viewer = document.getElementById('logs-viewer');
+            if (!viewer || !data.lines || data.lines.length === 0) return;
+            const atBottom = viewer.scrollTop + viewer.clientHeight >= viewer.scrollHeight - 20;
+            let text = viewer.textContent + '\n' + data.lines.join('\n');
+            if (text.length > MAX_CHARS) text = text.slice(text.length - MAX_CHARS);
+            viewer.textContent = text;
+            if (atBottom) viewer.scrollTop = viewer.scrollHeight;
+        }
+    });
+    onModalClose(() => live.close());
+}
+
 async function viewContainerDetails(name) {
     showModal('Inspect: ' + name, '<div class="loading"><span class="spinner"></span> Loading...</div>', []);
     const res = await API.get(`/api/containers/${name}/inspect`);
@@ -276,39 +304,24 @@ async function doUninstall(name) {
             }
         });
 
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
-        let buffer = '';
         let finalResult = null;
-
-        while (true) {
-            const { value, done } = await reader.read();
-            if (done) break;
-
-            buffer += decoder.decode(value, { stream: true });
-            const lines = buffer.split('\n');
-            buffer = lines.pop() || '';
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    const data = JSON.parse(line.substring(6));
-
-                    if (data.error) {
-                        hideProgressModal();
-                        showToast('error', data.error);
-                        return;
-                    }
-
-                    if (data.progress !== undefined) {
-                        updateProgressBar(data.progress, data.status || '');
-                    }
-
-                    if (data.success) {
-                        finalResult = data;
-                    }
-                }
+        let failed = false;
+
+        await readJobStream(response, data => {
+            if (data.error) {
+                hideProgressModal();
+                showToast('error', data.error);
+                failed = true;
+                return true;
             }
-        }
+            if (data.progress !== undefined) {
+                updateProgressBar(data.progress, data.status || '');
+            }
+            if (data.success) {
+                finalResult = data;
+            }
+        });
+        if (failed) return;
 
         hideProgressModal();
 
@@ -363,39 +376,24 @@ async function doUpdate(name, updateType) {
             })
         });
 
-        const reader = response.body.getReader();
-        const decoder = new TextDecoder();
-        let buffer = '';
         let finalResult = null;
-
-        while (true) {
-            const { value, done } = await reader.read();
-            if (done) break;
-
-            buffer += decoder.decode(value, { stream: true });
-            const lines = buffer.split('\n');
-            buffer = lines.pop() || '';
-
-            for (const line of lines) {
-                if (line.startsWith('data: ')) {
-                    const data = JSON.parse(line.substring(6));
-
-                    if (data.error) {
-                        hideProgressModal();
-                        showToast('error', data.error);
-                        return;
-                    }
-
-                    if (data.progress !== undefined) {
-                        updateProgressBar(data.progress, data.status || '');
-                    }
-
-                    if (data.success) {
-                        finalResult = data;
-                    }
-                }
+        let failed = false;
+
+        await readJobStream(response, data => {
+            if (data.error) {
+                hideProgressModal();
+                showToast('error', data.error);
+                failed = true;
+                return true;
             }
-        }
+            if (data.progress !== undefined) {
+                updateProgressBar(data.progress, data.status || '');
+            }
+            if (data.success) {
+                finalResult = data;
+            }
+        });
+        if (failed) return;
 
         hideProgressModal();
 
@@ -110,14 +110,19 @@ Router.register('#/dashboard', function(el) {
     // Load system overview data
     loadSystemOverview();
 
-    // Start SSE connection
-    const source = new EventSource('/api/dashboard/stream');
-    Router.currentSSE = source;
-
-    source.onmessage = function(event) {
-        let d;
-        try { d = JSON.parse(event.data); } catch (e) { return; }
-        if (d.error) return;
+    // Live updates
+    let state = null;
+
+    const onDashboard = function(msg) {
+        if (msg.error) return;
+        if (msg.type === 'delta') {
+            if (!state) return;
+            applyDashDelta(state, msg);
+        } else {
+            state = msg;
+        }
+        const d = state;
+        const tableChanged = msg.type !== 'delta' || !!msg.containers;
 
         // Connection status
         const statusEl = document.getElementById('sse-status');
@@ -207,6 +212,7 @@ Router.register('#/dashboard', function(el) {
         }
 
         // Container table
+        if (!tableChanged) return;
         const tbody = document.getElementById('container-tbody');
         if (d.containers.length === 0) {
             tbody.innerHTML = '<tr><td colspan="9" class="empty-state">No containers found</td></tr>';
@@ -222,9 +228,9 @@ Router.register('#/dashboard', function(el) {
                         ${c.running ? 'Running' : 'Stopped'}
                     </span>
                 </td>
-                <td class="${getCpuClass(c.cpu)}">${esc(c.cpu)}</td>
-                <td>${esc(c.memory)}</td>
-                <td>${esc(c.net_io)}</td>
+                <td class="${getCpuClass(c.cpu)}">${c.cpu == null ? '-' : c.cpu.toFixed(2) + '%'}</td>
+                <td>${c.mem_used == null ? '-' : formatBytes(c.mem_used) + ' / ' + formatBytes(c.mem_limit)}</td>
+                <td>${c.net_rx == null ? '-' : formatBytes(c.net_rx) + ' / ' + formatBytes(c.net_tx)}</td>
                 <td><code style="font-size:11px;color:var(--text3)">${esc(c.ports)}</code></td>
                 <td style="font-size:11px;color:var(--text3)">${esc(c.image)}</td>
                 <td>
@@ -241,13 +247,50 @@ Router.register('#/dashboard', function(el) {
         `).join('');
     };
 
-    source.onerror = function() {
+    const showReconnecting = function() {
         const statusEl = document.getElementById('sse-status');
+        if (!statusEl) return;
         statusEl.textContent = 'Reconnecting...';
         statusEl.className = 'connection-status disconnected';
     };
+
+    // Delta mode: one full snapshot, then only changed fields
+    Router.currentSSE = Live.subscribe('dashboard', {
+        params: { mode: 'delta' },
+        onMessage: onDashboard,
+        onStatus: (connected) => { if (!connected) showReconnecting(); },
+        fallback: () => {
+            const source = new EventSource('/api/dashboard/stream?mode=delta');
+            source.onmessage = function(event) {
+                let msg;
+                try { msg = JSON.parse(event.data); } catch (e) { return; }
+                onDashboard(msg);
+            };
+            source.onerror = showReconnecting;
+            return source;
+        }
+    });
 });
 
+function applyDashDelta(state, delta) {
+    ['system', 'docker', 'network'].forEach(k => {
+        if (delta[k]) state[k] = Object.assign(state[k] || {}, delta[k]);
+    });
+    if (delta.alerts) state.alerts = delta.alerts;
+    state.timestamp = delta.timestamp;
+
+    const c = delta.containers;
+    if (!c) return;
+    const byName = {};
+    state.containers.forEach(row => { byName[row.name] = row; });
+    Object.entries(c.changed || {}).forEach(([name, fields]) => {
+        if (byName[name]) Object.assign(byName[name], fields);
+    });
+    (c.added || []).forEach(row => { byName[row.name] = row; });
+    (c.removed || []).forEach(name => { delete byName[name]; });
+    if (c.order) state.containers = c.order.map(name => byName[name]).filter(Boolean);
+}
+
 function updateMetric(id, value) {
     const bar = document.getElementById(id + '-bar');
     if (!bar) return;
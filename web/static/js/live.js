@@ -0,0 +1,116 @@
+// ORCHIX v1.4 - Live connection
+// One WebSocket per tab (/api/live) carrying every live topic: dashboard,
+// container events, log tails, job progress. Reconnects with jittered backoff
+// and resubscribes; when WebSockets are not available (e.g. the stream gateway
+// is disabled) subscribers fall back to their own HTTP stream.
+
+const Live = {
+    socket: null,
+    topics: {},          // topic -> { params, subscribers: Set }
+    retry: 0,
+    everOpened: false,
+    unsupported: false,
+    reconnectTimer: null,
+
+    // opts: { params, onMessage(data), onError(message), onStatus(connected), fallback() -> closable }
+    subscribe(topic, opts) {
+        const sub = { opts, fallbackHandle: null, closed: false };
+        sub.close = () => this._unsubscribe(topic, sub);
+
+        if (this.unsupported) {
+            this._startFallback(sub);
+            return sub;
+        }
+        let entry = this.topics[topic];
+        if (!entry) {
+            entry = this.topics[topic] = { params: opts.params || {}, subscribers: new Set() };
+            this._send({ op: 'subscribe', topic, params: entry.params });
+        }
+        entry.subscribers.add(sub);
+        this._connect();
+        return sub;
+    },
+
+    _unsubscribe(topic, sub) {
+        sub.closed = true;
+        if (sub.fallbackHandle) {
+            sub.fallbackHandle.close();
+            sub.fallbackHandle = null;
+        }
+        const entry = this.topics[topic];
+        if (!entry || !entry.subscribers.delete(sub)) return;
+        if (entry.subscribers.size === 0) {
+            delete this.topics[topic];
+            this._send({ op: 'unsubscribe', topic });
+        }
+    },
+
+    _startFallback(sub) {
+        if (!sub.closed && sub.opts.fallback) sub.fallbackHandle = sub.opts.fallback();
+    },
+
+    _send(msg) {
+        if (this.socket && this.socket.readyState === WebSocket.OPEN) {
+            this.socket.send(JSON.stringify(msg));
+        }
+    },
+
+    _connect() {
+        if (this.socket || this.reconnectTimer || this.unsupported) return;
+        const proto = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const url = `${proto}//${location.host}/api/live?csrf=${encodeURIComponent(getCsrfToken())}`;
+        let socket;
+        try { socket = new WebSocket(url); } catch (e) { this._giveUp(); return; }
+        this.socket = socket;
+
+        socket.onopen = () => {
+            this.retry = 0;
+            this.everOpened = true;
+            Object.entries(this.topics).forEach(([topic, entry]) => {
+                socket.send(JSON.stringify({ op: 'subscribe', topic, params: entry.params }));
+            });
+            this._status(true);
+        };
+
+        socket.onmessage = (event) => {
+            let msg;
+            try { msg = JSON.parse(event.data); } catch (e) { return; }
+            const entry = this.topics[msg.topic];
+            if (!entry) return;
+            entry.subscribers.forEach(sub => {
+                if (msg.error !== undefined) {
+                    if (sub.opts.onError) sub.opts.onError(msg.error);
+                } else if (sub.opts.onMessage) {
+                    sub.opts.onMessage(msg.data);
+                }
+            });
+        };
+
+        socket.onclose = () => {
+            this.socket = null;
+            if (!this.everOpened) { this._giveUp(); return; }
+            this._status(false);
+            if (Object.keys(this.topics).length === 0) return;
+            // Jittered backoff so a server restart doesn't get every tab at once
+            const delay = Math.min(30000, 1000 * Math.pow(2, this.retry++)) * (0.5 + Math.random() / 2);
+            this.reconnectTimer = setTimeout(() => {
+                this.reconnectTimer = null;
+                if (Object.keys(this.topics).length > 0) this._connect();
+            }, delay);
+        };
+    },
+
+    _status(connected) {
+        Object.values(this.topics).forEach(entry => entry.subscribers.forEach(sub => {
+            if (sub.opts.onStatus) sub.opts.onStatus(connected);
+        }));
+    },
+
+    _giveUp() {
+        // Never connected: no WebSocket endpoint here, use per-feature streams
+        this.unsupported = true;
+        const topics = this.topics;
+        this.topics = {};
+        Object.values(topics).forEach(entry => entry.subscribers.forEach(sub => this._startFallback(sub)));
+    }
+};
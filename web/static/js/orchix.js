@@ -119,7 +119,21 @@ function showToast(type, message) {
 window._installFlow = null; // { containerName: 'xxx' } when install is in progress
 window._importFlow = null; // true when import is in progress
 
+// Cleanup for the open modal (e.g. stop a live log tail), run when it closes or is replaced
+let _modalCleanup = null;
+
+function onModalClose(fn) {
+    _modalCleanup = fn;
+}
+
+function _runModalCleanup() {
+    const fn = _modalCleanup;
+    _modalCleanup = null;
+    if (fn) fn();
+}
+
 function showModal(title, bodyHtml, actions) {
+    _runModalCleanup();
     const overlay = document.getElementById('modal-overlay');
     const modal = document.getElementById('modal-content');
     modal.innerHTML = `
@@ -151,6 +165,7 @@ function showModal(title, bodyHtml, actions) {
 }
 
 function hideModal() {
+    _runModalCleanup();
     document.getElementById('modal-overlay').classList.add('hidden');
     document.getElementById('modal-content').classList.remove('wide');
 }
@@ -268,6 +283,147 @@ function updateProgressBar(progress, status) {
     if (percentEl) percentEl.textContent = progress + '%';
 }
 
+// ============ Jobs ============
+// Installs, updates, uninstalls, backups and migrations run as server-side jobs.
+// Their progress arrives on the live WebSocket (topic job:<id>, resuming after
+// the last seen event on reconnect). Without WebSockets the job's SSE stream
+// (id: <seq>, data: {...}) is read instead, reattaching if it drops.
+
+function _isFinalJobEvent(data) {
+    return data.error !== undefined || data.success !== undefined;
+}
+
+// Calls onMessage(seq, data) per message; resolves true once a final event
+// was seen or onMessage returned true
+async function _readJobEvents(response, onMessage) {
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) return false;
+        buffer += decoder.decode(value, { stream: true });
+        const messages = buffer.split('\n\n');
+        buffer = messages.pop() || '';
+        for (const message of messages) {
+            let seq = 0, data = null;
+            for (const line of message.split('\n')) {
+                if (line.startsWith('id: ')) seq = parseInt(line.substring(4)) || 0;
+                else if (line.startsWith('data: ')) data = JSON.parse(line.substring(6));
+            }
+            if (!data) continue;
+            if (onMessage(seq, data) === true || _isFinalJobEvent(data)) {
+                reader.cancel();
+                return true;
+            }
+        }
+    }
+}
+
+// SSE fallback: read a job stream (or open one after `after`) until its final
+// event, reattaching when the connection drops mid-job
+async function _readJobHttp(jobId, after, onMessage, response) {
+    let lastSeq = after;
+    let retries = 0;
+    while (true) {
+        let received = 0;
+        try {
+            if (!response) {
+                response = await fetch(`/api/jobs/${jobId}/stream?after=${lastSeq}`);
+                if (!response.ok) throw new Error('Lost connection to the job');
+            }
+            const finished = await _readJobEvents(response, (seq, data) => {
+                if (seq) lastSeq = seq;
+                received++;
+                return onMessage(seq, data);
+            });
+            if (finished) return;
+        } catch (err) {
+            if (retries >= 5) throw err;
+        }
+        // Dropped mid-job (proxy timeout, network blip): reattach after the last event
+        response = null;
+        if (received) retries = 0;
+        else if (++retries > 5) throw new Error('Lost connection to the job');
+        await new Promise(r => setTimeout(r, 1000 * retries));
+    }
+}
+
+// Follow a job until its final event; onEvent(data) may return true to stop
+// early. Closing the page does not stop the job.
+function followJob(jobId, onEvent) {
+    _showJobCancel(jobId);
+    return new Promise((resolve, reject) => {
+        // Live resends these params when it resubscribes after a reconnect
+        const params = { after: 0 };
+        let settled = false;
+        let sub = null;
+        const finish = (err) => {
+            if (settled) return;
+            settled = true;
+            if (sub) sub.close();
+            if (err) reject(err); else resolve();
+        };
+        const handle = (seq, data) => {
+            if (settled) return true;
+            if (seq) params.after = seq;
+            if (onEvent(data) === true || _isFinalJobEvent(data)) {
+                finish();
+                return true;
+            }
+            return false;
+        };
+        sub = Live.subscribe('job:' + jobId, {
+            params,
+            onMessage: (msg) => {
+                if (msg.ended) finish();
+                else handle(msg.seq, msg.event);
+            },
+            onError: (message) => finish(new Error(message)),
+            fallback: () => {
+                _readJobHttp(jobId, params.after, handle).then(() => finish(), finish);
+                return { close() { settled = true; } };
+            }
+        });
+    });
+}
+
+// Follow a job started by an endpoint that answers with its stream. When the
+// live connection is usable the response is dropped and the job followed there.
+async function readJobStream(response, onEvent) {
+    if (!response.ok) {
+        const body = await response.json().catch(() => ({}));
+        throw new Error(body.error || body.message || `HTTP ${response.status}`);
+    }
+    const jobId = response.headers.get('X-Job-Id');
+    if (!jobId) {
+        await _readJobEvents(response, (seq, data) => onEvent(data));
+        return;
+    }
+    if (!Live.unsupported) {
+        response.body.cancel().catch(() => {});
+        return followJob(jobId, onEvent);
+    }
+    _showJobCancel(jobId);
+    await _readJobHttp(jobId, 0, (seq, data) => onEvent(data), response);
+}
+
+function _showJobCancel(jobId) {
+    const percentEl = document.getElementById('progress-percent');
+    if (!percentEl || document.getElementById('progress-cancel')) return;
+    const btn = document.createElement('button');
+    btn.id = 'progress-cancel';
+    btn.className = 'btn';
+    btn.style.marginTop = '16px';
+    btn.textContent = 'Cancel';
+    btn.onclick = async () => {
+        btn.disabled = true;
+        btn.textContent = 'Cancelling...';
+        await API.post(`/api/jobs/${jobId}/cancel`);
+    };
+    percentEl.after(btn);
+}
+
 function getCpuClass(val) {
     const num = parseFloat(val);
     if (isNaN(num)) return '';
@@ -0,0 +1,450 @@
+# ORCHIX v1.4 - Asyncio stream gateway
+'''Front server on the public port. Long-lived event streams are served from
+one asyncio event loop instead of holding a Waitress worker thread each;
+every other request is proxied to Waitress on a loopback port.
+
+- /api/live: WebSocket with topic subscriptions (web/live.py)
+- /api/dashboard/stream: served natively, fed by the shared dashboard sampler
+- job progress streams (install/update/uninstall/migration): the Flask view
+  submits the job and hands the stream back with an X-Orchix-Job-Stream header
+- everything else: proxied to the Waitress pool (threads=8)
+'''
+import asyncio
+import collections
+import json
+import logging
+import queue
+import threading
+from urllib.parse import parse_qs
+
+_log = logging.getLogger('orchix.gateway')
+
+API_THREADS = 8
+
+_MAX_HEAD = 64 * 1024
+_CHUNK = 64 * 1024
+# Idle keep-alive connections are closed after this (matches Waitress channel_timeout)
+_IDLE_TIMEOUT = 120
+# SSE comment sent on quiet streams so proxies and browsers keep them open
+_KEEPALIVE = 15
+# Job events buffered per stream before it has to catch up from the job's log
+_JOB_BUFFER = 256
+# Not forwarded between client and upstream
+_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-connection', 'te', 'trailer', 'upgrade',
+    'expect', 'x-forwarded-for', 'x-orchix-gateway', 'x-orchix-job-stream',
+}
+
+
+class LoopChannel:
+    '''queue.Queue-like handoff from a worker thread to a coroutine.
+    put_nowait is thread-safe and wakes the waiting coroutine on the loop.
+    '''
+
+    def __init__(self, loop, maxsize):
+        self._loop = loop
+        self._maxsize = maxsize
+        self._items = collections.deque()
+        self._lock = threading.Lock()
+        self._ready = asyncio.Event()
+
+    def put_nowait(self, item):
+        with self._lock:
+            # None (end of stream) is always accepted
+            if item is not None and len(self._items) >= self._maxsize:
+                raise queue.Full
+            self._items.append(item)
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            raise queue.Full  # loop closed: the producer should drop us
+
+    def get_nowait(self):
+        with self._lock:
+            if not self._items:
+                raise queue.Empty
+            return self._items.popleft()
+
+    async def get(self):
+        while True:
+            try:
+                return self.get_nowait()
+            except queue.Empty:
+                pass
+            self._ready.clear()
+            with self._lock:
+                if self._items:
+                    continue
+            await self._ready.wait()
+
+
+# ============ HTTP parsing ============
+
+class _Request:
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.target = target
+        self.version = version
+        self.headers = headers      # [(name, value), ...] in received order
+        self.path, _, self.query = target.partition('?')
+
+    def header(self, name, default=''):
+        return _header(self.headers, name, default)
+
+    @property
+    def keep_alive(self):
+        connection = self.header('connection').lower()
+        if self.version == 'HTTP/1.0':
+            return 'keep-alive' in connection
+        return 'close' not in connection
+
+
+def _parse_head(data):
+    '''(first line parts, [(name, value), ...]) or None when malformed.'''
+    lines = data.decode('latin-1').split('\r\n')
+    parts = lines[0].split(' ', 2)
+    if len(parts) != 3:
+        return None
+    headers = []
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, sep, value = line.partition(':')
+        if not sep or not name or name != name.strip():
+            return None
+        headers.append((name, value.strip()))
+    return parts, headers
+
+
+def _header(headers, name, default=''):
+    name = name.lower()
+    for key, value in headers:
+        if key.lower() == name:
+            return value
+    return default
+
+
+def _head_bytes(first_line, headers):
+    lines = [first_line] + [f'{k}: {v}' for k, v in headers]
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _header_values(headers, name):
+    name = name.lower()
+    return [value for key, value in headers if key.lower() == name]
+
+
+def _body_framing(headers):
+    '''('chunked', None), ('length', n) or (None, None) for a message without
+    framing headers. Returns None when the framing is ambiguous (RFC 9112 6.3):
+    both Transfer-Encoding and Content-Length, a coding other than exactly
+    "chunked", or a repeated / non-numeric Content-Length.
+    '''
+    encodings = _header_values(headers, 'transfer-encoding')
+    lengths = _header_values(headers, 'content-length')
+    if encodings:
+        codings = [c.strip().lower() for value in encodings for c in value.split(',')]
+        if lengths or codings != ['chunked']:
+            return None
+        return 'chunked', None
+    if lengths:
+        if len(lengths) != 1 or not lengths[0].isdigit():
+            return None
+        return 'length', int(lengths[0])
+    return None, None
+
+
+async def _relay_body(reader, writer, framing, until_close=False):
+    '''Copy one message body framed as returned by _body_framing().'''
+    kind, length = framing
+    if kind == 'chunked':
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            writer.write(line)
+            size = int(line.split(b';', 1)[0].strip() or b'0', 16)
+            if size == 0:
+                # Trailers, then the terminating blank line
+                while True:
+                    line = await reader.readuntil(b'\r\n')
+                    writer.write(line)
+                    if line == b'\r\n':
+                        break
+                await writer.drain()
+                return
+            writer.write(await reader.readexactly(size + 2))
+            await writer.drain()
+
+    if kind == 'length':
+        remaining = length
+        while remaining > 0:
+            chunk = await reader.read(min(remaining, _CHUNK))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b'', remaining)
+            writer.write(chunk)
+            await writer.drain()
+            remaining -= len(chunk)
+        return
+
+    if until_close:
+        while True:
+            chunk = await reader.read(_CHUNK)
+            if not chunk:
+                return
+            writer.write(chunk)
+            await writer.drain()
+
+
+# ============ Gateway ============
+
+class StreamGateway:
+    '''asyncio HTTP/1.1 front: native event streams, everything else proxied.'''
+
+    def __init__(self, app, api_port):
+        self.app = app
+        self.api_port = api_port
+        self.loop = None
+        self.open_streams = 0
+
+    async def serve(self, host, port):
+        self.loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(self._handle, host, port, limit=_MAX_HEAD)
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader, writer):
+        peer = writer.get_extra_info('peername')
+        client_ip = peer[0] if peer else ''
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), _IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, {'error': 'Request header too large'}, keep_alive=False)
+                    break
+
+                parsed = _parse_head(head)
+                if parsed is None:
+                    await self._respond(writer, 400, {'error': 'Bad request'}, keep_alive=False)
+                    break
+                (method, target, version), headers = parsed
+                request = _Request(method, target, version, headers)
+                if _body_framing(headers) is None:
+                    # Ambiguous body framing: never pass it on, and the rest of
+                    # the connection can't be parsed reliably either
+                    await self._respond(writer, 400, {'error': 'Bad request'}, keep_alive=False)
+                    break
+
+                if method == 'GET' and request.path == '/api/live' \
+                        and request.header('upgrade').lower() == 'websocket':
+                    from web.live import serve_live
+                    keep_alive = await serve_live(self, request, reader, writer)
+                elif method == 'GET' and request.path == '/api/dashboard/stream':
+                    keep_alive = await self._dashboard_stream(request, writer)
+                else:
+                    keep_alive = await self._proxy(request, reader, writer, self.api_port, client_ip)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, OSError):
+            pass
+        except Exception:
+            _log.exception("Stream gateway connection error")
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, body, keep_alive=True):
+        from web.server import security_headers
+        payload = json.dumps(body).encode('utf-8')
+        reasons = {400: 'Bad Request', 401: 'Unauthorized', 403: 'Forbidden', 404: 'Not Found',
+                   431: 'Request Header Fields Too Large', 502: 'Bad Gateway'}
+        headers = [('Content-Type', 'application/json'), ('Content-Length', str(len(payload))),
+                   ('Connection', 'keep-alive' if keep_alive else 'close')]
+        headers += list(security_headers().items())
+        writer.write(_head_bytes(f'HTTP/1.1 {status} {reasons.get(status, "Error")}', headers) + payload)
+        await writer.drain()
+        return keep_alive
+
+    # ============ Proxy ============
+
+    async def _proxy(self, request, reader, writer, port, client_ip):
+        '''Forward one request to Waitress and relay its response.
+        Returns whether the client connection can be reused.
+        '''
+        try:
+            up_reader, up_writer = await asyncio.open_connection('127.0.0.1', port, limit=_MAX_HEAD)
+        except OSError:
+            return await self._respond(writer, 502, {'error': 'Server unavailable'}, request.keep_alive)
+
+        try:
+            if '100-continue' in request.header('expect').lower():
+                # Answered here; Waitress reads the whole body before dispatching anyway
+                writer.write(b'HTTP/1.1 100 Continue\r\n\r\n')
+                await writer.drain()
+
+            framing = _body_framing(request.headers)
+            headers = [(k, v) for k, v in request.headers
+                       if k.lower() not in _HOP_HEADERS
+                       # Only the framing header the body is actually relayed with
+                       and not (framing[0] == 'chunked' and k.lower() == 'content-length')]
+            headers += [('X-Forwarded-For', client_ip), ('X-Orchix-Gateway', '1'), ('Connection', 'close')]
+            up_writer.write(_head_bytes(f'{request.method} {request.target} HTTP/1.1', headers))
+            await _relay_body(reader, up_writer, framing)
+
+            while True:
+                head = await up_reader.readuntil(b'\r\n\r\n')
+                parsed = _parse_head(head)
+                if parsed is None:
+                    return await self._respond(writer, 502, {'error': 'Bad upstream response'}, False)
+                (_, status, reason), resp_headers = parsed
+                if not status.startswith('1'):
+                    break
+
+            handoff = _header(resp_headers, 'x-orchix-job-stream')
+            if handoff:
+                # The view only submitted the job; its progress is streamed from here
+                return await self._job_stream(handoff, resp_headers, writer)
+
+            status_code = int(status)
+            resp_framing = _body_framing(resp_headers)
+            if resp_framing is None:
+                return await self._respond(writer, 502, {'error': 'Bad upstream response'}, False)
+            framed = resp_framing[0] is not None
+            no_body = request.method == 'HEAD' or status_code in (204, 304)
+            # Upstream always closes (we asked it to); the client connection
+            # stays open whenever the response is framed
+            keep_alive = request.keep_alive and (framed or no_body)
+
+            out = [(k, v) for k, v in resp_headers if k.lower() not in _HOP_HEADERS]
+            out.append(('Connection', 'keep-alive' if keep_alive else 'close'))
+            writer.write(_head_bytes(f'HTTP/1.1 {status} {reason}', out))
+            await writer.drain()
+            if not no_body:
+                await _relay_body(up_reader, writer, resp_framing, until_close=not framed)
+            return keep_alive
+        finally:
+            up_writer.close()
+
+    # ============ Native streams ============
+
+    def _session(self, request):
+        '''Decode the Flask session cookie the way the app would.'''
+        from werkzeug.wrappers import Request
+        environ = {
+            'REQUEST_METHOD': request.method,
+            'PATH_INFO': request.path,
+            'QUERY_STRING': request.query,
+            'SERVER_NAME': 'localhost',
+            'SERVER_PORT': '0',
+            'wsgi.url_scheme': 'http',
+            'HTTP_COOKIE': request.header('cookie'),
+        }
+        return self.app.session_interface.open_session(self.app, Request(environ)) or {}
+
+    def _authorize(self, request, permission):
+        '''None if allowed, else (status, error) like require_permission.'''
+        from web.auth import ROLE_PERMISSIONS
+        session = self._session(request)
+        if not session.get('authenticated'):
+            return 401, 'Not authenticated'
+        if permission not in ROLE_PERMISSIONS.get(session.get('role', 'viewer'), set()):
+            return 403, 'Permission denied'
+        return None
+
+    async def _dashboard_stream(self, request, writer):
+        from web.dashboard_sampler import SUBSCRIBER_BUFFER, get_sampler
+        from web.server import security_headers
+
+        denied = self._authorize(request, 'dashboard.read')
+        if denied:
+            return await self._respond(writer, denied[0], {'error': denied[1]}, request.keep_alive)
+
+        mode = 'delta' if parse_qs(request.query).get('mode') == ['delta'] else 'full'
+        headers = [('Content-Type', 'text/event-stream'), ('Cache-Control', 'no-cache'),
+                   ('X-Accel-Buffering', 'no'), ('Connection', 'close')]
+        headers += list(security_headers().items())
+        writer.write(_head_bytes('HTTP/1.1 200 OK', headers))
+
+        sampler = get_sampler()
+        channel = LoopChannel(self.loop, SUBSCRIBER_BUFFER)
+        sub = sampler.subscribe(mode=mode, channel=channel)
+        self.open_streams += 1
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    payload = await asyncio.wait_for(channel.get(), _KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b': keep-alive\n\n')
+                    await writer.drain()
+                    continue
+                if payload is None:
+                    break  # dropped as a slow client; EventSource reconnects
+                writer.write(f'data: {payload}\n\n'.encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.open_streams -= 1
+            sampler.unsubscribe(sub)
+        return False
+
+    async def _job_stream(self, handoff, resp_headers, writer):
+        '''Stream a job's events; the upstream view has already authorized it.'''
+        from core.jobs import get_job_manager
+        from web.api.jobs import sse_event
+
+        job_id, _, after = handoff.partition(' ')
+        job = get_job_manager().get(job_id)
+        if job is None:
+            return await self._respond(writer, 404, {'error': 'Job not found'}, False)
+        last = int(after or 0)
+
+        out = [(k, v) for k, v in resp_headers
+               if k.lower() not in _HOP_HEADERS and k.lower() != 'content-length']
+        out.append(('Connection', 'close'))
+        writer.write(_head_bytes('HTTP/1.1 200 OK', out))
+
+        channel = LoopChannel(self.loop, _JOB_BUFFER)
+        job.subscribe(channel, last)
+        self.open_streams += 1
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    item = await asyncio.wait_for(channel.get(), _KEEPALIVE)
+                except asyncio.TimeoutError:
+                    writer.write(b': keep-alive\n\n')
+                    await writer.drain()
+                    continue
+                if item is None:
+                    if job.done and last >= job.last_seq:
+                        break
+                    job.subscribe(channel, last)  # fell behind: catch up from the buffer
+                    continue
+                last = item[0]
+                writer.write(sse_event(*item).encode('utf-8'))
+                await writer.drain()
+        finally:
+            self.open_streams -= 1
+            job.unsubscribe(channel)
+        return False
+
+
+def serve(app, host='0.0.0.0', port=5000):
+    '''Run Waitress on a loopback port and the gateway on host:port (blocks).'''
+    from waitress import create_server
+
+    api_server = create_server(
+        app, threads=API_THREADS, host='127.0.0.1', port=0, channel_timeout=120,
+        # Client address arrives in X-Forwarded-For (login rate limiting uses it)
+        trusted_proxy='127.0.0.1', trusted_proxy_count=1,
+        trusted_proxy_headers={'x-forwarded-for'}, clear_untrusted_proxy_headers=True,
+    )
+    threading.Thread(target=api_server.run, name='orchix-waitress-api', daemon=True).start()
+
+    gateway = StreamGateway(app, api_server.effective_port)
+    try:
+        asyncio.run(gateway.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api_server.close()